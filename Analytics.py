@@ -0,0 +1,105 @@
+from Tiles import PlotMap
+from Timeline import is_timeline_index
+from bisect import bisect_right
+
+#Binary indexed tree over positions 0..size-1. Point updates and prefix sums in O(log n)
+class FenwickTree:
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    #Adds delta at position
+    def add(self, position, delta=1):
+        position += 1
+        while position <= self.size:
+            self.tree[position] += delta
+            position += position & -position
+
+    #Returns the sum of positions 0..position (inclusive). position -1 gives 0
+    def prefix_sum(self, position):
+        position += 1
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+#Maps each value to its rank among the distinct values (0 = smallest). Equal values share a rank
+def compress(values):
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return [ranks[value] for value in values]
+
+#Returns the number of pairs i < j with values[i] > values[j] in O(n log n). Equal values are not inversions
+def count_inversions(values):
+    ranks = compress(values)
+    tree = FenwickTree(len(set(ranks)))
+    inversions = 0
+    for seen, rank in enumerate(ranks):
+        inversions += seen - tree.prefix_sum(rank) #Earlier values strictly greater than this one
+        tree.add(rank)
+    return inversions
+
+#Returns the positions of a longest non-decreasing subsequence of values (patience sorting, O(n log n))
+def longest_non_decreasing(values):
+    pile_tops = [] #Smallest possible last value of a subsequence of each length
+    pile_positions = [] #Position of that last value
+    previous = [-1] * len(values) #Back pointers to rebuild the subsequence
+    for position, value in enumerate(values):
+        pile = bisect_right(pile_tops, value)
+        if pile == len(pile_tops):
+            pile_tops.append(value)
+            pile_positions.append(position)
+        else:
+            pile_tops[pile] = value
+            pile_positions[pile] = position
+        previous[position] = pile_positions[pile - 1] if pile > 0 else -1
+
+    sequence = []
+    position = pile_positions[-1] if pile_positions else -1
+    while position != -1:
+        sequence.append(position)
+        position = previous[position]
+    sequence.reverse()
+    return sequence
+
+#Measures how far a PlotMap's story order (plot_points) departs from chronology (timeline_index). Returns a dict:
+#"placed": plot points with a timeline_index, in story order. "unplaced": plot points without one (ignored by the metrics)
+#"inversions": pairs told in the opposite order to when they happen. "max_inversions": n(n-1)/2
+#"nonlinearity": inversions / max_inversions (0 = told in order, 1 = told fully backwards)
+#"in_order": largest set of plot points already told chronologically. "flashbacks": the rest, a minimal set to mark as flashbacks
+#"displacement": {"PlotTile ID": story position - chronological position} among placed plot points
+def plotmap_nonlinearity(project, plotmap_id):
+    plotmap = project.tiles.get(plotmap_id)
+    if not isinstance(plotmap, PlotMap):
+        raise ValueError(f"PlotMap {plotmap_id} does not exist in project")
+
+    placed = []
+    unplaced = []
+    for plot_tile_id in plotmap.plot_points:
+        if plot_tile_id not in project.tiles:
+            raise ValueError(f"Plot point {plot_tile_id} does not exist in project")
+        index = project.tiles[plot_tile_id].timeline_index
+        (placed if is_timeline_index(index) else unplaced).append(plot_tile_id)
+
+    times = [project.tiles[plot_tile_id].timeline_index for plot_tile_id in placed]
+    count = len(placed)
+    inversions = count_inversions(times)
+    max_inversions = count * (count - 1) // 2
+
+    in_order = longest_non_decreasing(times)
+    kept = set(in_order)
+
+    #Ties keep story order, so events at the same timeline_index are never displaced relative to each other
+    chronological = sorted(range(count), key=lambda position: (times[position], position))
+    displacement = {placed[position]: position - rank for rank, position in enumerate(chronological)}
+
+    return {
+        "placed": placed,
+        "unplaced": unplaced,
+        "inversions": inversions,
+        "max_inversions": max_inversions,
+        "nonlinearity": inversions / max_inversions if max_inversions else 0.0,
+        "in_order": [placed[position] for position in in_order],
+        "flashbacks": [placed[position] for position in range(count) if position not in kept],
+        "displacement": displacement
+    }
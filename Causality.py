@@ -0,0 +1,462 @@
+from Tiles import PlotTile, logic_link_types
+from Indexes import ProjectIndex
+from Issues import Issue
+import heapq
+
+#Turns a logical link into a precedence edge (earlier Tile ID, later Tile ID)
+#"A requires B" means B happens before A. "A causes/enables/blocks B" means A happens before B
+def precedence_edge(source_id, target_id, link_type):
+    if link_type == "requires":
+        return target_id, source_id
+    return source_id, target_id
+
+#Yields (earlier ID, later ID, source ID, target ID, link_type) for every logical link in the registry
+def iter_precedence_edges(tiles):
+    for tile in tiles.values():
+        for link in tile.links:
+            link_type = link.get("type")
+            if link_type in logic_link_types:
+                before, after = precedence_edge(tile.id, link["target"], link_type)
+                yield before, after, tile.id, link["target"], link_type
+
+#Returns the strongly connected components of a graph in reverse topological order (sinks first). Iterative Tarjan
+#successors is {"node": iterable of nodes}. Every node must be a key
+def strongly_connected_components(successors):
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in successors:
+        if root in index_of:
+            continue
+        work = [(root, iter(successors[root]))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    advanced = True
+                    break
+                if child in on_stack and index_of[child] < lowlink[node]:
+                    lowlink[node] = index_of[child]
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] == index_of[node]: #node is the root of a component
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+#Yields the positions of the set bits of a bitset int
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+#Answers "must X happen before Y?" over the logical link subgraph
+#Cycles are condensed into components and every component stores the bitset of components it reaches, so a query is one bit test
+#Adding a link updates the bitsets in place. Removing a link (or a cycle-closing add) marks the index stale and it is rebuilt on the next query
+class ReachabilityIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.stale = True
+        self.rebuild()
+
+    #Rebuilds the condensed graph and reach bitsets from every logical link in the project
+    def rebuild(self):
+        self.edge_counts = {} #(earlier ID, later ID): number of logical links producing this precedence edge
+        successors = {}
+        for before, after, _, _, _ in iter_precedence_edges(self.project.tiles):
+            self.edge_counts[(before, after)] = self.edge_counts.get((before, after), 0) + 1
+            successors.setdefault(before, set()).add(after)
+            successors.setdefault(after, set())
+
+        self.component = {} #"Tile ID": component number
+        self.members = [] #component number: list of Tile IDs
+        self.cyclic = [] #component number: True if its Tiles must all happen before each other (unsatisfiable)
+        self.reach = [] #component number: bitset of component numbers reachable from it
+
+        #Components come out sinks first, so every successor's reach is final before it is used
+        for component in strongly_connected_components(successors):
+            number = len(self.members)
+            for node in component:
+                self.component[node] = number
+            self.members.append(component)
+            self.cyclic.append(len(component) > 1 or component[0] in successors[component[0]])
+
+            reach = 0
+            for node in component:
+                for child in successors[node]:
+                    child_number = self.component[child]
+                    if child_number != number:
+                        reach |= (1 << child_number) | self.reach[child_number]
+            if self.cyclic[number]:
+                reach |= 1 << number
+            self.reach.append(reach)
+
+        self.stale = False
+
+    def _ensure_fresh(self):
+        if self.stale:
+            self.rebuild()
+
+    #Returns the component number of node_id, creating a singleton component for unseen nodes
+    def _component_for(self, node_id):
+        if node_id not in self.component:
+            number = len(self.members)
+            self.component[node_id] = number
+            self.members.append([node_id])
+            self.cyclic.append(False)
+            self.reach.append(0)
+        return self.component[node_id]
+
+    def link_added(self, tile, link):
+        if link.get("type") not in logic_link_types or self.stale:
+            return
+        before, after = precedence_edge(tile.id, link["target"], link["type"])
+        count = self.edge_counts.get((before, after), 0)
+        self.edge_counts[(before, after)] = count + 1
+        if count: #Same precedence edge already indexed
+            return
+
+        before_number = self._component_for(before)
+        after_number = self._component_for(after)
+        before_bit = 1 << before_number
+        if before_number == after_number or self.reach[after_number] & before_bit:
+            self.stale = True #Edge closes a cycle, so components merge. Rebuild lazily
+            return
+
+        #Everything that reaches "before" (and "before" itself) now also reaches "after" and all it reaches
+        new_reach = (1 << after_number) | self.reach[after_number]
+        for number, reach in enumerate(self.reach):
+            if number == before_number or reach & before_bit:
+                self.reach[number] = reach | new_reach
+
+    def link_removed(self, tile, link):
+        if link.get("type") not in logic_link_types or self.stale:
+            return
+        before, after = precedence_edge(tile.id, link["target"], link["type"])
+        count = self.edge_counts.get((before, after), 0)
+        if count > 1:
+            self.edge_counts[(before, after)] = count - 1
+        else:
+            self.stale = True #Reach bitsets cannot shrink in place. Rebuild lazily
+
+    def tile_added(self, tile):
+        if any(link.get("type") in logic_link_types for link in tile.links):
+            self.stale = True
+
+    def tile_removed(self, tile):
+        if tile.id in self.component:
+            self.stale = True
+
+    #Returns True if the logical links force before_id to happen before after_id (directly or through a chain)
+    def must_precede(self, before_id, after_id):
+        self._ensure_fresh()
+        before_number = self.component.get(before_id)
+        after_number = self.component.get(after_id)
+        if before_number is None or after_number is None:
+            return False
+        return bool(self.reach[before_number] & (1 << after_number))
+
+    #Returns True if a logical link directly orders before_id ahead of after_id
+    def has_direct_edge(self, before_id, after_id):
+        self._ensure_fresh()
+        return self.edge_counts.get((before_id, after_id), 0) > 0
+
+    #Returns the set of Tile IDs that must happen after tile_id
+    def successors_of(self, tile_id):
+        self._ensure_fresh()
+        number = self.component.get(tile_id)
+        if number is None:
+            return set()
+        result = set()
+        for reached in iter_bits(self.reach[number]):
+            result.update(self.members[reached])
+        if not self.cyclic[number]:
+            result.discard(tile_id)
+        return result
+
+    #Returns error Issues for pairs of plot points in one PlotMap ordered by a chain of logical links (not a direct link) whose timeline_index contradicts the chain
+    def transitive_errors(self, plot_ids, timeline):
+        self._ensure_fresh()
+        tiles = self.project.tiles
+
+        placed = [plot_id for plot_id in plot_ids if plot_id in timeline and plot_id in self.component]
+        placed.sort(key=lambda plot_id: timeline[plot_id])
+
+        members_by_component = {} #component number: plot IDs of this PlotMap in it
+        for plot_id in placed:
+            members_by_component.setdefault(self.component[plot_id], []).append(plot_id)
+
+        errors = []
+        seen_mask = 0 #Bitset of components holding plot points that happen at or before the current time
+        position = 0
+        while position < len(placed):
+            #Add every plot point sharing this time before testing, so equal times count as violations
+            time = timeline[placed[position]]
+            group_end = position
+            while group_end < len(placed) and timeline[placed[group_end]] == time:
+                seen_mask |= 1 << self.component[placed[group_end]]
+                group_end += 1
+
+            for plot_id in placed[position:group_end]:
+                violating = self.reach[self.component[plot_id]] & seen_mask
+                for number in iter_bits(violating):
+                    for other_id in members_by_component[number]:
+                        if other_id == plot_id or timeline[other_id] > time:
+                            continue
+                        if self.edge_counts.get((plot_id, other_id), 0):
+                            continue #Direct links are reported by the direct check
+                        name = tiles[plot_id].name
+                        other_name = tiles[other_id].name
+                        errors.append(Issue.error("plotmap.transitive_order", "{} must happen before {} through a chain of logical links, but {} does not happen after {}",
+                                                  name, other_name, other_name, name, tile_ids=(plot_id, other_id)))
+            position = group_end
+
+        return errors
+
+#Keeps a topological order of the logical link precedence graph up to date as links are added (Pearce-Kelly dynamic ordering)
+#A new edge that already agrees with the order costs O(1). Otherwise only the Tiles ordered between its endpoints are searched and reordered,
+#which is also where any cycle the edge would close must lie
+#Cycles already in the project (for example from loaded files) are left out of the order and reported by find_cycles()
+class TopologicalOrderIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.rebuild()
+
+    #Rebuilds the order from every logical link in the project
+    def rebuild(self):
+        self.successors = {} #"Tile ID": {"later Tile ID": number of logical links producing this edge}
+        self.predecessors = {} #"Tile ID": {"earlier Tile ID": number of logical links producing this edge}
+        self.order = {} #"Tile ID": position in the topological order
+        self.broken = set() #(earlier ID, later ID) edges inside existing cycles that the order ignores
+
+        for before, after, _, _, _ in iter_precedence_edges(self.project.tiles):
+            self._count_edge(before, after, 1)
+
+        #Condensation order (sources first) is a topological order once edges inside cycles are ignored
+        components = strongly_connected_components({node: self.successors[node].keys() for node in self.successors})
+        position = 0
+        for component in reversed(components):
+            for node in component:
+                self.order[node] = position
+                position += 1
+        self.next_position = position
+
+        for before, targets in self.successors.items():
+            for after in targets:
+                if self.order[before] >= self.order[after]:
+                    self.broken.add((before, after))
+
+    def _count_edge(self, before, after, change):
+        for node in (before, after):
+            self.successors.setdefault(node, {})
+            self.predecessors.setdefault(node, {})
+        count = self.successors[before].get(after, 0) + change
+        if count > 0:
+            self.successors[before][after] = count
+            self.predecessors[after][before] = count
+        else:
+            self.successors[before].pop(after, None)
+            self.predecessors[after].pop(before, None)
+            self.broken.discard((before, after))
+        return count
+
+    def _position(self, node):
+        if node not in self.order:
+            self.order[node] = self.next_position
+            self.next_position += 1
+        return self.order[node]
+
+    #Searches from start only visiting Tiles whose position is within [lower, upper]. Follows predecessors instead of successors if backward
+    #Returns {"Tile ID": parent ID} of every Tile reached
+    def _bounded_search(self, start, lower, upper, backward=False, stop=None):
+        edges = self.predecessors if backward else self.successors
+        parents = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for child in edges.get(node, ()):
+                edge = (child, node) if backward else (node, child)
+                if child in parents or edge in self.broken:
+                    continue
+                position = self.order.get(child)
+                if position is None or position < lower or position > upper:
+                    continue
+                parents[child] = node
+                if child == stop:
+                    return parents
+                stack.append(child)
+        return parents
+
+    #Returns the cycle (list of Tile IDs, each happening before the next, ending where it starts) that the edge before -> after would close, or None
+    def find_cycle(self, before, after):
+        if before == after:
+            return [before, before]
+        if before not in self.order or after not in self.order:
+            return None
+        upper = self.order[before]
+        if self.order[after] > upper:
+            return None #Edge agrees with the current order
+
+        parents = self._bounded_search(after, self.order[after], upper, stop=before)
+        if before not in parents:
+            return None
+        path = []
+        node = before
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        path.reverse() #after -> ... -> before
+        return [before] + path
+
+    def link_added(self, tile, link):
+        if link.get("type") not in logic_link_types:
+            return
+        before, after = precedence_edge(tile.id, link["target"], link["type"])
+        if self._count_edge(before, after, 1) > 1:
+            return #Same precedence edge already ordered
+        upper = self._position(before) #New Tiles are appended in edge order so they need no reordering
+        lower = self._position(after)
+        if lower > upper:
+            return #Edge agrees with the current order
+        if before == after or self.find_cycle(before, after):
+            self.broken.add((before, after)) #Cycles are only left in place when added around add_link's check
+            return
+
+        #Pearce-Kelly reorder: Tiles reachable from "after" move behind Tiles that reach "before", reusing their old positions
+        forward = self._bounded_search(after, lower, upper)
+        backward = self._bounded_search(before, lower, upper, backward=True)
+        moved = sorted(backward, key=self.order.get) + sorted(forward, key=self.order.get)
+        positions = sorted(self.order[node] for node in moved)
+        for node, position in zip(moved, positions):
+            self.order[node] = position
+
+    def link_removed(self, tile, link):
+        if link.get("type") not in logic_link_types:
+            return
+        before, after = precedence_edge(tile.id, link["target"], link["type"])
+        self._count_edge(before, after, -1) #Removing an edge never invalidates a topological order
+
+    def tile_added(self, tile):
+        for link in tile.links:
+            self.link_added(tile, link)
+
+    def tile_removed(self, tile):
+        for link in tile.links:
+            self.link_removed(tile, link)
+
+    #Returns one concrete cycle (list of Tile IDs ending where it starts) for each group of Tiles whose logical links contradict each other
+    def find_cycles(self):
+        cycles = []
+        successors = {node: self.successors[node].keys() for node in self.successors}
+        for component in strongly_connected_components(successors):
+            if len(component) > 1 or component[0] in self.successors[component[0]]:
+                cycles.append(_shortest_cycle(component, successors))
+        return cycles
+
+#Computes a chronological order for every PlotTile that satisfies all logical links, and writes it back as timeline_index start, start + gap, start + 2 * gap...
+#Tiles keep their current relative order where the links allow it: ties are broken by existing timeline_index, then registry order.
+#An unplaced Tile (timeline_index None) is placed right after its latest prerequisite, or at the end if it has none
+#Returns {"order": [Tile IDs], "changed": [Tile IDs whose timeline_index was rewritten], "conflicts": [cycles]}
+#If the links contain cycles nothing is written, and each conflict is one cycle of (source ID, target ID, link_type) links per group of contradicting Tiles.
+#Every such cycle is a minimal set of constraints that cannot be ordered: removing any one of its links breaks it
+def solve_timeline(project, write=True, start=0, gap=1):
+    plot_tiles = [tile for tile in project.tiles.values() if isinstance(tile, PlotTile)]
+    sequence = {tile.id: number for number, tile in enumerate(plot_tiles)} #Registry order for stable tie-breaking
+
+    successors = {tile.id: [] for tile in plot_tiles}
+    indegree = {tile.id: 0 for tile in plot_tiles}
+    edge_links = {} #(earlier ID, later ID): the (source ID, target ID, link_type) link that produced it
+    for before, after, source_id, target_id, link_type in iter_precedence_edges(project.tiles):
+        if before not in sequence or after not in sequence or (before, after) in edge_links:
+            continue
+        edge_links[(before, after)] = (source_id, target_id, link_type)
+        successors[before].append(after)
+        indegree[after] += 1
+
+    unplaced = float("inf")
+    inherited = {} #"Tile ID": latest effective time among processed prerequisites (for unplaced Tiles)
+
+    def priority(tile):
+        if tile.timeline_index is not None:
+            return (tile.timeline_index, 0, sequence[tile.id])
+        return (inherited.get(tile.id, unplaced), 1, sequence[tile.id])
+
+    heap = [priority(tile) + (tile.id,) for tile in plot_tiles if indegree[tile.id] == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        time, _, _, tile_id = heapq.heappop(heap)
+        order.append(tile_id)
+        for child in successors[tile_id]:
+            if time > inherited.get(child, -unplaced):
+                inherited[child] = time
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                heapq.heappush(heap, priority(project.tiles[child]) + (child,))
+
+    result = {"order": order, "changed": [], "conflicts": []}
+    if len(order) < len(plot_tiles):
+        remaining = {tile_id: [child for child in successors[tile_id] if indegree[child] > 0] for tile_id in indegree if indegree[tile_id] > 0}
+        for component in strongly_connected_components(remaining):
+            if len(component) > 1 or component[0] in remaining[component[0]]:
+                cycle = _shortest_cycle(component, remaining)
+                result["conflicts"].append([edge_links[(cycle[i], cycle[i + 1])] for i in range(len(cycle) - 1)])
+        return result
+
+    if write:
+        for rank, tile_id in enumerate(order):
+            position = start + rank * gap
+            tile = project.tiles[tile_id]
+            if tile.timeline_index != position:
+                tile.timeline_index = position
+                result["changed"].append(tile_id)
+    return result
+
+#Returns the shortest cycle through a component's first Tile as a list of Tile IDs ending where it starts
+def _shortest_cycle(component, successors):
+    members = set(component)
+    start = component[0]
+    parents = {start: None}
+    queue = [start]
+    for node in queue:
+        for child in successors[node]:
+            if child == start:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                return path + [start]
+            if child in members and child not in parents:
+                parents[child] = node
+                queue.append(child)
+    return [start, start]
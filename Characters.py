@@ -0,0 +1,352 @@
+from Indexes import ProjectIndex, involvement
+import heapq
+from Timeline import is_timeline_index
+
+introduction_tag = "introduction" #A PlotTile with this tag introduces every character it involves
+
+#Index of where each CharacterTile appears: ordered by position in every PlotMap and by timeline_index
+#Appearances come from involves links in either direction between a PlotTile and a CharacterTile
+#Only the PlotMaps and characters touched by a change are rebuilt, and first appearances are cached so lookups are O(1) once fresh
+#Each Tile's share of the counts is recorded, so a Tile edited directly (mark_changed) or removed takes back exactly what it added, and
+#Tiles whose involves links point at a Tile that is added or removed are counted again
+class CharacterIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.cast = {} #"PlotTile ID": {"CharacterTile ID": involves link count}
+        self.appearances = {} #"CharacterTile ID": {"PlotTile ID": involves link count}
+        self.counted = {} #"Tile ID": {(PlotTile ID, CharacterTile ID): involves link count} its links added to cast
+        self.linkers = {} #"Tile ID": set of Tile IDs whose involves links target it (it may not be in the project). May hold stale IDs
+        self.maps_of = {} #"PlotTile ID": set of PlotMap IDs it is a plot point of
+        self.map_members = {} #"PlotMap ID": plot_points as last indexed
+        self.map_positions = {} #"PlotMap ID": {"CharacterTile ID": sorted list of (position, PlotTile ID)}
+        self.timeline = {} #"CharacterTile ID": sorted list of (timeline_index, PlotTile ID)
+        self.dirty_maps = set()
+        self.dirty_characters = set()
+
+        for tile in project.tiles.values():
+            self._index_links(tile)
+            if tile.tile_type == "PlotMap":
+                self.dirty_maps.add(tile.id)
+
+    def _count(self, plot_id, character_id, delta):
+        cast = self.cast.setdefault(plot_id, {})
+        cast[character_id] = cast.get(character_id, 0) + delta
+        appearances = self.appearances.setdefault(character_id, {})
+        appearances[plot_id] = cast[character_id]
+        if cast[character_id] <= 0:
+            del cast[character_id]
+            del appearances[plot_id]
+        self.dirty_characters.add(character_id)
+        self.dirty_maps.update(self.maps_of.get(plot_id, ()))
+
+    def _link(self, tile, link, delta):
+        if not isinstance(link, dict) or link.get("type") != "involves":
+            return
+        if delta > 0:
+            self.linkers.setdefault(link.get("target"), set()).add(tile.id)
+        pair = involvement(self.project.tiles, tile, link)
+        if pair is None:
+            return
+        counted = self.counted.setdefault(tile.id, {})
+        count = counted.get(pair, 0) + delta
+        if count < 0:
+            return #An involvement this index never counted (ex: the link was appended without a hook)
+        if count:
+            counted[pair] = count
+        else:
+            del counted[pair]
+        self._count(pair[0], pair[1], delta)
+
+    def _index_links(self, tile):
+        for link in getattr(tile, "links", ()):
+            self._link(tile, link, 1)
+
+    #Takes back everything tile_id's links added to the counts (the index's record, which may differ from tile.links after direct edits)
+    def _unindex_links(self, tile_id):
+        for (plot_id, character_id), count in self.counted.pop(tile_id, {}).items():
+            self._count(plot_id, character_id, -count)
+
+    #Counts the involves links of the Tiles linking to tile_id again, after it was added or before it is removed (without it)
+    def _recount_linkers(self, tile_id, removed=False):
+        tiles = self.project.tiles
+        for linker_id in list(self.linkers.get(tile_id, ())):
+            if linker_id == tile_id:
+                continue
+            self._unindex_links(linker_id)
+            linker = tiles.get(linker_id)
+            if linker is None:
+                continue
+            for link in getattr(linker, "links", ()):
+                if not (removed and isinstance(link, dict) and link.get("target") == tile_id):
+                    self._link(linker, link, 1)
+        if removed:
+            self.linkers.pop(tile_id, None)
+
+    def link_added(self, tile, link):
+        self._link(tile, link, 1)
+
+    def link_removed(self, tile, link):
+        self._link(tile, link, -1)
+
+    def tile_added(self, tile):
+        self._index_links(tile)
+        self._recount_linkers(tile.id)
+        if tile.tile_type == "PlotMap":
+            self.dirty_maps.add(tile.id)
+
+    #tile.links may have been edited directly, so its involvements are counted again
+    def tile_changed(self, tile):
+        self._unindex_links(tile.id)
+        self._index_links(tile)
+
+    def tile_removed(self, tile):
+        self._unindex_links(tile.id)
+        self._recount_linkers(tile.id, removed=True)
+        if tile.tile_type == "PlotMap":
+            self._drop_map(tile.id)
+            self.dirty_maps.discard(tile.id)
+        self.appearances.pop(tile.id, None)
+        self.maps_of.pop(tile.id, None)
+        self.timeline.pop(tile.id, None)
+        self.dirty_characters.discard(tile.id)
+
+    def timeline_changed(self, tile, old_index):
+        self.dirty_characters.update(self.cast.get(tile.id, ()))
+
+    def plot_points_changed(self, plotmap):
+        self.dirty_maps.add(plotmap.id)
+
+    def _drop_map(self, plotmap_id):
+        for plot_id in self.map_members.pop(plotmap_id, ()):
+            self.maps_of.get(plot_id, set()).discard(plotmap_id)
+        self.map_positions.pop(plotmap_id, None)
+
+    def _rebuild_map(self, plotmap_id):
+        self._drop_map(plotmap_id)
+        plotmap = self.project.tiles.get(plotmap_id)
+        positions = {}
+        if plotmap is not None:
+            self.map_members[plotmap_id] = list(plotmap.plot_points)
+            for position, plot_id in enumerate(plotmap.plot_points):
+                self.maps_of.setdefault(plot_id, set()).add(plotmap_id)
+                for character_id in self.cast.get(plot_id, ()):
+                    positions.setdefault(character_id, []).append((position, plot_id))
+        self.map_positions[plotmap_id] = positions
+
+    def _rebuild_character(self, character_id):
+        placed = []
+        for plot_id in self.appearances.get(character_id, ()):
+            index = getattr(self.project.tiles.get(plot_id), "timeline_index", None)
+            if is_timeline_index(index):
+                placed.append((index, plot_id))
+        placed.sort()
+        self.timeline[character_id] = placed
+
+    def _fresh_map(self, plotmap_id):
+        if plotmap_id in self.dirty_maps or plotmap_id not in self.map_positions:
+            self._rebuild_map(plotmap_id)
+            self.dirty_maps.discard(plotmap_id)
+        return self.map_positions[plotmap_id]
+
+    def _fresh_character(self, character_id):
+        if character_id in self.dirty_characters or character_id not in self.timeline:
+            self._rebuild_character(character_id)
+            self.dirty_characters.discard(character_id)
+        return self.timeline[character_id]
+
+    #Returns the character's appearances in a PlotMap as a list of (position, PlotTile ID) in story order
+    def appearances_in_map(self, character_id, plotmap_id):
+        return self._fresh_map(plotmap_id).get(character_id, [])
+
+    #Returns the character's placed appearances as a list of (timeline_index, PlotTile ID) in chronological order
+    def appearances_on_timeline(self, character_id):
+        return self._fresh_character(character_id)
+
+    #Returns the PlotTile where the character first appears in a PlotMap (or on the timeline if plotmap_id is None), or None
+    def first_appearance(self, character_id, plotmap_id=None):
+        found = self.appearances_in_map(character_id, plotmap_id) if plotmap_id is not None else self.appearances_on_timeline(character_id)
+        return self.project.tiles[found[0][1]] if found else None
+
+    #Returns the PlotTiles tagged as introducing the character
+    def introductions(self, character_id):
+        return [self.project.tiles[plot_id] for plot_id in self.appearances.get(character_id, ()) if self.project.tiles[plot_id].has_tag(introduction_tag)]
+
+    #Returns error messages for characters appearing before their introduction, on the timeline and in every PlotMap
+    #The introduction is the involving PlotTile tagged "introduction". Characters without one are introduced by their first appearance
+    def continuity_errors(self, character_ids=None):
+        tiles = self.project.tiles
+        if character_ids is None:
+            character_ids = [character_id for character_id, plots in self.appearances.items() if plots and character_id in tiles]
+        for tile in tiles.values(): #maps_of must be current before it is used to pick PlotMaps
+            if tile.tile_type == "PlotMap":
+                self._fresh_map(tile.id)
+
+        errors = []
+        for character_id in character_ids:
+            introductions = self.introductions(character_id)
+            if not introductions:
+                continue
+            name = tiles[character_id].name
+            introduction_ids = {tile.id for tile in introductions}
+
+            placed_introductions = [tile.timeline_index for tile in introductions if is_timeline_index(tile.timeline_index)]
+            if placed_introductions:
+                introduced_at = min(placed_introductions)
+                for index, plot_id in self.appearances_on_timeline(character_id):
+                    if index >= introduced_at:
+                        break
+                    errors.append(f"Character Continuity: {name} appears in {tiles[plot_id].name} (timeline_index {index}) before being introduced (timeline_index {introduced_at})")
+
+            plotmap_ids = set()
+            for introduction_id in introduction_ids: #Only PlotMaps holding the introduction can show the character too early
+                plotmap_ids.update(self.maps_of.get(introduction_id, ()))
+            for plotmap_id in sorted(plotmap_ids):
+                appearances = self.appearances_in_map(character_id, plotmap_id)
+                introduced_position = next((position for position, plot_id in appearances if plot_id in introduction_ids), None)
+                if introduced_position is None:
+                    continue
+                for position, plot_id in appearances:
+                    if position >= introduced_position:
+                        break
+                    errors.append(f"Character Continuity: {name} appears in {tiles[plot_id].name} before being introduced in PlotMap {tiles[plotmap_id].name}")
+        return errors
+
+#How often each pair of characters appears in the same PlotTile, for suggesting character links
+#Counts are the sparse product A * A^T of the character x PlotTile incidence matrix A, read from the cast of CharacterIndex: each
+#PlotTile adds 1 to every pair in its cast. Hooks only note which PlotTiles and Tiles changed. The next query takes back the pairs
+#of those PlotTiles' last counted cast and adds the pairs of their current one. Counts within one PlotMap are summed over its plot
+#points on demand and cached
+class CoAppearanceIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self._pairs = {} #(CharacterTile ID, CharacterTile ID) in sorted order: number of shared PlotTiles
+        self.members = {} #"PlotTile ID": frozenset of CharacterTile IDs, the cast last counted in _pairs
+        self.plots_of = {} #"CharacterTile ID": set of PlotTile IDs it was last counted in
+        self.map_pairs = {} #"PlotMap ID": (set of plot point IDs, pair counts within the PlotMap)
+        self.dirty_plots = set() #PlotTile IDs whose cast may have changed
+        self.dirty_tiles = set() #Tile IDs added, removed or edited directly. Every PlotTile they were or are cast in is counted again
+        for plot_id, cast in project.characters.cast.items(): #A * A^T, one PlotTile column at a time
+            if cast:
+                self.members[plot_id] = frozenset(cast)
+                for character_id in cast:
+                    self.plots_of.setdefault(character_id, set()).add(plot_id)
+                self._add_pairs(self._pairs, cast, 1)
+
+    @staticmethod
+    def _pair(first_id, second_id):
+        return (first_id, second_id) if first_id < second_id else (second_id, first_id)
+
+    @staticmethod
+    def _add_pairs(counts, characters, delta):
+        characters = sorted(characters)
+        for position, character_id in enumerate(characters):
+            for other_id in characters[position + 1:]:
+                count = counts.get((character_id, other_id), 0) + delta
+                if count > 0:
+                    counts[(character_id, other_id)] = count
+                else:
+                    counts.pop((character_id, other_id), None)
+
+    def _mark(self, tile, link):
+        if link.get("type") == "involves":
+            pair = involvement(self.project.tiles, tile, link)
+            if pair is not None:
+                self.dirty_plots.add(pair[0])
+
+    def link_added(self, tile, link):
+        self._mark(tile, link)
+
+    def link_removed(self, tile, link):
+        self._mark(tile, link)
+
+    def tile_added(self, tile):
+        self.dirty_tiles.add(tile.id)
+
+    def tile_removed(self, tile):
+        self.dirty_tiles.add(tile.id)
+        self.map_pairs.pop(tile.id, None)
+
+    def tile_changed(self, tile):
+        self.dirty_tiles.add(tile.id)
+
+    def plot_points_changed(self, plotmap):
+        self.map_pairs.pop(plotmap.id, None)
+
+    #Counts the pairs of every PlotTile whose cast may have changed since the last query
+    def _refresh(self):
+        if not self.dirty_plots and not self.dirty_tiles:
+            return
+        characters = self.project.characters #Kept in sync by the same hooks, so it is current here
+        cast = characters.cast
+        appearances = characters.appearances
+        plot_ids = self.dirty_plots
+        for tile_id in self.dirty_tiles:
+            plot_ids.add(tile_id)
+            plot_ids.update(self.plots_of.get(tile_id, ()))
+            plot_ids.update(appearances.get(tile_id, ()))
+        for plot_id in plot_ids:
+            old = self.members.get(plot_id, frozenset())
+            new = frozenset(cast.get(plot_id, ()))
+            if old == new:
+                continue
+            self._add_pairs(self._pairs, old, -1)
+            self._add_pairs(self._pairs, new, 1)
+            for character_id in old - new:
+                self.plots_of[character_id].discard(plot_id)
+                if not self.plots_of[character_id]:
+                    del self.plots_of[character_id]
+            for character_id in new - old:
+                self.plots_of.setdefault(character_id, set()).add(plot_id)
+            if new:
+                self.members[plot_id] = new
+            else:
+                self.members.pop(plot_id, None)
+            for plotmap_id in [plotmap_id for plotmap_id, (members, _) in self.map_pairs.items() if plot_id in members]:
+                del self.map_pairs[plotmap_id]
+        self.dirty_plots = set()
+        self.dirty_tiles = set()
+
+    #(CharacterTile ID, CharacterTile ID) in sorted order: number of shared PlotTiles
+    @property
+    def pairs(self):
+        self._refresh()
+        return self._pairs
+
+    #Returns True if either character links to the other
+    def _linked(self, first_id, second_id):
+        tiles = self.project.tiles
+        return any(link.get("target") == other_id for tile_id, other_id in ((first_id, second_id), (second_id, first_id))
+                   for link in getattr(tiles.get(tile_id), "links", ()) if isinstance(link, dict))
+
+    def _map_counts(self, plotmap_id):
+        self._refresh()
+        if plotmap_id not in self.map_pairs:
+            plotmap = self.project.tiles.get(plotmap_id)
+            if plotmap is None or plotmap.tile_type != "PlotMap":
+                raise ValueError(f"PlotMap {plotmap_id} not found in project")
+            members = set(plotmap.plot_points)
+            counts = {}
+            for plot_id in members:
+                self._add_pairs(counts, self.members.get(plot_id, ()), 1)
+            self.map_pairs[plotmap_id] = (members, counts)
+        return self.map_pairs[plotmap_id][1]
+
+    #Returns the number of PlotTiles (in plotmap_id only, if given) involving both characters
+    def shared(self, first_id, second_id, plotmap_id=None):
+        counts = self.pairs if plotmap_id is None else self._map_counts(plotmap_id)
+        return counts.get(self._pair(first_id, second_id), 0)
+
+    #Returns up to limit pairs of characters that share at least min_shared PlotTiles but have no link between them, most shared first
+    #Each suggestion is {"characters": (ID, ID), "shared": PlotTiles in common, "ratio": shared / appearances of the rarer character}
+    def suggestions(self, limit=10, min_shared=2, plotmap_id=None):
+        counts = self.pairs if plotmap_id is None else self._map_counts(plotmap_id)
+        plots_of = self.plots_of
+        candidates = [(count, count / min(len(plots_of[pair[0]]), len(plots_of[pair[1]])), pair) for pair, count in counts.items() if count >= min_shared]
+        wanted = limit
+        while True: #Links are only looked up for the best pairs, taking more while linked pairs crowd out the limit
+            best = heapq.nlargest(wanted, candidates, key=lambda candidate: (candidate[0], candidate[1])) #Ties go to the pair that is more often together
+            unlinked = [candidate for candidate in best if not self._linked(*candidate[2])]
+            if len(unlinked) >= limit or len(best) < wanted:
+                break
+            wanted *= 2
+        return [{"characters": pair, "shared": count, "ratio": ratio} for count, ratio, pair in unlinked[:limit]]
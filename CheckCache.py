@@ -0,0 +1,207 @@
+from Indexes import ProjectIndex
+from ParallelCheck import _snapshot, _restore, _merge_backlinks
+from Tiles import TileStub
+import copy
+
+#Per-Tile load_check results, kept so a check only revisits Tiles changed since the last one
+#A Tile's check reads its own fields plus the Tiles it links to, resolves to, or holds as plot points. Those reads are recorded,
+#so when a Tile changes (or appears/disappears) every Tile whose result depends on it is checked again, including links to missing IDs
+#Edits made without a hook (ex: tile.links.append(...) with no mark_changed) are caught by a signature of each Tile's fields, links and
+#plot points taken when it was checked. find_unhooked compares them, a scan of the registry but no checking. save runs it before its check
+class LoadCheckCache(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.results = {} #"Tile ID": (errors, warnings) for Tiles with at least one issue
+        self.reads = {} #"Tile ID": set of Tile IDs its last check looked up
+        self.readers = {} #"Tile ID": set of Tile IDs whose last check looked it up (the ID may not exist, ex: a broken link)
+        self.dirty = set() #Tile IDs to check again
+        self.complete = False #True once every Tile has been checked
+        self.generation = 0 #Bumped by every check. Background jobs from an older generation are dropped
+        self.in_flight = set() #Tile IDs taken by the current background job. See begin_background
+        self.signatures = {} #"Tile ID": _signature of the Tile when it was last checked
+
+    def _mark(self, tile):
+        self.dirty.add(getattr(tile, "id", None))
+
+    def link_added(self, tile, link):
+        self._mark(tile)
+
+    def link_removed(self, tile, link):
+        self._mark(tile)
+
+    def tile_added(self, tile):
+        self._mark(tile)
+
+    def tile_removed(self, tile):
+        self._mark(tile)
+
+    def timeline_changed(self, tile, old_index):
+        self._mark(tile)
+
+    def date_changed(self, tile):
+        self._mark(tile)
+
+    def plot_points_changed(self, plotmap):
+        self._mark(plotmap)
+
+    def tile_changed(self, tile):
+        self._mark(tile)
+
+    #Returns the IDs a Tile's check looks up in the registry
+    @staticmethod
+    def _lookups(tile):
+        looked_up = set()
+        if isinstance(tile, TileStub):
+            return looked_up #Not checked until its file is read
+        for link in getattr(tile, "links", ()):
+            if isinstance(link, dict) and "target" in link:
+                looked_up.add(link["target"])
+        for resolved in getattr(tile, "resolved_links", ()):
+            looked_up.add(getattr(resolved, "id", None))
+        for plot_tile_id in getattr(tile, "plot_points", ()):
+            looked_up.add(plot_tile_id)
+        for resolved in getattr(tile, "resolved_plot_points", ()):
+            looked_up.add(getattr(resolved, "id", None))
+        looked_up.discard(None)
+        return looked_up
+
+    #Returns what a Tile's check depends on in its own fields, to spot edits no hook saw. Stubs (None) are not checked
+    @staticmethod
+    def _signature(tile):
+        if isinstance(tile, TileStub):
+            return None
+        fields = getattr(tile, "__dict__", {})
+        return (type(tile), tuple(fields), fields.get("id"), fields.get("name"), fields.get("_timeline_index"), fields.get("_date"),
+                [dict(link) if isinstance(link, dict) else link for link in fields.get("links", ())],
+                [getattr(resolved, "id", None) for resolved in fields.get("resolved_links", ())],
+                list(fields.get("plot_points", ())),
+                [getattr(resolved, "id", None) for resolved in fields.get("resolved_plot_points", ())])
+
+    #Marks Tiles whose signature changed, and Tiles added to or removed from the registry directly, for the next incremental check
+    def find_unhooked(self):
+        tiles = self.project.tiles
+        for tile_id, tile in tiles.items():
+            if tile_id not in self.signatures or self.signatures[tile_id] != self._signature(tile):
+                self.dirty.add(tile_id)
+        for tile_id in self.signatures:
+            if tile_id not in tiles:
+                self.dirty.add(tile_id)
+
+    def _forget(self, tile_id):
+        for looked_up in self.reads.pop(tile_id, ()):
+            readers = self.readers.get(looked_up)
+            if readers is not None:
+                readers.discard(tile_id)
+                if not readers:
+                    del self.readers[looked_up]
+
+    def _store(self, tile_id, errors, warnings, looked_up, signature):
+        self._forget(tile_id)
+        self.signatures[tile_id] = signature
+        if errors or warnings:
+            self.results[tile_id] = (errors, warnings)
+        else:
+            self.results.pop(tile_id, None)
+        self.reads[tile_id] = looked_up
+        for other_id in looked_up:
+            self.readers.setdefault(other_id, set()).add(tile_id)
+
+    def _check_one(self, tile_id, tile):
+        errors, warnings = self.project._check_tile(self.project.tiles, tile_id, tile)
+        self._store(tile_id, errors, warnings, self._lookups(tile), self._signature(tile))
+
+    def _drop(self, tile_id):
+        self._forget(tile_id)
+        self.results.pop(tile_id, None)
+        self.signatures.pop(tile_id, None)
+
+    #Tile IDs to check again: changed Tiles and the Tiles whose last check looked them up
+    def _to_check(self):
+        to_check = set(self.dirty)
+        for tile_id in self.dirty:
+            to_check.update(self.readers.get(tile_id, ()))
+        return to_check
+
+    #Checks every Tile (full) or only changed Tiles and their readers. Returns (errors, warnings) in registry order
+    def check(self, full=False):
+        tiles = self.project.tiles
+        self.generation += 1
+        self.dirty |= self.in_flight #A background job still running is dropped, so its Tiles are checked here
+        self.in_flight = set()
+        if full or not self.complete:
+            self.results.clear()
+            self.reads.clear()
+            self.readers.clear()
+            self.signatures.clear()
+            for tile_id, tile in tiles.items():
+                self._check_one(tile_id, tile)
+            self.complete = True
+        else:
+            for tile_id in self._to_check():
+                if tile_id in tiles:
+                    self._check_one(tile_id, tiles[tile_id])
+                else:
+                    self._drop(tile_id)
+        self.dirty.clear()
+        return self._collect()
+
+    #Background incremental check, for callers that must not block while Tiles are checked (ex: the GUI)
+    #begin_background and finish_background run where the project is edited. run_background_job only reads the job, so it can run on
+    #another thread while editing continues. Tiles edited after begin_background stay dirty for the next check
+    #Returns a job: copies of the Tiles to check, the registry IDs, and the cache and generation it belongs to
+    def begin_background(self):
+        tiles = self.project.tiles
+        self.generation += 1
+        full = not self.complete
+        to_check = set(tiles) if full else self._to_check() | self.in_flight
+        self.dirty.clear()
+        self.in_flight = to_check
+        snapshots = [_snapshot(tile_id, tiles[tile_id]) for tile_id in to_check if tile_id in tiles]
+        signatures = [self._signature(tiles[tile_id]) for tile_id in to_check if tile_id in tiles]
+        return {"cache": self, "generation": self.generation, "full": full, "tile_ids": set(tiles), "snapshots": copy.deepcopy(snapshots),
+                "signatures": signatures, "checked": to_check}
+
+    #Checks a job's Tile copies. Returns one (errors, warnings, deferred back links, looked up IDs) per copy
+    @staticmethod
+    def run_background_job(job):
+        from Project import Project #Imported here because Project imports this module
+        results = []
+        for tile_id_key, tile_class, fields, stubs in job["snapshots"]:
+            tile = _restore(tile_class, fields, stubs)
+            backlinks = []
+            errors, warnings = Project._check_tile(job["tile_ids"], tile_id_key, tile, backlinks)
+            results.append((errors, warnings, backlinks, LoadCheckCache._lookups(tile)))
+        return results
+
+    #Stores a finished job's results. Returns (errors, warnings) like check, or None if the job is stale (a newer check started)
+    def finish_background(self, job, results):
+        if job["cache"] is not self or job["generation"] != self.generation:
+            return None
+        tiles = self.project.tiles
+        if job["full"]:
+            self.results.clear()
+            self.reads.clear()
+            self.readers.clear()
+            self.signatures.clear()
+        for (tile_id, _, _, _), signature, (errors, warnings, backlinks, looked_up) in zip(job["snapshots"], job["signatures"], results):
+            if tile_id in tiles:
+                self._store(tile_id, _merge_backlinks(self.project, errors, backlinks), warnings, looked_up, signature)
+        for tile_id in job["checked"]:
+            if tile_id not in tiles:
+                self._drop(tile_id)
+        self.in_flight = set()
+        self.complete = True
+        return self._collect()
+
+    #Returns the stored (errors, warnings) in registry order
+    def _collect(self):
+        tiles = self.project.tiles
+        errors = []
+        warnings = []
+        if self.results: #Only walks the registry when something is wrong, to keep the report in registry order
+            for tile_id in tiles:
+                if tile_id in self.results:
+                    tile_errors, tile_warnings = self.results[tile_id]
+                    errors.extend(tile_errors)
+                    warnings.extend(tile_warnings)
+        return errors, warnings
@@ -0,0 +1,214 @@
+from Indexes import ProjectIndex
+from bisect import bisect_left
+import re
+
+#An in-world calendar used to parse PlotTile.date strings into sortable keys
+#months is a list of month names (their position is the month number). eras maps an era name to (offset, direction):
+#the absolute year is offset + year for direction 1, or offset - year for direction -1 (years counting down, like BC)
+#Every calendar places its years on one shared absolute year axis, so dates from different calendars sort together
+#month_lengths lists the most days of each month (ex: 29 for February). Months without a length may have up to 31 days
+class Calendar:
+    def __init__(self, name, months=None, eras=None, default_era=None, month_lengths=None):
+        self.name = name
+        self.months = months if months is not None else []
+        self.eras = eras if eras is not None else {}
+        self.default_era = default_era #Era assumed when a date has none. None = absolute years
+        self.month_lengths = month_lengths if month_lengths is not None else []
+
+        #Lookups for parsing: lowercased month names (and 3+ letter prefixes) and era names
+        self.month_lookup = {}
+        for number, month in enumerate(self.months, 1):
+            lowered = month.strip().lower()
+            self.month_lookup[lowered] = number
+            if len(lowered) > 3:
+                self.month_lookup.setdefault(lowered[:3], number)
+        self.era_lookup = {era.strip().lower().replace(".", ""): era for era in self.eras}
+
+    def toDict(self):
+        return {
+            "name": self.name,
+            "months": self.months,
+            "eras": {era: list(rule) for era, rule in self.eras.items()},
+            "default_era": self.default_era,
+            "month_lengths": self.month_lengths
+        }
+
+    @classmethod
+    def fromDict(cls, data):
+        eras = {era: tuple(rule) for era, rule in data.get("eras", {}).items()}
+        return cls(data.get("name", "Unnamed Calendar"), data.get("months", []), eras, data.get("default_era"), data.get("month_lengths"))
+
+    #Converts a year in era (or the default era) to the absolute year
+    def absolute_year(self, year, era=None):
+        era = era if era is not None else self.default_era
+        if era is None:
+            return year
+        offset, direction = self.eras[era]
+        return offset + year if direction >= 0 else offset - year
+
+    #Returns the most days month (numbered from 1) can have
+    def days_in_month(self, month):
+        return self.month_lengths[month - 1] if month <= len(self.month_lengths) else 31
+
+    #Returns True if month and day (0 = unknown) exist in this calendar. Without month names any month number up to 12 is allowed
+    def valid_day(self, month, day):
+        if not 0 <= month <= (len(self.months) or 12):
+            return False
+        if month == 0:
+            return day == 0
+        return 0 <= day <= self.days_in_month(month)
+
+#Built-in Gregorian calendar. Year 1 BC is absolute year 0, so BC years sort before AD ones
+gregorian = Calendar(
+    "Gregorian",
+    ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"],
+    {"AD": (0, 1), "CE": (0, 1), "BC": (1, -1), "BCE": (1, -1)},
+    month_lengths=[31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+)
+
+iso_date = re.compile(r"^(-?\d+)(?:[-/](\d{1,2})(?:[-/](\d{1,2}))?)?$") #Ex: 2024-05-01, 1203/7, -500
+ordinal_suffix = re.compile(r"^(\d+)(st|nd|rd|th)$")
+
+#Parses a free-form date into a sortable key (absolute year, month, day). Missing month/day are 0. Returns None if the date can't be parsed
+#Handles ISO dates (2024-05-01), "1 May 2024", "May 1, 2024", "May 2024", "300 BC", "12 Frostmoon 3019 TA" and bare years.
+#calendars (list of Calendar) are tried in order, then the Gregorian calendar
+def parse_date(text, calendars=None):
+    if not isinstance(text, str) or not text.strip():
+        return None
+    cleaned = text.strip().replace(",", " ")
+
+    match = iso_date.match(cleaned)
+    if match:
+        year, month, day = match.groups()
+        month, day = int(month or 0), int(day or 0)
+        if (month == 0 and match.group(2)) or (day == 0 and match.group(3)) or not gregorian.valid_day(month, day):
+            return None #Ex: 2024-13-45
+        return (int(year), month, day)
+
+    tokens = [token.lower().rstrip(".") for token in cleaned.split()]
+    for calendar in list(calendars or []) + [gregorian]:
+        key = _parse_tokens(tokens, calendar)
+        if key is not None:
+            return key
+    return None
+
+#Parses lowercased date tokens with one calendar. Returns (absolute year, month, day) or None
+def _parse_tokens(tokens, calendar):
+    month = None
+    era = None
+    numbers = []
+    for token in tokens:
+        ordinal = ordinal_suffix.match(token)
+        if ordinal:
+            token = ordinal.group(1)
+        if token.lstrip("-").isdigit():
+            numbers.append(int(token))
+        elif token.replace(".", "") in calendar.era_lookup and era is None:
+            era = calendar.era_lookup[token.replace(".", "")]
+        elif token in calendar.month_lookup and month is None:
+            month = calendar.month_lookup[token]
+        elif token in ("of", "the", "year"):
+            continue
+        else:
+            return None #Unknown word, so this isn't a date in this calendar
+
+    if month is None and era is None and calendar is not gregorian and calendar.default_era is None:
+        return None #Nothing ties a bare number to this calendar
+    if month is None:
+        if len(numbers) != 1:
+            return None
+        return (calendar.absolute_year(numbers[0], era), 0, 0)
+    if len(numbers) == 1: #Ex: May 2024
+        return (calendar.absolute_year(numbers[0], era), month, 0)
+    if len(numbers) == 2: #Ex: 1 May 2024, May 1 2024 or 2024 May 1. The day is the first number that fits in the month
+        day, year = numbers
+        if not 1 <= day <= calendar.days_in_month(month):
+            year, day = numbers
+        if not 1 <= day <= calendar.days_in_month(month):
+            return None
+        return (calendar.absolute_year(year, era), month, day)
+    return None
+
+#Returns True if date key a is definitely earlier than date key b. A month or day of 0 is unknown, so "3019" is not earlier than "May 3019"
+def definitely_before(a, b):
+    if a[0] != b[0]:
+        return a[0] < b[0]
+    for part in (1, 2):
+        if a[part] == 0 or b[part] == 0:
+            return False
+        if a[part] != b[part]:
+            return a[part] < b[part]
+    return False
+
+#Sorted index of PlotTiles by parsed date key, kept up to date as PlotTile.date changes
+#Answers "events in year X", date ranges, and date vs timeline_index consistency checks without reparsing every date
+class DateIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.entries = [] #Sorted list of (date key, Tile ID)
+        self.key_of = {} #"Tile ID": date key
+        self.unparsed = set() #IDs of PlotTiles with a date that could not be parsed
+        for tile in project.tiles.values():
+            self._add(tile)
+
+    def _add(self, tile):
+        if tile.tile_type != "PlotTile" or "_date" not in tile.__dict__: #A stub without a date in its summary is added once its file is read
+            return
+        key = tile.date_key
+        if key is None:
+            if isinstance(tile.date, str) and tile.date.strip():
+                self.unparsed.add(tile.id)
+            return
+        position = bisect_left(self.entries, (key, tile.id))
+        self.entries.insert(position, (key, tile.id))
+        self.key_of[tile.id] = key
+
+    def _remove(self, tile_id):
+        self.unparsed.discard(tile_id)
+        key = self.key_of.pop(tile_id, None)
+        if key is not None:
+            del self.entries[bisect_left(self.entries, (key, tile_id))]
+
+    def date_changed(self, tile):
+        self._remove(tile.id)
+        self._add(tile)
+
+    def tile_added(self, tile):
+        self._add(tile)
+
+    def tile_removed(self, tile):
+        self._remove(tile.id)
+
+    def tile_changed(self, tile):
+        self._remove(tile.id)
+        self._add(tile)
+
+    #Returns PlotTiles with start <= date key < end in date order. Keys are (year, month, day) tuples; either bound may be None
+    def events_between_keys(self, start=None, end=None):
+        low = 0 if start is None else bisect_left(self.entries, (start,))
+        high = len(self.entries) if end is None else bisect_left(self.entries, (end,))
+        return [self.project.tiles[tile_id] for _, tile_id in self.entries[low:high]]
+
+    #Returns PlotTiles dated in the absolute year, in date order
+    def events_in_year(self, year):
+        return self.events_between_keys((year, 0, 0), (year + 1, 0, 0))
+
+    #Returns PlotTiles dated from start_year up to and including end_year
+    def events_in_years(self, start_year, end_year):
+        return self.events_between_keys((start_year, 0, 0), (end_year + 1, 0, 0))
+
+    #Returns (earlier PlotTile, later PlotTile) pairs where the later PlotTile on the timeline is dated definitely before the latest dated
+    #PlotTile ahead of it (the one with the largest date key so far), so undated or vague events in between don't hide a conflict
+    #Walks the chronology index once, so it is O(n) for n dated events
+    def timeline_conflicts(self):
+        conflicts = []
+        latest = None #(date key, Tile ID) with the largest key so far. 0 parts sort first, so it is the latest a date can be sure to start
+        for _, tile_id in self.project.chronology.entries:
+            key = self.key_of.get(tile_id)
+            if key is None:
+                continue
+            if latest is not None and definitely_before(key, latest[0]):
+                conflicts.append((self.project.tiles[latest[1]], self.project.tiles[tile_id]))
+            if latest is None or key > latest[0]:
+                latest = (key, tile_id)
+        return conflicts
@@ -0,0 +1,428 @@
+from Indexes import ProjectIndex
+
+directions = ("out", "in", "both") #Which links a traversal follows from a Tile: its own links, links pointing at it, or both
+
+#Adjacency of the project's link graph with memoized traversal queries: descendants, ancestors, shortest typed path, k-hop neighbourhood
+#Every link change bumps the generation of its link type, and adding or removing a Tile bumps all of them. A cached result remembers
+#the generations of the link types it followed, so it is reused until one of those link types changes
+#Links to IDs that are not in the project are indexed (the Tile may be added later) but traversals never step onto them
+class LinkGraphIndex(ProjectIndex):
+    cache_limit = 4096 #Cached results kept before the cache is emptied
+
+    def __init__(self, project):
+        super().__init__(project)
+        self.outgoing = {} #"Tile ID": {link type: {"target ID": number of links}}
+        self.incoming = {} #"Tile ID": {link type: {"source ID": number of links}}
+        self.generation = 0 #Bumped by every change
+        self.tile_generation = 0 #Bumped when Tiles are added or removed
+        self.type_generations = {} #link type: generation of the last change to links of that type
+        self.cache = {} #query key: (generation stamp, result)
+        for tile in project.tiles.values():
+            self._add_links(tile)
+
+    def _count(self, adjacency, node, link_type, other, change):
+        by_type = adjacency.setdefault(node, {})
+        others = by_type.setdefault(link_type, {})
+        count = others.get(other, 0) + change
+        if count > 0:
+            others[other] = count
+            return
+        others.pop(other, None)
+        if not others:
+            del by_type[link_type]
+            if not by_type:
+                del adjacency[node]
+
+    def _edge(self, source_id, link, change):
+        if not isinstance(link, dict) or link.get("target") is None:
+            return
+        link_type = link.get("type")
+        self._count(self.outgoing, source_id, link_type, link["target"], change)
+        self._count(self.incoming, link["target"], link_type, source_id, change)
+        self.generation += 1
+        self.type_generations[link_type] = self.generation
+
+    def _add_links(self, tile):
+        for link in getattr(tile, "links", ()):
+            self._edge(tile.id, link, 1)
+
+    #Removes every indexed link from tile_id (the index's copy, which may differ from tile.links after direct edits)
+    def _drop_links(self, tile_id):
+        for link_type, targets in list(self.outgoing.get(tile_id, {}).items()):
+            for target_id, count in list(targets.items()):
+                self._edge(tile_id, {"target": target_id, "type": link_type}, -count)
+
+    def _tiles_changed(self):
+        self.generation += 1
+        self.tile_generation = self.generation
+
+    def link_added(self, tile, link):
+        self._edge(tile.id, link, 1)
+
+    def link_removed(self, tile, link):
+        self._edge(tile.id, link, -1)
+
+    def tile_added(self, tile):
+        self._add_links(tile)
+        self._tiles_changed()
+
+    def tile_removed(self, tile):
+        self._drop_links(tile.id)
+        self._tiles_changed()
+
+    #tile.links may have been edited directly, so its links are indexed again
+    def tile_changed(self, tile):
+        self._drop_links(tile.id)
+        self._add_links(tile)
+
+    #Returns link_types as a sorted tuple (None = every type). Accepts a single link type str
+    @staticmethod
+    def _normalize(link_types):
+        if link_types is None:
+            return None
+        if isinstance(link_types, str):
+            return (link_types,)
+        return tuple(sorted(set(link_types)))
+
+    def _stamp(self, link_types):
+        if link_types is None:
+            return self.generation
+        return (self.tile_generation,) + tuple(self.type_generations.get(link_type, 0) for link_type in link_types)
+
+    def _cached(self, key, link_types, compute):
+        stamp = self._stamp(link_types)
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        result = compute()
+        if len(self.cache) >= self.cache_limit:
+            self.cache.clear()
+        self.cache[key] = (stamp, result)
+        return result
+
+    def _require(self, tile_id):
+        if tile_id not in self.project.tiles:
+            raise ValueError(f"Tile {tile_id} not found in project")
+
+    #Yields (neighbour ID, link type, True if the link is stored on node) for the links of link_types followed in direction
+    def _neighbours(self, node, link_types, direction):
+        for adjacency, outgoing in ((self.outgoing, True), (self.incoming, False)):
+            if direction == ("in" if outgoing else "out"):
+                continue
+            by_type = adjacency.get(node)
+            if not by_type:
+                continue
+            for link_type in (by_type if link_types is None else link_types):
+                for other in by_type.get(link_type, ()):
+                    yield other, link_type, outgoing
+
+    #Breadth-first search from sources. Returns {"Tile ID": hops from the nearest source}
+    def _distances(self, sources, link_types, direction, max_depth):
+        if direction not in directions:
+            raise ValueError(f"Unknown direction {direction}. Use one of {', '.join(directions)}")
+        tiles = self.project.tiles
+        distance = {source: 0 for source in sources}
+        frontier = list(distance)
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for node in frontier:
+                for other, _, _ in self._neighbours(node, link_types, direction):
+                    if other not in distance and other in tiles:
+                        distance[other] = depth
+                        next_frontier.append(other)
+            frontier = next_frontier
+        return distance
+
+    #Returns a frozenset of Tile IDs reachable from tile_id by following links of link_types forwards (within max_depth hops)
+    def descendants(self, tile_id, link_types=None, max_depth=None):
+        self._require(tile_id)
+        link_types = self._normalize(link_types)
+        return self._cached(("descendants", tile_id, link_types, max_depth), link_types,
+                            lambda: frozenset(self._distances([tile_id], link_types, "out", max_depth)) - {tile_id})
+
+    #Returns a frozenset of Tile IDs that reach tile_id by following links of link_types forwards (within max_depth hops)
+    def ancestors(self, tile_id, link_types=None, max_depth=None):
+        self._require(tile_id)
+        link_types = self._normalize(link_types)
+        return self._cached(("ancestors", tile_id, link_types, max_depth), link_types,
+                            lambda: frozenset(self._distances([tile_id], link_types, "in", max_depth)) - {tile_id})
+
+    #Returns {"Tile ID": hops} for every Tile within hops of any of tile_ids (which are at 0)
+    def neighbourhood(self, tile_ids, hops=1, link_types=None, direction="both"):
+        tile_ids = [tile_ids] if isinstance(tile_ids, str) else list(tile_ids)
+        for tile_id in tile_ids:
+            self._require(tile_id)
+        link_types = self._normalize(link_types)
+        return dict(self._cached(("neighbourhood", frozenset(tile_ids), hops, link_types, direction), link_types,
+                                 lambda: self._distances(tile_ids, link_types, direction, hops)))
+
+    #Returns the fewest links connecting source_id to target_id as a list of {"source", "target", "type"} dicts in path order
+    #Each dict is the link as stored (on its source Tile). Unless directed, links may be walked backwards
+    #Returns [] if source_id is target_id and None if they are not connected
+    def shortest_path(self, source_id, target_id, link_types=None, directed=False):
+        self._require(source_id)
+        self._require(target_id)
+        link_types = self._normalize(link_types)
+        path = self._cached(("path", source_id, target_id, link_types, directed), link_types,
+                            lambda: self._bidirectional_search(source_id, target_id, link_types, directed))
+        return None if path is None else [dict(step) for step in path]
+
+    #Breadth-first search from both ends, always growing the smaller frontier by one level
+    def _bidirectional_search(self, source_id, target_id, link_types, directed):
+        if source_id == target_id:
+            return []
+        tiles = self.project.tiles
+        forward = {source_id: None} #"Tile ID": (previous Tile ID, link type, True if the link is stored on the previous Tile)
+        backward = {target_id: None} #Same, with "previous" meaning one step closer to target_id
+        forward_frontier = [source_id]
+        backward_frontier = [target_id]
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, others, direction = forward_frontier, forward, backward, "out"
+            else:
+                frontier, parents, others, direction = backward_frontier, backward, forward, "in"
+            if not directed:
+                direction = "both"
+
+            next_frontier = []
+            for node in frontier:
+                for other, link_type, outgoing in self._neighbours(node, link_types, direction):
+                    if other in parents or other not in tiles:
+                        continue
+                    parents[other] = (node, link_type, outgoing)
+                    if other in others:
+                        return self._join_path(forward, backward, other)
+                    next_frontier.append(other)
+
+            if parents is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return None
+
+    @staticmethod
+    def _join_path(forward, backward, meeting):
+        def step(node, previous, link_type, outgoing):
+            source, target = (previous, node) if outgoing else (node, previous)
+            return {"source": source, "target": target, "type": link_type}
+
+        path = []
+        node = meeting
+        while forward[node] is not None:
+            previous, link_type, outgoing = forward[node]
+            path.append(step(node, previous, link_type, outgoing))
+            node = previous
+        path.reverse()
+        node = meeting
+        while backward[node] is not None:
+            following, link_type, outgoing = backward[node]
+            path.append(step(node, following, link_type, outgoing))
+            node = following
+        return path
+
+#Connected components of the link graph (link direction ignored), for finding story fragments that are not tied to the rest of the world
+#Union-find with union by size: adding a link merges two components in place. Removing links or Tiles cannot split a component in place,
+#so the index is marked stale and rebuilt on the next query. A component's ID is the ID of one of its Tiles and changes when components merge
+class ComponentIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.stale = True
+        self.rebuild()
+
+    def rebuild(self):
+        tiles = self.project.tiles
+        self.parent = {tile_id: tile_id for tile_id in tiles} #"Tile ID": parent Tile ID. Roots are their own parent
+        self.members = {tile_id: [tile_id] for tile_id in tiles} #"root Tile ID": Tile IDs in its component
+        self.dangling = {} #"missing Tile ID": set of Tile IDs linking to it, merged in when the Tile is added
+        for tile in tiles.values():
+            for link in getattr(tile, "links", ()):
+                self._link(tile.id, link)
+        self.stale = False
+
+    def _ensure_fresh(self):
+        if self.stale:
+            self.rebuild()
+
+    def _find(self, tile_id):
+        parent = self.parent
+        root = tile_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[tile_id] != root: #Path compression
+            parent[tile_id], tile_id = root, parent[tile_id]
+        return root
+
+    def _union(self, first_id, second_id):
+        first = self._find(first_id)
+        second = self._find(second_id)
+        if first == second:
+            return
+        if len(self.members[first]) < len(self.members[second]):
+            first, second = second, first
+        self.parent[second] = first
+        self.members[first].extend(self.members.pop(second))
+
+    def _link(self, source_id, link):
+        if not isinstance(link, dict) or link.get("target") is None:
+            return
+        target_id = link["target"]
+        if target_id in self.parent:
+            self._union(source_id, target_id)
+        else:
+            self.dangling.setdefault(target_id, set()).add(source_id)
+
+    def link_added(self, tile, link):
+        if not self.stale and tile.id in self.parent:
+            self._link(tile.id, link)
+
+    def link_removed(self, tile, link):
+        self.stale = True
+
+    def tile_added(self, tile):
+        if self.stale:
+            return
+        self.parent[tile.id] = tile.id
+        self.members[tile.id] = [tile.id]
+        for link in getattr(tile, "links", ()):
+            self._link(tile.id, link)
+        for source_id in self.dangling.pop(tile.id, ()):
+            if source_id in self.parent:
+                self._union(source_id, tile.id)
+
+    def tile_removed(self, tile):
+        if self.stale:
+            return
+        if getattr(tile, "links", None) or len(self.members[self._find(tile.id)]) > 1:
+            self.stale = True #Its component may split
+        else:
+            del self.parent[tile.id]
+            del self.members[tile.id]
+
+    def tile_changed(self, tile):
+        self.stale = True #tile.links may have been edited directly
+
+    def _root(self, tile_id):
+        self._ensure_fresh()
+        if tile_id not in self.parent:
+            raise ValueError(f"Tile {tile_id} not found in project")
+        return self._find(tile_id)
+
+    #Returns the ID of tile_id's component (the ID of one of its Tiles). Equal IDs mean the same component until the links change
+    def component_of(self, tile_id):
+        return self._root(tile_id)
+
+    #Returns the number of Tiles in tile_id's component
+    def component_size(self, tile_id):
+        root = self._root(tile_id) #May rebuild self.members
+        return len(self.members[root])
+
+    #Returns a list of the Tile IDs in tile_id's component
+    def component_members(self, tile_id):
+        root = self._root(tile_id)
+        return list(self.members[root])
+
+    #Returns True if a chain of links (in any direction) connects the two Tiles
+    def connected(self, first_id, second_id):
+        return self._root(first_id) == self._root(second_id)
+
+    @property
+    def component_count(self):
+        self._ensure_fresh()
+        return len(self.members)
+
+    #Returns {component ID: list of Tile IDs} for components of at least min_size Tiles
+    def components(self, min_size=1):
+        self._ensure_fresh()
+        return {root: list(members) for root, members in self.members.items() if len(members) >= min_size}
+
+#Link degree counters for orphan detection, with live sets of orphaned Tiles kept up to date as links change
+#Incoming links are counted from other Tiles in the project only (a Tile linking to itself is not linked BY anything), while every link
+#in tile.links counts as outgoing, matching Project.find_orphans. Links to missing IDs are counted so the Tile has them when it is added
+class DegreeIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.in_degree = {} #"Tile ID": number of links to it from other Tiles
+        self.out_degree = {} #"Tile ID": number of links in tile.links, for Tiles in the project
+        self.targets = {} #"Tile ID": {"target ID": number of links}, the links it adds to in_degree
+        self.no_incoming = set() #Live sets of Tile IDs: not linked by any other Tile,
+        self.no_outgoing = set() #linking to nothing,
+        self.isolated = set() #and both
+        for tile in project.tiles.values():
+            self._add_tile(tile)
+
+    def _update(self, tile_id):
+        if tile_id not in self.out_degree:
+            self.no_incoming.discard(tile_id)
+            self.no_outgoing.discard(tile_id)
+            self.isolated.discard(tile_id)
+            return
+        no_incoming = not self.in_degree.get(tile_id)
+        no_outgoing = not self.out_degree[tile_id]
+        for orphans, is_orphan in ((self.no_incoming, no_incoming), (self.no_outgoing, no_outgoing), (self.isolated, no_incoming and no_outgoing)):
+            if is_orphan:
+                orphans.add(tile_id)
+            else:
+                orphans.discard(tile_id)
+
+    def _count(self, source_id, link, change):
+        self.out_degree[source_id] += change
+        target_id = link.get("target") if isinstance(link, dict) else None
+        if target_id is not None and target_id != source_id:
+            self.in_degree[target_id] = self.in_degree.get(target_id, 0) + change
+            if not self.in_degree[target_id]:
+                del self.in_degree[target_id]
+            targets = self.targets.setdefault(source_id, {})
+            targets[target_id] = targets.get(target_id, 0) + change
+            if not targets[target_id]:
+                del targets[target_id]
+            self._update(target_id)
+
+    def _add_tile(self, tile):
+        self.out_degree[tile.id] = 0
+        for link in getattr(tile, "links", ()):
+            self._count(tile.id, link, 1)
+        self._update(tile.id)
+
+    #Takes back everything tile_id added to the counters (the index's record, which may differ from tile.links after direct edits)
+    def _remove_tile(self, tile_id):
+        for target_id, count in self.targets.pop(tile_id, {}).items():
+            self.in_degree[target_id] -= count
+            if not self.in_degree[target_id]:
+                del self.in_degree[target_id]
+            self._update(target_id)
+        self.out_degree.pop(tile_id, None)
+        self._update(tile_id)
+
+    def link_added(self, tile, link):
+        if tile.id in self.out_degree:
+            self._count(tile.id, link, 1)
+            self._update(tile.id)
+
+    def link_removed(self, tile, link):
+        if tile.id in self.out_degree:
+            self._count(tile.id, link, -1)
+            self._update(tile.id)
+
+    def tile_added(self, tile):
+        self._add_tile(tile)
+
+    def tile_removed(self, tile):
+        self._remove_tile(tile.id)
+
+    #tile.links may have been edited directly, so its links are counted again
+    def tile_changed(self, tile):
+        if tile.id in self.out_degree:
+            self._remove_tile(tile.id)
+            self._add_tile(tile)
+
+    #Returns the set of orphaned Tile IDs: no incoming and/or no outgoing links (see Project.find_orphans for the flags)
+    def orphan_ids(self, check_incoming=True, check_outgoing=True, require_both=False):
+        if check_incoming and check_outgoing:
+            return set(self.isolated) if require_both else self.no_incoming | self.no_outgoing
+        if check_incoming:
+            return set(self.no_incoming)
+        if check_outgoing:
+            return set(self.no_outgoing)
+        return set()
@@ -0,0 +1,148 @@
+import numpy as np
+
+#Vectorized link graph analytics. Needs NumPy, so Project does not import this module: import it where rankings are wanted
+#The project's links are exported once into compressed sparse row (CSR) arrays, then every measure runs as array operations
+
+default_link_weights = {"involves": 1.0, "causes": 1.0, "requires": 1.0, "enables": 1.0, "blocks": 1.0, "plot point": 0.5, "references": 0.5}
+
+#Link graph of a project as CSR arrays. Row i holds the links of Tile ids[i]: targets indices[indptr[i]:indptr[i + 1]] with weights data[...]
+#Links are weighted by link type (types missing from weights get default_weight, and a weight of 0 drops the link). Links to missing Tiles
+#are skipped. If undirected, every link is stored in both directions
+class LinkMatrix:
+    def __init__(self, ids, tile_types, indptr, indices, data):
+        self.ids = ids #Row number: "Tile ID"
+        self.index = {tile_id: row for row, tile_id in enumerate(ids)} #"Tile ID": row number
+        self.tile_types = tile_types #Row number: tile_type (NumPy object array)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_project(cls, project, weights=None, default_weight=1.0, undirected=False):
+        weights = default_link_weights if weights is None else weights
+        ids = list(project.tiles)
+        index = {tile_id: row for row, tile_id in enumerate(ids)}
+        sources = []
+        targets = []
+        values = []
+        for row, tile in enumerate(project.tiles.values()):
+            for link in tile.links:
+                column = index.get(link.get("target"))
+                weight = weights.get(link.get("type"), default_weight)
+                if column is not None and weight:
+                    sources.append(row)
+                    targets.append(column)
+                    values.append(weight)
+
+        sources = np.array(sources, dtype=np.int64)
+        targets = np.array(targets, dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        if undirected:
+            sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+            values = np.concatenate([values, values])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+        tile_types = np.array([tile.tile_type for tile in project.tiles.values()], dtype=object)
+        return cls(ids, tile_types, indptr, targets[order], values[order])
+
+    @property
+    def size(self):
+        return len(self.ids)
+
+    #Row number of every stored link (the CSR rows expanded to one entry per link)
+    def rows(self):
+        return np.repeat(np.arange(self.size), np.diff(self.indptr))
+
+    #Returns (source rows, target rows) of every link out of the given rows
+    def links_from(self, rows):
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        total = int(counts.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(rows, counts), self.indices[np.repeat(starts, counts) + offsets]
+
+#Returns (incoming, outgoing) link weight per row, or link counts if not weighted
+def degrees(matrix, weighted=True):
+    weights = matrix.data if weighted else None
+    incoming = np.bincount(matrix.indices, weights=weights, minlength=matrix.size).astype(np.float64)
+    outgoing = np.bincount(matrix.rows(), weights=weights, minlength=matrix.size).astype(np.float64)
+    return incoming, outgoing
+
+#Returns the PageRank score per row (scores sum to 1). Rank flows along links in proportion to their weight
+#Tiles without outgoing links spread their rank evenly over every Tile
+def pagerank(matrix, damping=0.85, tolerance=1e-10, max_iterations=200):
+    size = matrix.size
+    if not size:
+        return np.zeros(0)
+    rows = matrix.rows()
+    _, outgoing = degrees(matrix)
+    dangling = outgoing == 0
+    share = matrix.data / np.where(dangling, 1.0, outgoing)[rows] #Fraction of a row's rank sent along each link
+    rank = np.full(size, 1.0 / size)
+    for _ in range(max_iterations):
+        flow = np.bincount(matrix.indices, weights=rank[rows] * share, minlength=size)
+        new_rank = (1 - damping) / size + damping * (flow + rank[dangling].sum() / size)
+        converged = np.abs(new_rank - rank).sum() < tolerance
+        rank = new_rank
+        if converged:
+            break
+    return rank
+
+#Returns approximate betweenness centrality per row (hop counts, link weights ignored): Brandes' algorithm from samples random source
+#Tiles, scaled up to all sources. samples >= the number of Tiles gives the exact value. Each search runs level by level on arrays
+#On an undirected matrix every pair of Tiles is counted from both ends, so values are twice the usual undirected definition
+def betweenness(matrix, samples=64, seed=None):
+    size = matrix.size
+    centrality = np.zeros(size)
+    if not size:
+        return centrality
+    rng = np.random.default_rng(seed)
+    sources = np.arange(size) if samples >= size else rng.choice(size, samples, replace=False)
+    for source in sources:
+        distance = np.full(size, -1, dtype=np.int64)
+        distance[source] = 0
+        paths = np.zeros(size) #Number of shortest paths from source
+        paths[source] = 1
+        levels = [] #(source rows, target rows) of the shortest-path links between each level and the next
+        frontier = np.array([source])
+        depth = 0
+        while frontier.size:
+            link_sources, link_targets = matrix.links_from(frontier)
+            unseen = distance[link_targets] == -1
+            distance[link_targets[unseen]] = depth + 1
+            on_path = distance[link_targets] == depth + 1
+            link_sources, link_targets = link_sources[on_path], link_targets[on_path]
+            paths += np.bincount(link_targets, weights=paths[link_sources], minlength=size)
+            levels.append((link_sources, link_targets))
+            frontier = np.unique(link_targets)
+            depth += 1
+
+        dependency = np.zeros(size)
+        for link_sources, link_targets in reversed(levels):
+            dependency += np.bincount(link_sources, weights=paths[link_sources] / paths[link_targets] * (1 + dependency[link_targets]), minlength=size)
+        dependency[source] = 0
+        centrality += dependency
+    return centrality * (size / len(sources))
+
+#Ranks Tiles of tile_types by a measure: "pagerank", "degree" (weighted incoming + outgoing) or "betweenness" (sampled)
+#Returns [("Tile ID", score)] best first, at most limit entries. Pass matrix to reuse an export across rankings
+def rank_tiles(project, tile_types=("CharacterTile", "SettingTile"), measure="pagerank", weights=None, undirected=True, limit=None,
+               matrix=None, samples=64, seed=None):
+    if matrix is None:
+        matrix = LinkMatrix.from_project(project, weights, undirected=undirected)
+    if measure == "pagerank":
+        scores = pagerank(matrix)
+    elif measure == "degree":
+        incoming, outgoing = degrees(matrix)
+        scores = incoming if undirected else incoming + outgoing #Undirected links are already stored both ways
+    elif measure == "betweenness":
+        scores = betweenness(matrix, samples, seed)
+    else:
+        raise ValueError(f"Unknown measure {measure}. Use pagerank, degree or betweenness")
+
+    rows = np.flatnonzero(np.isin(matrix.tile_types, list(tile_types))) if tile_types is not None else np.arange(matrix.size)
+    rows = rows[np.argsort(-scores[rows], kind="stable")]
+    if limit is not None:
+        rows = rows[:limit]
+    return [(matrix.ids[row], float(scores[row])) for row in rows]
@@ -0,0 +1,49 @@
+#Base class for indexes that a Project keeps in sync with its Tiles
+#Project.get_index builds an index on first use, then forwards every mutation to it through these hooks. Subclasses override the hooks they need
+class ProjectIndex:
+    def __init__(self, project):
+        self.project = project
+
+    #A link dict was appended to tile.links
+    def link_added(self, tile, link):
+        pass
+
+    #A link dict was removed from tile.links
+    def link_removed(self, tile, link):
+        pass
+
+    #A Tile was added to the project registry (it may already have links)
+    def tile_added(self, tile):
+        pass
+
+    #A Tile is about to be deleted from the project registry
+    def tile_removed(self, tile):
+        pass
+
+    #A PlotTile's timeline_index changed from old_index
+    def timeline_changed(self, tile, old_index):
+        pass
+
+    #A PlotTile's date changed
+    def date_changed(self, tile):
+        pass
+
+    #A PlotMap's plot_points were added, removed or reordered
+    def plot_points_changed(self, plotmap):
+        pass
+
+    #A Tile's fields were edited directly (ex: renamed). See Project.mark_changed
+    def tile_changed(self, tile):
+        pass
+
+#Returns (PlotTile ID, CharacterTile ID) if the link from tile ties a character to an event (in either direction), else None
+#tiles is the project registry. The link type is not checked: callers count only involves links
+def involvement(tiles, tile, link):
+    target = tiles.get(link.get("target"))
+    if target is None:
+        return None
+    if tile.tile_type == "PlotTile" and target.tile_type == "CharacterTile":
+        return tile.id, target.id
+    if tile.tile_type == "CharacterTile" and target.tile_type == "PlotTile":
+        return target.id, tile.id
+    return None
@@ -0,0 +1,182 @@
+from collections.abc import MutableMapping, Sequence
+import traceback
+
+#One problem found by a check or load. code names the kind of problem (ex: "link.missing_target"), severity is "error" or "warning",
+#tile_ids are the Tiles involved and link_type the link involved, if any. The message is only formatted from template and args when read
+class Issue:
+    __slots__ = ("code", "severity", "template", "args", "tile_ids", "link_type")
+
+    def __init__(self, code, severity, template, args=(), tile_ids=(), link_type=None):
+        self.code = code
+        self.severity = severity
+        self.template = template
+        self.args = args
+        self.tile_ids = tuple(tile_ids)
+        self.link_type = link_type
+
+    @classmethod
+    def error(cls, code, template, *args, tile_ids=(), link_type=None):
+        return cls(code, "error", template, args, tile_ids, link_type)
+
+    @classmethod
+    def warning(cls, code, template, *args, tile_ids=(), link_type=None):
+        return cls(code, "warning", template, args, tile_ids, link_type)
+
+    @property
+    def message(self):
+        return self.template.format(*self.args)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"Issue({self.code!r}, {self.severity!r}, tile_ids={self.tile_ids!r})"
+
+    def toDict(self):
+        return {"code": self.code, "severity": self.severity, "message": self.message, "tile_ids": list(self.tile_ids), "link_type": self.link_type}
+
+#Traceback of a caught exception, kept unformatted until the message is displayed. Formats like traceback.format_exc()
+#Must be created inside the except block
+class LazyTraceback:
+    __slots__ = ("exception",)
+
+    def __init__(self, error):
+        self.exception = traceback.TracebackException.from_exception(error, lookup_lines=False)
+
+    def __format__(self, format_spec):
+        return "".join(self.exception.format())
+
+    def __str__(self):
+        return self.__format__("")
+
+#Read-only list of formatted messages of one severity from an IssueReport. append(message) adds a plain message, as the old lists allowed
+class MessageList(Sequence):
+    def __init__(self, report, severity):
+        self.report = report
+        self.severity = severity
+
+    def _issues(self):
+        return [issue for issue in self.report.issues if issue.severity == self.severity]
+
+    def __getitem__(self, position):
+        issues = self._issues()[position]
+        return [issue.message for issue in issues] if isinstance(position, slice) else issues.message
+
+    def __len__(self):
+        return sum(1 for issue in self.report.issues if issue.severity == self.severity)
+
+    def __iter__(self):
+        return (issue.message for issue in self.report.issues if issue.severity == self.severity)
+
+    def __bool__(self):
+        return any(issue.severity == self.severity for issue in self.report.issues)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, MessageList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, message):
+        self.report.add(Issue("message", self.severity, "{}", (message,)))
+
+#Structured result of a check: Issue records in the order found, indexed by Tile ID and code on demand
+#Also behaves as the old report dict: report["errors"] and report["warnings"] are lists of messages, and other keys hold extra fields
+class IssueReport(MutableMapping):
+    def __init__(self, issues=None, **fields):
+        self.issues = list(issues or [])
+        self.fields = fields
+        self._by_tile = None
+        self._by_code = None
+
+    def add(self, issue):
+        self.issues.append(issue)
+        self._by_tile = self._by_code = None
+
+    def extend(self, issues):
+        self.issues.extend(issues)
+        self._by_tile = self._by_code = None
+
+    def error(self, code, template, *args, tile_ids=(), link_type=None):
+        self.add(Issue.error(code, template, *args, tile_ids=tile_ids, link_type=link_type))
+
+    def warning(self, code, template, *args, tile_ids=(), link_type=None):
+        self.add(Issue.warning(code, template, *args, tile_ids=tile_ids, link_type=link_type))
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.severity == "warning"]
+
+    def _build_indexes(self):
+        self._by_tile = {}
+        self._by_code = {}
+        for issue in self.issues:
+            for tile_id in dict.fromkeys(issue.tile_ids):
+                self._by_tile.setdefault(tile_id, []).append(issue)
+            self._by_code.setdefault(issue.code, []).append(issue)
+
+    #Returns the Issues involving a Tile
+    def by_tile(self, tile_id):
+        if self._by_tile is None:
+            self._build_indexes()
+        return self._by_tile.get(tile_id, [])
+
+    #Returns the Issues with a code
+    def by_code(self, code):
+        if self._by_code is None:
+            self._build_indexes()
+        return self._by_code.get(code, [])
+
+    #Returns {code: number of Issues}
+    def code_counts(self):
+        if self._by_code is None:
+            self._build_indexes()
+        return {code: len(issues) for code, issues in self._by_code.items()}
+
+    #Returns the Issues matching every given filter
+    def filter(self, severity=None, code=None, tile_id=None, link_type=None):
+        issues = self.by_tile(tile_id) if tile_id is not None else self.by_code(code) if code is not None else self.issues
+        return [issue for issue in issues
+                if (severity is None or issue.severity == severity) and (code is None or issue.code == code)
+                and (link_type is None or issue.link_type == link_type)]
+
+    #Returns the old report shape: extra fields plus "errors" and "warnings" as lists of formatted messages
+    def toDict(self):
+        data = dict(self.fields)
+        data["errors"] = [issue.message for issue in self.errors]
+        data["warnings"] = [issue.message for issue in self.warnings]
+        return data
+
+    def __getitem__(self, key):
+        if key == "errors":
+            return MessageList(self, "error")
+        if key == "warnings":
+            return MessageList(self, "warning")
+        return self.fields[key]
+
+    def __setitem__(self, key, value):
+        if key in ("errors", "warnings"):
+            raise ValueError(f"Report {key} are Issues. Use add() to record one")
+        self.fields[key] = value
+
+    def __delitem__(self, key):
+        if key in ("errors", "warnings"):
+            raise ValueError(f"Report {key} cannot be deleted")
+        del self.fields[key]
+
+    def __iter__(self):
+        yield from self.fields
+        yield "errors"
+        yield "warnings"
+
+    def __len__(self):
+        return len(self.fields) + 2
+
+    def __repr__(self):
+        return repr(self.toDict())
@@ -0,0 +1,88 @@
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import os
+
+#Full load_check of the Tile registry split across worker processes
+#Tiles are sent to workers as compact snapshots (class, fields, and (id, name) stubs in place of resolved Tile objects) together with the
+#set of registry IDs, which is all the per-Tile checks need. Plot point back links read other Tiles, so workers return their positions
+#and they are checked when the shards are merged. Results are identical to Project.load_check, in the same order
+#Callers on platforms that spawn workers (Windows, macOS) must run this under if __name__ == "__main__"
+
+object_attributes = ("resolved_links", "resolved_plot_points") #Fields holding Tile objects. Workers get stubs instead
+
+_tile_ids = None #Worker process state: the set of registry IDs, passed to Project._check_tile in place of the registry
+
+def _init_worker(tile_ids):
+    global _tile_ids
+    _tile_ids = tile_ids
+
+#Returns a picklable snapshot of a registry entry: (registry key, Tile class, fields, stubs of Tile-valued fields)
+def _snapshot(tile_id_key, tile):
+    fields = {}
+    stubs = {}
+    for attribute, value in tile.__dict__.items():
+        if attribute == "project":
+            continue
+        if attribute in object_attributes:
+            stubs[attribute] = [{part: getattr(item, part) for part in ("id", "name") if hasattr(item, part)} for item in value]
+        else:
+            fields[attribute] = value
+    return tile_id_key, type(tile), fields, stubs
+
+#Rebuilds a Tile from a snapshot without running __init__, so missing fields stay missing like in the original
+def _restore(tile_class, fields, stubs):
+    tile = tile_class.__new__(tile_class)
+    tile.__dict__.update(fields)
+    for attribute, items in stubs.items():
+        tile.__dict__[attribute] = [SimpleNamespace(**item) for item in items]
+    return tile
+
+#Runs the per-Tile checks on one shard. Returns a list of (errors, warnings, deferred back links) per snapshot
+def _check_shard(shard):
+    from Project import Project #Imported here because Project imports this module
+    results = []
+    for tile_id_key, tile_class, fields, stubs in shard:
+        backlinks = []
+        errors, warnings = Project._check_tile(_tile_ids, tile_id_key, _restore(tile_class, fields, stubs), backlinks)
+        results.append((errors, warnings, backlinks))
+    return results
+
+#Returns a Tile's errors with its deferred back link errors spliced in where the serial check would have reported them
+def _merge_backlinks(project, tile_errors, backlinks):
+    errors = []
+    done = 0
+    for position, plot_tile_id, plotmap_id, plotmap_name, plotmap_label in backlinks:
+        errors.extend(tile_errors[done:position])
+        done = position
+        error = project._check_backlink(project.tiles, plot_tile_id, plotmap_id, plotmap_name, plotmap_label)
+        if error:
+            errors.append(error)
+    errors.extend(tile_errors[done:])
+    return errors
+
+#Checks every registry entry of project in worker processes. Returns (errors, warnings) exactly as the serial check
+#workers defaults to the CPU count. shard_size defaults to about four shards per worker
+def parallel_check_tiles(project, workers=None, shard_size=None):
+    workers = workers or os.cpu_count() or 1
+    snapshots = [_snapshot(tile_id_key, tile) for tile_id_key, tile in project.tiles.items()]
+    if not snapshots:
+        return [], []
+    shard_size = shard_size or max(1, -(-len(snapshots) // (workers * 4)))
+    shards = [snapshots[start:start + shard_size] for start in range(0, len(snapshots), shard_size)]
+    tile_ids = set(project.tiles)
+
+    if workers == 1:
+        _init_worker(tile_ids)
+        shard_results = [_check_shard(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tile_ids,)) as executor:
+            shard_results = list(executor.map(_check_shard, shards))
+
+    #Merge phase: splice in the back link errors where the serial check would have reported them
+    errors = []
+    warnings = []
+    for results in shard_results:
+        for tile_errors, tile_warnings, backlinks in results:
+            errors.extend(_merge_backlinks(project, tile_errors, backlinks))
+            warnings.extend(tile_warnings)
+    return errors, warnings
@@ -1,11 +1,26 @@
-from Tiles import Tile, PlotMap, PlotTile, CharacterTile, SettingTile, prefix_map
+from Tiles import Tile, PlotMap, PlotTile, CharacterTile, SettingTile, TileStub, prefix_map, unloaded_tile
+from Validation import validate_plotmaps, find_plotmap_order_conflicts
+from Causality import ReachabilityIndex, TopologicalOrderIndex, precedence_edge, solve_timeline
+from Timeline import ChronologyIndex, insert_event, dense_timeline_indexes, respace_timeline, timeline_gap
+from Dates import Calendar, DateIndex
+from WorldState import WorldStateIndex
+from Characters import CharacterIndex, CoAppearanceIndex
+from Analytics import plotmap_nonlinearity
+from CheckCache import LoadCheckCache
+from ParallelCheck import parallel_check_tiles
+from Issues import Issue, IssueReport, LazyTraceback
+from Rules import RuleRegistry, default_rules
+from Graph import LinkGraphIndex, ComponentIndex, DegreeIndex
+from Snapshot import SnapshotIndex
+import SharedSnapshot
+from Views import ProjectView
 from pathlib import Path
 import uuid
 import json
+import os
 from datetime import datetime, timezone
 import shutil
 import time
-import traceback
 
 class Project:
     def __init__(self):
@@ -21,10 +36,84 @@ class Project:
         self.version = 0 #Counts number of saves. Starts as version 0 until saving (becomes version 1)
         self.schema_version = 1 #Tracks the file saving and loading method used (allows backwards compatibility in future)
         self.tags = set()
+        self.calendars = {} #In-world calendars used to parse PlotTile dates. "calendar name": Calendar
+        self.indexes = {} #Lazily built indexes kept in sync with Tile changes. "index name": ProjectIndex. See get_index
+        self.rules = RuleRegistry(default_rules()) #Validation rules checked by run_rules and (for new links) Tile.add_link. See Rules.py
+        self.unloaded = {} #Tiles left as stubs by a partial load. "Tile ID": (path of its file, its manifest summary). See hydrate
 
     @property #Calling projectInstance.tile_count runs this
     def tile_count(self):
         return len(self.tiles)
+
+    #Sorted index of PlotTiles by timeline_index with range, neighbour and conflict queries. See Timeline.ChronologyIndex
+    @property
+    def chronology(self):
+        return self.get_index("chronology", ChronologyIndex)
+
+    #Active blocks and present characters at any timeline_index, swept from blocks, enables/causes and involves links. See WorldState.WorldStateIndex
+    @property
+    def world_state(self):
+        return self.get_index("world_state", WorldStateIndex)
+
+    #Ordered appearances of every CharacterTile per PlotMap and on the timeline. See Characters.CharacterIndex
+    @property
+    def characters(self):
+        return self.get_index("characters", CharacterIndex)
+
+    #Number of PlotTiles each pair of characters shares, kept up to date as involves links change. See Characters.CoAppearanceIndex
+    @property
+    def coappearances(self):
+        return self.get_index("coappearances", CoAppearanceIndex)
+
+    #Sorted index of PlotTiles by parsed date with year/range queries and date vs timeline checks. See Dates.DateIndex
+    @property
+    def dates(self):
+        return self.get_index("dates", DateIndex)
+
+    #Incoming and outgoing links of every Tile by link type, with cached traversal queries. See Graph.LinkGraphIndex
+    @property
+    def link_graph(self):
+        return self.get_index("link_graph", LinkGraphIndex)
+
+    #Connected components of the link graph with component IDs, sizes and members. See Graph.ComponentIndex
+    @property
+    def components(self):
+        return self.get_index("components", ComponentIndex)
+
+    #Link degree counters. degrees.no_incoming, degrees.no_outgoing and degrees.isolated are live sets of orphaned Tile IDs. See Graph.DegreeIndex
+    @property
+    def degrees(self):
+        return self.get_index("degrees", DegreeIndex)
+
+    #Returns an immutable CSR copy of the link graph (see Snapshot.GraphSnapshot) for analytics over flat arrays
+    #After edits only the rows of changed Tiles are read again, so asking for it often is cheap
+    def graph_snapshot(self):
+        return self.get_index("graph_snapshot", SnapshotIndex).current()
+
+    #Copies the project's Tiles, links, plot points and timeline into shared memory for worker processes (see SharedSnapshot.py)
+    #Workers call Project.attach_shared(shared.name) instead of loading the project folder. The caller closes and unlinks the block
+    def publish_shared(self, name=None):
+        return SharedSnapshot.publish(self, name)
+
+    #Attaches to a project published with publish_shared. Returns a read-only SharedSnapshot.SharedProject
+    @staticmethod
+    def attach_shared(name):
+        return SharedSnapshot.attach(name)
+
+    #Adds or replaces an in-world calendar used to parse PlotTile dates. Cached date keys are reparsed
+    def add_calendar(self, calendar: Calendar):
+        self.calendars[calendar.name] = calendar
+        for tile in self.tiles.values():
+            if isinstance(tile, PlotTile):
+                tile.clear_date_key()
+        self.indexes.pop("dates", None)
+
+    def remove_calendar(self, name):
+        if self.calendars.pop(name, None) is not None:
+            for tile in self.tiles.values():
+                if isinstance(tile, PlotTile):
+                    tile.clear_date_key()
+            self.indexes.pop("dates", None)
     
     #Adds a Tile to the project, generating a unique ID if needed
     def add_tile(self, tile: Tile):
@@ -36,6 +125,10 @@ class Project:
             raise ValueError(f"Tile ID {tile.id} already exists in this project")
         
         self.tiles[tile.id] = tile #Adds the Tile to the registry
+        tile.project = self
+        if isinstance(tile, PlotTile):
+            tile.clear_date_key() #Date may need this project's calendars
+        self._notify("tile_added", tile)
 
     #Removes a Tile from the project and all links to the Tile in the project
     def remove_tile(self, tile_id):
@@ -61,6 +154,9 @@ class Project:
                     print(f"Warning: Removed broken plot point from PlotMap {tile.id} to deleted Tile {tile_id}")
 
         #Remove the Tile from the registry
+        self._notify("tile_removed", self.tiles[tile_id])
+        self.unloaded.pop(tile_id, None)
+        self.tiles[tile_id].project = None
         del self.tiles[tile_id]
 
     #Returns a list of Tiles matching filter_function(tile) == True. Perfect for lambda
@@ -83,42 +179,21 @@ class Project:
         # find_orphans(check_outgoing=False) - returns all incoming orphans
         # find_orphans(check_incoming=False) - returns all outgoing orphans
         # find_orphans(require_both=True) - returns all full orphans (both incoming and outgoing)
+        #An incoming orphan is not linked BY any other Tile. An outgoing orphan links TO nothing
+        #Orphans come from the degree counters (see degrees), so each call is one pass over the registry to keep its order
         ignore_types_set = set(ignore_types or []) #Returns set of ignore_types or an empty set 
         ignore_ids_set = set(ignore_ids or []) #Returns set of ignore_ids or an empty set
-        orphans = []
 
-        for tile in self.tiles.values():
-            if tile.tile_type in ignore_types_set:
-                continue #Filter out ignored types
-            if tile.id in ignore_ids_set:
-                continue #Filter out ignored IDs
-
-            is_incoming_orphan = check_incoming and not any(
-                any(link["target"] == tile.id for link in t.links)
-                for t in self.tiles.values()
-                if t.id != tile.id
-            ) #is an incoming orphan if the Tile is not linked BY anything
-            is_outgoing_orphan = check_outgoing and not tile.links #is an outgoing orphan if the Tile links TO nothing
-
-            # is_incoming_orphan = check_incoming and not any(tile.id in t.links for t in self.tiles.values()) #is an incoming orphan if the Tile is not linked BY anything
-            # is_outgoing_orphan = check_outgoing and not tile.links #is an outgoing orphan if the Tile links TO nothing
-
-            conditions = []
-            if check_incoming:
-                conditions.append(is_incoming_orphan)
-            if check_outgoing:
-                conditions.append(is_outgoing_orphan)
-            if not conditions: #If no conditions given, raise an error
+        if not check_incoming and not check_outgoing: #If no conditions given, raise an error (unless every Tile is ignored)
+            if any(tile.tile_type not in ignore_types_set and tile.id not in ignore_ids_set for tile in self.tiles.values()):
                 raise ValueError("Must check at least incoming or outgoing")
-            
-            if require_both:
-                if all(conditions): #if all given conditions (incoming and outgoing) are True, add the tile (full orphan)
-                    orphans.append(tile)
-            else:
-                if any(conditions):#if not requiring both, add any tile that meets one of the given conditions
-                    orphans.append(tile)
+            return []
 
-        return orphans
+        orphan_ids = self.degrees.orphan_ids(check_incoming, check_outgoing, require_both)
+        if not orphan_ids:
+            return []
+        return [tile for tile in self.tiles.values()
+                if tile.id in orphan_ids and tile.tile_type not in ignore_types_set and tile.id not in ignore_ids_set]
     
     def set_author(self, name):
         if self.author:
@@ -141,7 +216,11 @@ class Project:
         return tag.strip().lower() in self.tags
 
     #Saves a project to a folder by saving all Tiles in their respective folders within the project folder. Saves a manifest.json file as well
+    #Tiles still unloaded after a partial load are copied from their files. Returns {"Tile ID": file path relative to root} for them
     def _save_to_folder(self, root_folder):
+        for tile_id, (path, summary) in list(self.unloaded.items()):
+            if self._tile_summary(self.tiles[tile_id]) != summary:
+                self.hydrate([tile_id]) #Its summary fields were edited, so it is saved from the full Tile
         root = Path(root_folder)
         root.mkdir(parents=True, exist_ok=True) #Ensures root folder exists. Creates it if not
         self.last_modified = datetime.now(timezone.utc).isoformat() #Updates to save time. This implementation is consistent across timezones
@@ -160,29 +239,46 @@ class Project:
             "schema_version": self.schema_version,
             "tile_count": self.tile_count,
             "tiles": [],
-            "project_tags": list(self.tags)
+            "project_tags": list(self.tags),
+            "calendars": [calendar.toDict() for calendar in self.calendars.values()]
         }
 
         #Save each Tile
+        unloaded_paths = {}
         for tile in self.tiles.values():
             tile_folder = root / tile.default_directories.get(tile.tile_type, ".") #ex: ProjectFolder/Tiles/PlotTiles. Defaults to project folder if type not found
             tile_folder.mkdir(parents=True, exist_ok=True) #Ensures subfolder exists. Creates it if not
             
-            tile.save(directory=tile_folder) #Passes in proper directory to save the Tile. This saves it as <id>.json
+            if tile.id in self.unloaded:
+                shutil.copyfile(self.unloaded[tile.id][0], tile_folder / f"{tile.id}.json") #Unchanged since it was saved
+            else:
+                tile.save(directory=tile_folder) #Passes in proper directory to save the Tile. This saves it as <id>.json
 
             #Add tile entries to manifest
             relative_path = (tile_folder / f"{tile.id}.json").relative_to(root) #Ex: gets C:\...ProjectFolder\Tiles\PlotTiles\pt_000000.json relative to the ProjectFolder
+            if tile.id in self.unloaded:
+                unloaded_paths[tile.id] = relative_path
 
-            manifest["tiles"].append({
-                "id": tile.id,
-                "tile_type": tile.tile_type,
-                "filepath": str(relative_path) #Ex: "filepath": Tiles\PlotTiles\pt_000000.json
-            })
+            #The summary (name, links, plot points, timeline_index) lets a partial load pick Tiles and stub the rest without reading their files
+            manifest["tiles"].append({**self._tile_summary(tile), "filepath": str(relative_path)}) #Ex: "filepath": Tiles\PlotTiles\pt_000000.json
 
         #Save manifest file in root folder as manifest.json
         manifest_path = root / "manifest.json" #manifest_path is a Path object
         with manifest_path.open("w", encoding="utf-8") as file:
             json.dump(manifest, file, indent=4)
+        return unloaded_paths
+
+    #Returns a Tile's manifest entry without its filepath: the adjacency summary read by a partial load. Never loads a stub's file
+    @staticmethod
+    def _tile_summary(tile):
+        summary = {"id": tile.id, "tile_type": tile.tile_type, "name": tile.name, "links": tile.links}
+        if isinstance(tile, PlotMap):
+            summary["plot_points"] = tile.plot_points
+        elif isinstance(tile, PlotTile):
+            summary["timeline_index"] = tile.timeline_index
+            if "_date" in tile.__dict__: #Stubs from older manifests have no date until their file is read
+                summary["date"] = tile.date
+        return summary
 
     #Safe save that makes a temp folder, saves all files, makes original folder a backup, replaces old project folder, and only then removes backup
     #Returns True if saved successfully. Returns False if failed.
@@ -198,19 +294,25 @@ class Project:
             try:
                 if recovered_project and datetime.fromisoformat(recovered_project.last_modified) > datetime.fromisoformat(self.last_modified):
                     print("Recovered a newer project. Updating current project to recovered state")
+                    rules = self.rules #Rules are not saved, so keep the ones registered on this project
                     self.__dict__.update(recovered_project.__dict__) #Updates project instance with recovered data
+                    self.rules = rules
+                    for tile in self.tiles.values():
+                        tile.project = self #Recovered Tiles still point at the recovered Project object
+                    self.reset_indexes()
             except Exception:
                 pass #If last_modified is invalid or nothing was recovered, proceed with current in memory project
 
-        #Run load_check to check project integrity
-        load_check_report = self.load_check(raise_on_error=False)
+        #Run load_check to check project integrity. Incremental: only changed Tiles are checked again, including Tiles edited without mark_changed
+        self.get_index("load_check", LoadCheckCache).find_unhooked()
+        load_check_report = self.load_check(raise_on_error=False, incremental=True)
         if load_check_report["errors"]:
             print(f"WARNING: Project has {len(load_check_report['errors'])} errors and may be corrupted. Save aborted: {load_check_report['errors']}")
             return False
         
         #Save to temp folder
         try:
-            self._save_to_folder(temp)
+            unloaded_paths = self._save_to_folder(temp)
         except Exception as error:
             print(f"CRITICAL: Error saving to temp folder: {error}")
             return False
@@ -255,6 +357,8 @@ class Project:
                 except Exception as error:
                     print(f"Warning: Could not remove leftover folder {folder}: {error}")
 
+        for tile_id, relative_path in unloaded_paths.items(): #Unloaded Tiles are now read from the saved folder
+            self.unloaded[tile_id] = (str(root / relative_path), self.unloaded[tile_id][1])
         return True
 
     #Finds the most recent valid project file of all potential save files and promotes it to the project folder
@@ -333,20 +437,21 @@ class Project:
 
     #Creates a Project object loaded with all the Tiles within its folder and resolves all Tile links and plot points.
     #Uses manifest.json to load, otherwise manually gathers files
+    #If focus is given (Tile IDs, ex: a PlotMap ID), only the files of the focus Tiles and Tiles within depth links of them are read. The
+    #manifest's adjacency summary picks them, and every other Tile becomes a stub (see Tiles.TileStub) that reads its file when needed
     @staticmethod
-    def _load_from_disk(root_folder):
-        load_report = {
-            "manifest_used": False,
-            "fallback_used": False,
-
-            "tiles_loaded_from_manifest": [],
-            "tiles_missing_from_manifest": [],
-            "tiles_recovered": [],
-            "tiles_loaded_from_fallback": [],
-
-            "warnings": [],
-            "errors": [],
-        }
+    def _load_from_disk(root_folder, focus=None, depth=1):
+        #Issues go in with load_report.error()/warning(). load_report["errors"] and load_report["warnings"] give the messages
+        load_report = IssueReport(
+            manifest_used=False,
+            fallback_used=False,
+
+            tiles_loaded_from_manifest=[],
+            tiles_missing_from_manifest=[],
+            tiles_recovered=[],
+            tiles_loaded_from_fallback=[],
+            tiles_unloaded=[]
+        )
 
         project = Project() #Creates an empty Project object
         root = Path(root_folder) #Root folder becomes safe Path object
@@ -364,38 +469,48 @@ class Project:
             #Load project metadata first (even if manifest is missing files). If not found, set to default metadata of a new project
             project.project_name = manifest.get("project_name", project.project_name)
             if manifest.get("project_name") is None:
-                load_report["warnings"].append("Manifest missing project's 'project_name' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'project_name' attribute")
             project.project_id = manifest.get("project_id", project.project_id)
             if manifest.get("project_id") is None:
-                load_report["warnings"].append("Manifest missing project's 'project_id' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'project_id' attribute")
             project.description = manifest.get("description", project.description)
             if manifest.get("description") is None:
-                load_report["warnings"].append("Manifest missing project's 'description' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'description' attribute")
             project.author = manifest.get("author", project.author)
             if manifest.get("author") is None:
-                load_report["warnings"].append("Manifest missing project's 'author' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'author' attribute")
             project.last_editor = manifest.get("last_editor", project.last_editor)
             if manifest.get("last_editor") is None:
-                load_report["warnings"].append("Manifest missing project's 'last_editor' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'last_editor' attribute")
             project.created_at = manifest.get("created_at", project.created_at)
             if manifest.get("created_at") is None:
-                load_report["warnings"].append("Manifest missing project's 'created_at' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'created_at' attribute")
             project.last_modified = manifest.get("last_modified", project.last_modified)
             if manifest.get("last_modified") is None:
-                load_report["warnings"].append("Manifest missing project's 'last_modified' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'last_modified' attribute")
             project.version = manifest.get("version", project.version)
             if manifest.get("version") is None:
-                load_report["warnings"].append("Manifest missing project's 'version' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'version' attribute")
             project.schema_version = manifest.get("schema_version", project.schema_version)
             if manifest.get("schema_version") is None:
-                load_report["warnings"].append("Manifest missing project's 'schema_version' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'schema_version' attribute")
             project.tags = set(manifest.get("project_tags", []))
             if manifest.get("project_tags") is None:
-                load_report["warnings"].append("Manifest missing project's 'project_tags' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'project_tags' attribute")
+            for calendar_data in manifest.get("calendars", []): #Older manifests have no calendars
+                calendar = Calendar.fromDict(calendar_data)
+                project.calendars[calendar.name] = calendar
 
             manifest_tile_count = manifest.get("tile_count", None)
             if manifest_tile_count is None: #If the manifest does not have a tile count
-                load_report["warnings"].append("Manifest missing project's 'tile_count' attribute")
+                load_report.warning("manifest.missing_attribute", "Manifest missing project's 'tile_count' attribute")
+
+            focus_ids = None #Tiles to read in a partial load. None = all
+            if focus is not None and "tiles" in manifest:
+                if all("links" in tile_dict and "id" in tile_dict for tile_dict in manifest["tiles"]):
+                    focus_ids = Project._focus_ids(manifest["tiles"], focus, depth)
+                else:
+                    load_report.warning("load.no_summary", "Manifest has no adjacency summary (saved by an older version). Loading every Tile")
 
             if "tiles" in manifest:
                 for tile_dict in manifest.get("tiles"):
@@ -405,6 +520,13 @@ class Project:
                         load_report["tiles_missing_from_manifest"].append(tile_dict.get("id", "unknown")) #Any tiles missing a filepath in the manifest are recorded
                         continue
                     
+                    if focus_ids is not None and tile_dict["id"] not in focus_ids:
+                        tile = unloaded_tile(tile_dict) #Outside the focus: stub from the summary. Its file is found when it is read
+                        loaded_tiles.append(tile)
+                        project.unloaded[tile.id] = (os.path.join(root, filepath), {key: value for key, value in tile_dict.items() if key != "filepath"})
+                        load_report["tiles_unloaded"].append(tile.id)
+                        continue
+
                     tile_path = root / filepath #Combines root folder and its filepath relative to root folder for complete path
                     try:
                         tile = Tile.load(tile_path)
@@ -413,7 +535,7 @@ class Project:
                     except Exception as error:
                         missing_tiles.append(tile_dict.get("id", "unknown"))
                         load_report["tiles_missing_from_manifest"].append(tile_dict.get("id", "unknown")) #Any tiles that fail to load during manifest load are recorded
-                        load_report["warnings"].append(f"{tile_path}: {error}\n{traceback.format_exc()}") #Warning shows exact line where error occurred
+                        load_report.warning("load.tile_failed", "{}: {}\n{}", tile_path, str(error), LazyTraceback(error), tile_ids=(tile_dict.get("id", "unknown"),)) #Warning shows exact line where error occurred
             else:
                 #Fallback if manifest exists but is missing tiles list: manual file finding and loading
                 load_report["fallback_used"] = True
@@ -423,7 +545,7 @@ class Project:
                         project.add_tile(tile) #Adds loaded Tile object to created project's registry. Assigns ID if missing
                         load_report["tiles_loaded_from_fallback"].append(tile.id)
                     except Exception as error:
-                        load_report["errors"].append(f"{json_file}: {error}\n{traceback.format_exc()}") #Error shows exact line where error occurred
+                        load_report.error("load.file_failed", "{}: {}\n{}", json_file, str(error), LazyTraceback(error)) #Error shows exact line where error occurred
                         continue
         else:
             #Fallback if manifest.json doesn't exist: manual file finding and loading
@@ -434,7 +556,7 @@ class Project:
                     project.add_tile(tile) #Adds loaded Tile object to created project's registry. Assigns ID if missing
                     load_report["tiles_loaded_from_fallback"].append(tile.id)
                 except Exception as error:
-                    load_report["errors"].append(f"{json_file}: {error}\n{traceback.format_exc()}") #Error shows exact line where error occurred
+                    load_report.error("load.file_failed", "{}: {}\n{}", json_file, str(error), LazyTraceback(error)) #Error shows exact line where error occurred
                     continue
 
         if missing_tiles: #If the manifest existed but resulted in any missing tiles (unsucessful manifest)...
@@ -455,12 +577,12 @@ class Project:
                         tile = Tile.load(json_file)
 
                         if tile.id in found_tiles:
-                            load_report["warnings"].append(f"Duplicate tile ID {tile.id} found at {json_file}. Using last loaded version.")
+                            load_report.warning("load.duplicate_tile", "Duplicate tile ID {} found at {}. Using last loaded version.", tile.id, json_file, tile_ids=(tile.id,))
                         
                         found_tiles[tile.id] = tile #Adds "id": Tile object pairs to found_tiles
                         load_report["tiles_loaded_from_fallback"].append(tile.id)
                     except Exception as error:
-                        load_report["errors"].append(f"{json_file}: {error}\n{traceback.format_exc()}") #Error shows exact line where error occurred
+                        load_report.error("load.file_failed", "{}: {}\n{}", json_file, str(error), LazyTraceback(error)) #Error shows exact line where error occurred
                         continue
                 
                 #Add all recovered tiles (missing manifest load tiles found by fallback scan) to project
@@ -480,13 +602,15 @@ class Project:
             else:
                 #Does fallback scan if manifest load resulted in >30% missing files
                 load_report["fallback_used"] = True
+                project.unloaded = {} #Every Tile is read by the scan
+                load_report["tiles_unloaded"] = []
                 for json_file in root.rglob("*.json"):
                     try:
                         tile = Tile.load(json_file)
                         project.add_tile(tile)
                         load_report["tiles_loaded_from_fallback"].append(tile.id)
                     except Exception as error:
-                        load_report["errors"].append(f"{json_file}: {error}\n{traceback.format_exc()}") #Error shows exact line where error occurred
+                        load_report.error("load.file_failed", "{}: {}\n{}", json_file, str(error), LazyTraceback(error)) #Error shows exact line where error occurred
                         continue
         elif loaded_tiles: #If manifest existed and had no missing tiles, add loaded tiles to project (successul manifest load)
             for tile in loaded_tiles:
@@ -494,7 +618,7 @@ class Project:
 
         if manifest_tile_count is not None: #If manifest existed and had a tile count
             if manifest_tile_count != project.tile_count:
-                load_report["errors"].append(f"Manifest expected {manifest_tile_count} tiles but loaded {project.tile_count}")
+                load_report.error("load.tile_count_mismatch", "Manifest expected {} tiles but loaded {}", manifest_tile_count, project.tile_count)
 
         #Resolve all links for Tiles
         for tile in project.tiles.values(): #Grabs the Tile objects in registry
@@ -506,10 +630,43 @@ class Project:
 
         return project, load_report #returns loaded Project instance
     
+    #Returns the IDs a partial load reads: the focus Tiles, the plot points of focus PlotMaps, and every Tile within depth links of them
+    #(in either direction, depth None = no limit), found from the manifest's adjacency summary
+    @staticmethod
+    def _focus_ids(tile_dicts, focus, depth):
+        summaries = {tile_dict["id"]: tile_dict for tile_dict in tile_dicts}
+        neighbours = {} #"Tile ID": set of Tile IDs it links to or is linked by
+        for tile_id, tile_dict in summaries.items():
+            for link in tile_dict["links"]:
+                target_id = link.get("target") if isinstance(link, dict) else None
+                if target_id is not None:
+                    neighbours.setdefault(tile_id, set()).add(target_id)
+                    neighbours.setdefault(target_id, set()).add(tile_id)
+
+        frontier = []
+        for tile_id in ([focus] if isinstance(focus, str) else focus):
+            if tile_id not in summaries:
+                raise ValueError(f"Tile {tile_id} not found in project")
+            frontier.append(tile_id)
+            frontier.extend(summaries[tile_id].get("plot_points", []))
+        found = set(frontier)
+        hops = 0
+        while frontier and (depth is None or hops < depth):
+            hops += 1
+            next_frontier = []
+            for tile_id in frontier:
+                for other_id in neighbours.get(tile_id, ()):
+                    if other_id not in found:
+                        found.add(other_id)
+                        next_frontier.append(other_id)
+            frontier = next_frontier
+        return found
+
     #UI-friendly load that also runs a load check
+    #Pass focus (a PlotMap ID or Tile IDs) to read only the Tiles within depth links of it. The rest load on demand (see hydrate)
     @staticmethod
-    def load(root_folder, strict=True):
-        project, load_report = Project._load_from_disk(root_folder) #project is the loaded Project object from save folder
+    def load(root_folder, strict=True, focus=None, depth=1):
+        project, load_report = Project._load_from_disk(root_folder, focus, depth) #project is the loaded Project object from save folder
 
         if strict and load_report.get("errors"):
             raise AssertionError(load_report)
@@ -523,8 +680,54 @@ class Project:
         
         return project, load_report, load_check_report #returns a tuple of (loaded project object, load report dict of file loading issues, load check report dict of loaded project object errors and warnings)
 
-    #Checks the internal consistency of the loaded project. If raise_on_error=False, errors are returned as a list of strs (if none, returns [])
-    def load_check(self, raise_on_error=True):
+    #Checks the internal consistency of the loaded project. If raise_on_error=False, errors are returned in an Issues.IssueReport
+    #(report["errors"] and report["warnings"] are lists of message strs, and the Issues can be filtered by Tile ID or code)
+    #If incremental, only Tiles changed since the last check (and the Tiles whose checks read them) are checked again. Results match a full check
+    #as long as Tiles are edited through Project/Tile methods or marked with mark_changed(tile). Direct edits to a Tile's links, plot points,
+    #id, name, timeline_index, date or set of fields are also caught by save, which compares a signature of each Tile first (see LoadCheckCache)
+    def load_check(self, raise_on_error=True, incremental=False):
+        errors = []
+        warnings = []
+        errors, warnings = self._check_metadata()
+        if hasattr(self, "tiles"):
+            tile_errors, tile_warnings = self.get_index("load_check", LoadCheckCache).check(full=not incremental)
+            errors.extend(tile_errors)
+            warnings.extend(tile_warnings)
+        return self._finish_check(errors, warnings, raise_on_error)
+
+    #Full load_check with the per-Tile checks spread over a process pool. Same report as load_check. See ParallelCheck.parallel_check_tiles
+    def parallel_load_check(self, raise_on_error=True, workers=None, shard_size=None):
+        errors, warnings = self._check_metadata()
+        if hasattr(self, "tiles"):
+            tile_errors, tile_warnings = parallel_check_tiles(self, workers, shard_size)
+            errors.extend(tile_errors)
+            warnings.extend(tile_warnings)
+        return self._finish_check(errors, warnings, raise_on_error)
+
+    #Incremental load_check in three steps so the per-Tile checks can run on another thread (ex: the GUI's validation worker)
+    #begin_background_check copies the changed Tiles into a job. Call it where the project is edited
+    def begin_background_check(self):
+        return self.get_index("load_check", LoadCheckCache).begin_background()
+
+    #Checks a job from begin_background_check. Safe on any thread: it only reads the job's copies, never the project
+    @staticmethod
+    def run_background_check(job):
+        return LoadCheckCache.run_background_job(job)
+
+    #Stores a job's results. Returns the same report as load_check(raise_on_error=False, incremental=True), or None if the job is stale
+    #(another check started after it, or the indexes were reset). Call it where the project is edited
+    def finish_background_check(self, job, results):
+        cache = self.indexes.get("load_check")
+        checked = cache.finish_background(job, results) if cache is not None else None
+        if checked is None:
+            return None
+        errors, warnings = self._check_metadata()
+        errors.extend(checked[0])
+        warnings.extend(checked[1])
+        return self._finish_check(errors, warnings, False)
+
+    #Checks project metadata and that the Tile registry exists. Returns (errors, warnings) as lists of Issues. First part of load_check
+    def _check_metadata(self):
         errors = []
         warnings = []
 
@@ -537,23 +740,23 @@ class Project:
 
         #Metadata checking        
         if not hasattr(self, "project_name"):
-            errors.append(f"WARNING: Project ({project_id}) missing 'project_name' attribute")
+            errors.append(Issue.error("project.missing_attribute", "WARNING: Project ({}) missing 'project_name' attribute", project_id))
         if not hasattr(self, "project_id"):
-            errors.append(f"WARNING: Project {project_name} missing 'project_id' attribute")
+            errors.append(Issue.error("project.missing_attribute", "WARNING: Project {} missing 'project_id' attribute", project_name))
         if not hasattr(self, "description"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'description' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'description' attribute", project_name, project_id))
         if not hasattr(self, "author"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'author' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'author' attribute", project_name, project_id))
         if not hasattr(self, "last_editor"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'last_editor' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'last_editor' attribute", project_name, project_id))
 
         has_created_at = True
         has_last_modified = True
         if not hasattr(self, "created_at"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'created_at' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'created_at' attribute", project_name, project_id))
             has_created_at = False
         if not hasattr(self, "last_modified"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'last_modified' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'last_modified' attribute", project_name, project_id))
             has_last_modified = False
 
         if has_created_at and has_last_modified:
@@ -561,282 +764,334 @@ class Project:
                 created_date = datetime.fromisoformat(self.created_at)
                 modified_date = datetime.fromisoformat(self.last_modified)
                 if created_date > modified_date:
-                    errors.append(f"Project {project_name} ({project_id}) created_at is after last_modified")
+                    errors.append(Issue.error("project.bad_dates", "Project {} ({}) created_at is after last_modified", project_name, project_id))
             except Exception as error:
-                errors.append(f"Project {project_name} ({project_id}) has invalid datetime format in metadata: {error}")
+                errors.append(Issue.error("project.bad_dates", "Project {} ({}) has invalid datetime format in metadata: {}", project_name, project_id, error))
 
         if not hasattr(self, "version"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'version' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'version' attribute", project_name, project_id))
         else:
             if type(self.version) == int:
                 if self.version < 0:
-                    errors.append(f"Project {project_name} ({project_id}) version is negative: {self.version}")
+                    errors.append(Issue.error("project.bad_version", "Project {} ({}) version is negative: {}", project_name, project_id, self.version))
             else:
-                errors.append(f"Project {project_name} ({project_id}) version is not an int: {self.version}")
+                errors.append(Issue.error("project.bad_version", "Project {} ({}) version is not an int: {}", project_name, project_id, self.version))
         if not hasattr(self, "schema_version"):
-            errors.append(f"Project {project_name} ({project_id}) missing 'schema_version' attribute") #Error because important for loading
+            errors.append(Issue.error("project.missing_attribute", "Project {} ({}) missing 'schema_version' attribute", project_name, project_id)) #Error because important for loading
         else:
             if type(self.schema_version) == int:
                 if self.schema_version < 0:
-                    errors.append(f"Project {project_name} ({project_id}) schema version is negative: {self.schema_version}")
+                    errors.append(Issue.error("project.bad_schema_version", "Project {} ({}) schema version is negative: {}", project_name, project_id, self.schema_version))
             else:
-                errors.append(f"Project {project_name} ({project_id}) schema version is not an int: {self.schema_version}")
+                errors.append(Issue.error("project.bad_schema_version", "Project {} ({}) schema version is not an int: {}", project_name, project_id, self.schema_version))
 
         #Tags checking
         if not hasattr(self, "tags"):
-            warnings.append(f"Project {project_name} ({project_id}) missing 'tags' attribute")
+            warnings.append(Issue.warning("project.missing_attribute", "Project {} ({}) missing 'tags' attribute", project_name, project_id))
         else:
             if not all(isinstance(tag, str) for tag in self.tags):
-                errors.append(f"Project {project_name} ({project_id}) tags contain non-string values")
+                errors.append(Issue.error("project.bad_tags", "Project {} ({}) tags contain non-string values", project_name, project_id))
 
         #Tile registry consistency
         if not hasattr(self, "tiles"):
-            errors.append(f"WARNING: PROJECT {project_name} ({project_id}) MISSING 'tiles' ATTRIBUTE!")
-        else:
-            for tile_id_key, tile in self.tiles.items():
-                tile_name = "MISSING NAME"
-                tile_id = "MISSING ID"
-                if hasattr(tile, "name"):
-                    tile_name = tile.name
-                if hasattr(tile, "id"):
-                    tile_id = tile.id
-                if not hasattr(tile, "id"):
-                    errors.append(f"WARNING: Tile {tile_name} ({tile_id}) missing 'id' attribute")
-                if not hasattr(tile, "tile_type"):
-                    errors.append(f"WARNING: Tile {tile_name} ({tile_id}) missing 'tile_type' attribute")
-                if not hasattr(tile, "name"):
-                    errors.append(f"WARNING: Tile {tile_name} ({tile_id}) missing 'name' attribute")
-
-                if tile_id != "MISSING ID":
-                    if tile.id != tile_id_key:
-                        errors.append(f"Tile ID mismatch: {tile_name} tile.id={tile_id}, key={tile_id_key}")
-                else:
-                    errors.append(f"Tile ID mismatch: {tile_name} tile.id={tile_id}, key={tile_id_key}")
-
-                if not hasattr(tile, "links"):
-                    errors.append(f"WARNING: Tile {tile_name} ({tile_id}) missing 'links' attribute")
-                if not hasattr(tile, "resolved_links"):
-                    errors.append(f"WARNING: Tile {tile_name} ({tile_id}) missing 'resolved_links' attribute")
-                if not hasattr(tile, "tags"):
-                    warnings.append(f"Tile {tile_name} ({tile_id}) missing 'tags' attribute")
-
-                #Links and resolved_links consistency
-                if hasattr(tile, "links"):
-                    for link in tile.links:
-                        if not isinstance(link, dict):
-                            errors.append(f"Tile {tile_name} ({tile_id}) has malformed link (not dict): {link}")
-
-                        if "target" not in link:
-                            errors.append(f"Tile {tile_name} ({tile_id}) has link missing target: {link}")
-
-                        if "type" not in link:
-                            errors.append(f"Tile {tile_name} ({tile_id}) has link missing type: {link}")
-
-                        if "target" in link and link["target"] not in self.tiles:
-                            errors.append(f"Tile {tile_name} ({tile_id}) links to nonexistent tile {link['target']}")
-
-                # if hasattr(tile, "links"):
-                #     for link_id in tile.links:
-                #         if link_id not in self.tiles:
-                #             errors.append(f"Tile {tile_name} ({tile_id}) links to nonexistent tile {link_id}")
-
-                if hasattr(tile, "resolved_links"):
-                    for resolved in tile.resolved_links:
-                        resolved_name = "MISSING NAME"
-                        if hasattr(resolved, "name"):
-                            resolved_name = resolved.name
-                        if hasattr(resolved, "id"):
-                            if resolved.id not in self.tiles:
-                                errors.append(f"Tile {tile_name} ({tile_id}) has resolved link to nonexistent tile {resolved_name} ({resolved.id})")
-
-                #Check that all links IDs are in resolved_links IDs
-                if hasattr(tile, "links") and hasattr(tile, "resolved_links"):
-                    resolved_ids = set()
-                    for resolved in tile.resolved_links:
-                        if hasattr(resolved, "id"):
-                            resolved_ids.add(resolved.id)
-
-                    #for link_id in tile.links:
-                    for link in tile.links:
-                        if "target" in link and link["target"] not in resolved_ids:
-                        #if link_id not in resolved_ids:
-                            errors.append(f"Tile {tile_name} ({tile_id}) has unresolved link {link.get('target', 'unknown')}")
-
-                #Check that all resolved_links IDs are in links IDs
-                if hasattr(tile, "links") and hasattr(tile, "resolved_links"):
-                    #plot_id_set = set(tile.links)
-                    plot_id_set = set([link.get("target") for link in tile.links])
-
-                    for resolved in tile.resolved_links:
-                        resolved_name = "MISSING NAME"
-                        if hasattr(resolved, "name"):
-                            resolved_name = resolved.name
-                        if hasattr(resolved, "id"):
-                            if resolved.id not in plot_id_set:
-                                errors.append(f"Tile {tile_name} ({tile_id}) has extra resolved link {resolved_name} ({resolved.id}) not in links")
-
-                #---TILE SPECIFIC CHECKING---
-
-                #PlotMap checking
-                if isinstance(tile, PlotMap):
-                    if not hasattr(tile, "plot_points"):
-                        errors.append(f"PlotMap {tile_name} ({tile_id}) missing 'plot_points' attribute")
-                    else:
-                        for plot_tile_id in tile.plot_points:
-                            if plot_tile_id not in self.tiles:
-                                errors.append(f"PlotMap {tile_name} ({tile_id}) has unknown plot point {plot_tile_id}")
-                            else:
-                                plot_tile = self.tiles[plot_tile_id]
-                                plot_tile_name = "MISSING NAME"
-                                if hasattr(plot_tile, "name"):
-                                    plot_tile_name = plot_tile.name
-                                #Check bidirectional link
-                                if hasattr(plot_tile, "links"):
-                                    if not any(link["target"] == tile.id for link in plot_tile.links):
-                                    #if tile.id not in plot_tile.links:
-                                        errors.append(f"PlotTile {plot_tile_name} ({plot_tile.id}) not linked back to PlotMap {tile_name} ({tile_id})")
-                    #Check resolved plot points
-                    if not hasattr(tile, "resolved_plot_points"):
-                        errors.append(f"PlotMap {tile_name} ({tile_id}) missing 'resolved_plot_points' attribute")
-                    else:
-                        for resolved in tile.resolved_plot_points:
-                            resolved_name = "MISSING NAME"
-                            if hasattr(resolved, "name"):
-                                resolved_name = resolved.name
-                            if hasattr(resolved, "id"):
-                                if resolved.id not in self.tiles:
-                                    errors.append(f"PlotMap {tile_name} ({tile_id}) has resolved plot point to unknown tile {resolved_name} ({resolved.id})")
-
-                    #Check that all plot point IDs are in resolved_plot_points IDs
-                    if hasattr(tile, "plot_points") and hasattr(tile, "resolved_plot_points"):
-                        resolved_ids = set()
-                        for resolved in tile.resolved_plot_points:
-                            if hasattr(resolved, "id"):
-                                resolved_ids.add(resolved.id)
-
-                        for plot_id in tile.plot_points:
-                            if plot_id not in resolved_ids:
-                                errors.append(f"PlotMap {tile_name} ({tile_id}) has unresolved plot point {plot_id}")
-
-                    #Check that all resolved_plot_points IDs are in plot_points IDs
-                    if hasattr(tile, "plot_points") and hasattr(tile, "resolved_plot_points"):
-                        plot_id_set = set(tile.plot_points)
-
-                        for resolved in tile.resolved_plot_points:
-                            resolved_name = "MISSING NAME"
-                            if hasattr(resolved, "name"):
-                                resolved_name = resolved.name
-                            if hasattr(resolved, "id"):
-                                if resolved.id not in plot_id_set:
-                                    errors.append(f"PlotMap {tile_name} ({tile_id}) has extra resolved plot point {resolved_name} ({resolved.id}) not in plot_points")
-
-                #PlotTile checking
-                if isinstance(tile, PlotTile):
-                    #timeline_index checking
-                    if not hasattr(tile, "timeline_index"):
-                        errors.append(f"PlotTile {tile_name} ({tile_id}) missing 'timeline_index' attribute")
-                    else:
-                        if tile.timeline_index is not None:
-                            if not isinstance(tile.timeline_index, int):
-                                errors.append(f"PlotTile {tile_name} ({tile_id}) timeline_index is not an int")
-                            elif tile.timeline_index < 0:
-                                errors.append(f"PlotTile {tile_name} ({tile_id}) timeline_index is negative")
-                    #Extra data checking    
-                    if not hasattr(tile, "description"):
-                        warnings.append(f"PlotTile {tile_name} ({tile_id}) missing 'description' attribute")
-                    if not hasattr(tile, "date"):
-                        warnings.append(f"PlotTile {tile_name} ({tile_id}) missing 'date' attribute")
-                    if not hasattr(tile, "location"):
-                        warnings.append(f"PlotTile {tile_name} ({tile_id}) missing 'location' attribute")
-
-                #CharacterTile checking
-                if isinstance(tile, CharacterTile):
-                    if not hasattr(tile, "description"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'description' attribute")
-                    if not hasattr(tile, "title"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'title' attribute")
-                    if not hasattr(tile, "backstory"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'backstory' attribute")
-                    if not hasattr(tile, "traits"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'traits' attribute")
-                    if not hasattr(tile, "race"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'race' attribute")
-                    if not hasattr(tile, "age"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'age' attribute")
-                    if not hasattr(tile, "gender"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'gender' attribute")
-                    if not hasattr(tile, "occupation"):
-                        warnings.append(f"CharacterTile {tile_name} ({tile_id}) missing 'occupation' attribute")
-
-                #SettingTile checking
-                if isinstance(tile, SettingTile):
-                    if not hasattr(tile, "description"):
-                        warnings.append(f"SettingTile {tile_name} ({tile_id}) missing 'description' attribute")
-                    if not hasattr(tile, "history"):
-                        warnings.append(f"SettingTile {tile_name} ({tile_id}) missing 'history' attribute")
-
-                #---TILE SPECIFIC CHECKING DONE---
-
-        #Timeline conflict detection
-        timeline_index_map = {} #Will be populated with "timeline_index #": list of PlotTiles with this timeline_index. Ex: {1: [pt_000000, pt000001], 2: [pt_000002]}
-        for tile in self.tiles.values():
-            if isinstance(tile, PlotTile) and tile.timeline_index is not None:
-                timeline_index_map.setdefault(tile.timeline_index, []) #Creates a "timeline_index #": [] pair for each timeline_index
-                timeline_index_map[tile.timeline_index].append(tile) #Adds every PlotTile with that timeline_index to the list for that timeline_index key
+            errors.append(Issue.error("project.missing_attribute", "WARNING: PROJECT {} ({}) MISSING 'tiles' ATTRIBUTE!", project_name, project_id))
+        return errors, warnings
 
-        for index, tiles in timeline_index_map.items():
-            if len(tiles) > 1:
-                plot_tile_ids = [plot_tile.id for plot_tile in tiles]
-                warnings.append(f"Timeline Conflict: timeline_index {index} is used by PlotTiles {plot_tile_ids}")
+    #Adds timeline conflicts to a load_check report, then raises or returns it. Last part of load_check
+    def _finish_check(self, errors, warnings, raise_on_error):
+        #Timeline conflict detection. The chronology index tracks shared timeline_index values as they change. Ex: {1: [pt_000000, pt000001]}
+        if hasattr(self, "tiles"):
+            for index, plot_tile_ids in self.chronology.conflicts().items():
+                warnings.append(Issue.warning("timeline.conflict", "Timeline Conflict: timeline_index {} is used by PlotTiles {}", index, plot_tile_ids, tile_ids=plot_tile_ids))
 
         if errors and raise_on_error:
-            raise AssertionError("Load check failed:\n" + "\n".join(errors))
-        return {"errors": errors, "warnings": warnings} #Report any errors or warnings
-    
-    #Checks logical links of plot points for a PlotMap
-    def validate_plotmap(self, plotmap_id):
-        timeline = {}
-
-        for tile in self.tiles.values():
-            if hasattr(tile, "timeline_index") and tile.timeline_index is not None: #If no timeline, skip it
-                timeline[tile.id] = tile.timeline_index
+            raise AssertionError("Load check failed:\n" + "\n".join(issue.message for issue in errors))
+        return IssueReport(errors + warnings) #Report any errors or warnings. report["errors"] and report["warnings"] give the messages
 
-        plotmap = self.tiles.get(plotmap_id)
-        if plotmap is None:
-            raise ValueError(f"PlotMap {plotmap_id} does not exist in project")
-        
-        plot_ids = set(plotmap.plot_points)
-        
+    #Checks that a PlotMap's plot point links back to it, looking the plot point up in tiles (the Tile registry). Returns an error Issue or None
+    @staticmethod
+    def _check_backlink(tiles, plot_tile_id, plotmap_id, plotmap_name, plotmap_label):
+        plot_tile = tiles[plot_tile_id]
+        plot_tile_name = "MISSING NAME"
+        if hasattr(plot_tile, "name"):
+            plot_tile_name = plot_tile.name
+        #Check bidirectional link
+        if hasattr(plot_tile, "links"):
+            if not any(link["target"] == plotmap_id for link in plot_tile.links):
+            #if tile.id not in plot_tile.links:
+                return Issue.error("plotmap.missing_backlink", "PlotTile {} ({}) not linked back to PlotMap {} ({})", plot_tile_name, plot_tile.id, plotmap_name, plotmap_label,
+                                   tile_ids=(plotmap_id, plot_tile_id), link_type="plot point")
+        return None
+
+    #Checks one registry entry (registry key and Tile). Returns (errors, warnings) as lists of Issues. Used by load_check through LoadCheckCache
+    #and by the parallel and background checks. tiles is the Tile registry, or in worker processes just its IDs (only membership is tested)
+    #If backlinks is a list, plot point back links are not checked. (error position, plot point ID, PlotMap ID, PlotMap name, PlotMap ID or
+    #"MISSING ID") is appended for each instead, so a parallel check can finish them when merging
+    @staticmethod
+    def _check_tile(tiles, tile_id_key, tile, backlinks=None):
         errors = []
-
-        for plot_tile_id in plotmap.plot_points:
-            plot_tile = self.tiles.get(plot_tile)
-            if plot_tile is None:
-                raise ValueError(f"Plot point {plot_tile_id} does not exist in project")
-            
-            for link in plot_tile.links:
-                target = link["target"]
-                link_type = link["type"]
-
-                if link_type not in ("requires", "causes", "enables", "blocks"):
-                    continue #Only checks logical links
-
-                if target not in timeline or plot_tile_id not in timeline:
-                    continue #Only checks plot points and links with timeline index
-
-                if link_type == "blocks" and target not in plot_ids:
-                    continue #Ignore blocks if target isn't in this PlotMap
-
-                time_plot_point = timeline[plot_tile_id]
-                time_target = timeline[target]
-
-                if link_type == "requires" and not (time_plot_point > time_target):
-                    errors.append(f"{plot_tile.name} requires {self.tiles[target].name}, but {self.tiles[target].name} does not happen before {plot_tile.name}")
-
-                elif link_type in ("causes", "enables", "blocks") and not (time_plot_point < time_target):
-                    errors.append(f"{plot_tile.name} {link_type} {self.tiles[target].name}, but {self.tiles[target].name} does not happen after {plot_tile.name}")
-
-                return errors
+        warnings = []
+        if isinstance(tile, TileStub):
+            return errors, warnings #Unloaded: checked once its file is read (see hydrate)
+        tile_name = "MISSING NAME"
+        tile_id = "MISSING ID"
+        if hasattr(tile, "name"):
+            tile_name = tile.name
+        if hasattr(tile, "id"):
+            tile_id = tile.id
+        if not hasattr(tile, "id"):
+            errors.append(Issue.error("tile.missing_attribute", "WARNING: Tile {} ({}) missing 'id' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+        if not hasattr(tile, "tile_type"):
+            errors.append(Issue.error("tile.missing_attribute", "WARNING: Tile {} ({}) missing 'tile_type' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+        if not hasattr(tile, "name"):
+            errors.append(Issue.error("tile.missing_attribute", "WARNING: Tile {} ({}) missing 'name' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+
+        if tile_id != "MISSING ID":
+            if tile.id != tile_id_key:
+                errors.append(Issue.error("tile.id_mismatch", "Tile ID mismatch: {} tile.id={}, key={}", tile_name, tile_id, tile_id_key, tile_ids=(tile_id_key,)))
+        else:
+            errors.append(Issue.error("tile.id_mismatch", "Tile ID mismatch: {} tile.id={}, key={}", tile_name, tile_id, tile_id_key, tile_ids=(tile_id_key,)))
+
+        if not hasattr(tile, "links"):
+            errors.append(Issue.error("tile.missing_attribute", "WARNING: Tile {} ({}) missing 'links' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+        if not hasattr(tile, "resolved_links"):
+            errors.append(Issue.error("tile.missing_attribute", "WARNING: Tile {} ({}) missing 'resolved_links' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+        if not hasattr(tile, "tags"):
+            warnings.append(Issue.warning("tile.missing_attribute", "Tile {} ({}) missing 'tags' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+
+        #Links and resolved_links consistency
+        if hasattr(tile, "links"):
+            for link in tile.links:
+                if not isinstance(link, dict):
+                    errors.append(Issue.error("link.malformed", "Tile {} ({}) has malformed link (not dict): {}", tile_name, tile_id, link, tile_ids=(tile_id_key,)))
+
+                if "target" not in link:
+                    errors.append(Issue.error("link.malformed", "Tile {} ({}) has link missing target: {}", tile_name, tile_id, link, tile_ids=(tile_id_key,)))
+
+                if "type" not in link:
+                    errors.append(Issue.error("link.malformed", "Tile {} ({}) has link missing type: {}", tile_name, tile_id, link, tile_ids=(tile_id_key,)))
+
+                if "target" in link and link["target"] not in tiles:
+                    errors.append(Issue.error("link.missing_target", "Tile {} ({}) links to nonexistent tile {}", tile_name, tile_id, link['target'], tile_ids=(tile_id_key, link["target"]), link_type=link.get("type")))
+
+        # if hasattr(tile, "links"):
+        #     for link_id in tile.links:
+        #         if link_id not in self.tiles:
+        #             errors.append(f"Tile {tile_name} ({tile_id}) links to nonexistent tile {link_id}")
+
+        if hasattr(tile, "resolved_links"):
+            for resolved in tile.resolved_links:
+                resolved_name = "MISSING NAME"
+                if hasattr(resolved, "name"):
+                    resolved_name = resolved.name
+                if hasattr(resolved, "id"):
+                    if resolved.id not in tiles:
+                        errors.append(Issue.error("link.resolved_missing_target", "Tile {} ({}) has resolved link to nonexistent tile {} ({})", tile_name, tile_id, resolved_name, resolved.id, tile_ids=(tile_id_key, resolved.id)))
+
+        #Check that all links IDs are in resolved_links IDs
+        if hasattr(tile, "links") and hasattr(tile, "resolved_links"):
+            resolved_ids = set()
+            for resolved in tile.resolved_links:
+                if hasattr(resolved, "id"):
+                    resolved_ids.add(resolved.id)
+
+            #for link_id in tile.links:
+            for link in tile.links:
+                if "target" in link and link["target"] not in resolved_ids:
+                #if link_id not in resolved_ids:
+                    errors.append(Issue.error("link.unresolved", "Tile {} ({}) has unresolved link {}", tile_name, tile_id, link.get('target', 'unknown'), tile_ids=(tile_id_key, link["target"]), link_type=link.get("type")))
+
+        #Check that all resolved_links IDs are in links IDs
+        if hasattr(tile, "links") and hasattr(tile, "resolved_links"):
+            #plot_id_set = set(tile.links)
+            plot_id_set = set([link.get("target") for link in tile.links])
+
+            for resolved in tile.resolved_links:
+                resolved_name = "MISSING NAME"
+                if hasattr(resolved, "name"):
+                    resolved_name = resolved.name
+                if hasattr(resolved, "id"):
+                    if resolved.id not in plot_id_set:
+                        errors.append(Issue.error("link.extra_resolved", "Tile {} ({}) has extra resolved link {} ({}) not in links", tile_name, tile_id, resolved_name, resolved.id, tile_ids=(tile_id_key, resolved.id)))
+
+        #---TILE SPECIFIC CHECKING---
+
+        #PlotMap checking
+        if isinstance(tile, PlotMap):
+            if not hasattr(tile, "plot_points"):
+                errors.append(Issue.error("tile.missing_attribute", "PlotMap {} ({}) missing 'plot_points' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            else:
+                for plot_tile_id in tile.plot_points:
+                    if plot_tile_id not in tiles:
+                        errors.append(Issue.error("plotmap.missing_plot_point", "PlotMap {} ({}) has unknown plot point {}", tile_name, tile_id, plot_tile_id, tile_ids=(tile_id_key, plot_tile_id), link_type="plot point"))
+                    elif backlinks is not None:
+                        backlinks.append((len(errors), plot_tile_id, tile.id, tile_name, tile_id)) #Parallel check: checked when shards are merged
+                    else:
+                        error = Project._check_backlink(tiles, plot_tile_id, tile.id, tile_name, tile_id)
+                        if error:
+                            errors.append(error)
+            #Check resolved plot points
+            if not hasattr(tile, "resolved_plot_points"):
+                errors.append(Issue.error("tile.missing_attribute", "PlotMap {} ({}) missing 'resolved_plot_points' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            else:
+                for resolved in tile.resolved_plot_points:
+                    resolved_name = "MISSING NAME"
+                    if hasattr(resolved, "name"):
+                        resolved_name = resolved.name
+                    if hasattr(resolved, "id"):
+                        if resolved.id not in tiles:
+                            errors.append(Issue.error("plotmap.resolved_missing_plot_point", "PlotMap {} ({}) has resolved plot point to unknown tile {} ({})", tile_name, tile_id, resolved_name, resolved.id, tile_ids=(tile_id_key, resolved.id)))
+
+            #Check that all plot point IDs are in resolved_plot_points IDs
+            if hasattr(tile, "plot_points") and hasattr(tile, "resolved_plot_points"):
+                resolved_ids = set()
+                for resolved in tile.resolved_plot_points:
+                    if hasattr(resolved, "id"):
+                        resolved_ids.add(resolved.id)
+
+                for plot_id in tile.plot_points:
+                    if plot_id not in resolved_ids:
+                        errors.append(Issue.error("plotmap.unresolved_plot_point", "PlotMap {} ({}) has unresolved plot point {}", tile_name, tile_id, plot_id, tile_ids=(tile_id_key, plot_id)))
+
+            #Check that all resolved_plot_points IDs are in plot_points IDs
+            if hasattr(tile, "plot_points") and hasattr(tile, "resolved_plot_points"):
+                plot_id_set = set(tile.plot_points)
+
+                for resolved in tile.resolved_plot_points:
+                    resolved_name = "MISSING NAME"
+                    if hasattr(resolved, "name"):
+                        resolved_name = resolved.name
+                    if hasattr(resolved, "id"):
+                        if resolved.id not in plot_id_set:
+                            errors.append(Issue.error("plotmap.extra_resolved_plot_point", "PlotMap {} ({}) has extra resolved plot point {} ({}) not in plot_points", tile_name, tile_id, resolved_name, resolved.id, tile_ids=(tile_id_key, resolved.id)))
+
+        #PlotTile checking
+        if isinstance(tile, PlotTile):
+            #timeline_index checking
+            if not hasattr(tile, "timeline_index"):
+                errors.append(Issue.error("tile.missing_attribute", "PlotTile {} ({}) missing 'timeline_index' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            else:
+                if tile.timeline_index is not None:
+                    if not isinstance(tile.timeline_index, int):
+                        errors.append(Issue.error("plottile.bad_timeline_index", "PlotTile {} ({}) timeline_index is not an int", tile_name, tile_id, tile_ids=(tile_id_key,)))
+                    elif tile.timeline_index < 0:
+                        errors.append(Issue.error("plottile.bad_timeline_index", "PlotTile {} ({}) timeline_index is negative", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            #Extra data checking    
+            if not hasattr(tile, "description"):
+                warnings.append(Issue.warning("tile.missing_attribute", "PlotTile {} ({}) missing 'description' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "date"):
+                warnings.append(Issue.warning("tile.missing_attribute", "PlotTile {} ({}) missing 'date' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "location"):
+                warnings.append(Issue.warning("tile.missing_attribute", "PlotTile {} ({}) missing 'location' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+
+        #CharacterTile checking
+        if isinstance(tile, CharacterTile):
+            if not hasattr(tile, "description"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'description' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "title"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'title' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "backstory"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'backstory' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "traits"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'traits' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "race"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'race' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "age"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'age' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "gender"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'gender' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "occupation"):
+                warnings.append(Issue.warning("tile.missing_attribute", "CharacterTile {} ({}) missing 'occupation' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+
+        #SettingTile checking
+        if isinstance(tile, SettingTile):
+            if not hasattr(tile, "description"):
+                warnings.append(Issue.warning("tile.missing_attribute", "SettingTile {} ({}) missing 'description' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+            if not hasattr(tile, "history"):
+                warnings.append(Issue.warning("tile.missing_attribute", "SettingTile {} ({}) missing 'history' attribute", tile_name, tile_id, tile_ids=(tile_id_key,)))
+
+        #---TILE SPECIFIC CHECKING DONE---
+
+        return errors, warnings
+    
+    #Checks logical links of plot points for a PlotMap. Returns a list of error strs (or Issues.Issue records if structured)
+    #If transitive, also reports plot points ordered by a chain of logical links that the timeline contradicts
+    def validate_plotmap(self, plotmap_id, transitive=False, structured=False):
+        return validate_plotmaps(self, [plotmap_id], transitive, structured)[plotmap_id]
+
+    #Checks logical links of plot points for every PlotMap in one pass. Returns {"PlotMap ID": [errors]}
+    def validate_all_plotmaps(self, transitive=False, structured=False):
+        return validate_plotmaps(self, transitive=transitive, structured=structured)
+
+    #Returns pairs of PlotMaps that order their shared PlotTiles differently, with the inversion count and up to limit example pairs
+    #See Validation.find_plotmap_order_conflicts
+    def find_plotmap_order_conflicts(self, plotmap_ids=None, limit=10):
+        return find_plotmap_order_conflicts(self, plotmap_ids, limit)
+
+    #Returns error messages for characters appearing before the PlotTile tagged "introduction" that involves them
+    def validate_characters(self, character_ids=None):
+        return self.characters.continuity_errors(character_ids)
+
+    #Returns up to limit pairs of characters that appear together in at least min_shared PlotTiles (of plotmap_id only, if given) but are not linked
+    #Each is {"characters": (ID, ID), "shared": count, "ratio": shared / appearances of the rarer character}, most shared first
+    def suggest_character_links(self, limit=10, min_shared=2, plotmap_id=None):
+        return self.coappearances.suggestions(limit, min_shared, plotmap_id)
+
+    #Returns inversion count, flashback suggestions and displacement of a PlotMap's story order vs its timeline. See Analytics.plotmap_nonlinearity
+    def plotmap_nonlinearity(self, plotmap_id):
+        return plotmap_nonlinearity(self, plotmap_id)
+
+    #Registers a Rules.Rule for this project. Raises ValueError if a rule with the same code is already registered
+    def add_rule(self, rule):
+        self.rules.add(rule)
+
+    #Unregisters the rule with this code. Raises ValueError if there is none
+    def remove_rule(self, code):
+        self.rules.remove(code)
+
+    #Runs every registered rule in a single pass over the Tiles (or only tile_ids) and their links. Returns an Issues.IssueReport
+    def run_rules(self, tile_ids=None):
+        return self.rules.run(self, tile_ids)
+
+    #Returns a frozenset of Tile IDs reached from tile_id by following links of link_types (None = all), within max_depth hops if given
+    #Ex: project.descendants(event.id, ["causes", "enables"]) is everything the event ultimately causes or enables
+    def descendants(self, tile_id, link_types=None, max_depth=None):
+        return self.link_graph.descendants(tile_id, link_types, max_depth)
+
+    #Returns a frozenset of Tile IDs that reach tile_id by following links of link_types (None = all), within max_depth hops if given
+    def ancestors(self, tile_id, link_types=None, max_depth=None):
+        return self.link_graph.ancestors(tile_id, link_types, max_depth)
+
+    #Returns the fewest links connecting source_id to target_id as {"source", "target", "type"} dicts, or None if not connected
+    #Links are walked in either direction unless directed
+    def shortest_path(self, source_id, target_id, link_types=None, directed=False):
+        return self.link_graph.shortest_path(source_id, target_id, link_types, directed)
+
+    #Returns {"Tile ID": hops} for Tiles within hops of tile_ids following links "out", "in" or "both" ways
+    def neighbourhood(self, tile_ids, hops=1, link_types=None, direction="both"):
+        return self.link_graph.neighbourhood(tile_ids, hops, link_types, direction)
+
+    #Returns a Views.ProjectView of the Tiles within depth hops of seed_ids (and the plot points of seed PlotMaps) and the links among them
+    #Ex: project.extract_view(chapter.id, depth=2, link_types=["involves", "causes"]) for a focused view of one chapter
+    def extract_view(self, seed_ids, depth=1, link_types=None, direction="both", include_plot_points=True):
+        return ProjectView(self, seed_ids, depth, link_types, direction, include_plot_points)
+
+    #Returns groups of linked Tiles (link direction ignored) with at least min_size Tiles, largest first, as lists of Tile IDs
+    def find_story_clusters(self, min_size=1):
+        return sorted(self.components.components(min_size).values(), key=len, reverse=True)
+
+    #Returns the story clusters not tied to the largest one (ex: a subplot nothing else links to). Single Tiles are left to find_orphans
+    def find_story_fragments(self, min_size=2):
+        clusters = self.find_story_clusters()
+        return [cluster for cluster in clusters[1:] if len(cluster) >= min_size]
+
+    #Returns True if a chain of links (in any direction) connects the two Tiles
+    def are_connected(self, first_id, second_id):
+        return self.components.connected(first_id, second_id)
+
+    #Returns True if the logical links (directly or through a chain) force before_id to happen before after_id
+    def must_precede(self, before_id, after_id):
+        return self.get_index("reachability", ReachabilityIndex).must_precede(before_id, after_id)
     
     #Prints or exports the project graph. Simple text-based graph visualization. If export, keys are tile IDs, values are info dicts
     def visualize_graph(self, export=False):
@@ -870,6 +1125,70 @@ class Project:
 
         return graph_str
     
+    #Returns the cycle of Tile IDs (each happening before the next, ending where it starts) that adding this logical link would create, or None
+    def find_logic_cycle(self, source_id, target_id, link_type):
+        before, after = precedence_edge(source_id, target_id, link_type)
+        return self.get_index("topological_order", TopologicalOrderIndex).find_cycle(before, after)
+
+    #Returns one cycle of Tile IDs for every group of PlotTiles whose logical links already contradict each other
+    def find_logic_cycles(self):
+        return self.get_index("topological_order", TopologicalOrderIndex).find_cycles()
+
+    #Assigns every PlotTile a timeline_index that satisfies all logical links, keeping the current order where possible
+    #Returns {"order", "changed", "conflicts"}. If conflicts (cycles of links) are found nothing is written. See Causality.solve_timeline
+    #gap spaces the written indices out (ex: gap=1024) so insert_event can place new events between them without renumbering
+    def solve_timeline(self, write=True, start=0, gap=1):
+        return solve_timeline(self, write, start, gap)
+
+    #Places a PlotTile on the timeline between after and before (PlotTiles, either may be None) without renumbering later events
+    #Returns the list of PlotTiles whose timeline_index changed. See Timeline.insert_event
+    def insert_event(self, tile, after=None, before=None):
+        return insert_event(self, tile, after, before)
+
+    #Returns {"PlotTile ID": rank} where rank is the dense 0, 1, 2... position of each placed PlotTile on the timeline
+    def dense_timeline_indexes(self, start=0):
+        return dense_timeline_indexes(self, start)
+
+    #Rewrites timeline_index values as rank * gap. gap=1 compacts to dense indices. Returns the list of changed PlotTiles
+    def respace_timeline(self, gap=timeline_gap, start=0):
+        return respace_timeline(self, gap, start)
+
+    #Returns the named index, building it on first use. Built indexes are updated on every link and registry change
+    def get_index(self, name, index_class):
+        index = self.indexes.get(name)
+        if index is None:
+            index = index_class(self)
+            self.indexes[name] = index
+        return index
+
+    #Drops all built indexes so they are rebuilt on next use. Needed after editing tile.links or the registry directly
+    def reset_indexes(self):
+        self.indexes = {}
+
+    #Tells the indexes a Tile was edited outside the Project/Tile methods (ex: tile.name set directly) so cached checks are redone
+    def mark_changed(self, tile):
+        self._notify("tile_changed", tile)
+
+    #Reads the files of Tiles left as stubs by a partial load (tile_ids, or all of them if None). Each stub becomes the full Tile in place
+    #Summary fields edited on the stub (name, links, plot points, timeline_index) keep their edits. Reading a field a stub lacks calls this
+    #Ex: project.hydrate(project.neighbourhood(plotmap.id, hops=2)) widens the loaded area around a PlotMap
+    def hydrate(self, tile_ids=None):
+        tile_ids = list(self.unloaded) if tile_ids is None else [tile_id for tile_id in tile_ids if tile_id in self.unloaded]
+        for tile_id in tile_ids:
+            path, _ = self.unloaded[tile_id]
+            loaded = Tile.load(path)
+            stub = self.tiles[tile_id]
+            for attribute, value in loaded.__dict__.items():
+                stub.__dict__.setdefault(attribute, value)
+            stub.__class__ = type(loaded)
+            del self.unloaded[tile_id]
+            self.mark_changed(stub) #Indexes and cached checks see its full fields
+
+    #Forwards a change event ("link_added", "tile_removed", etc.) to every built index
+    def _notify(self, event, *args):
+        for index in self.indexes.values():
+            getattr(index, event)(*args)
+
     #Private method to create unique ID for a Tile
     def _generate_unique_id(self, tile_type):
         prefix = prefix_map.get(tile_type, "unknown") # Selects prefix based on Tile type, default to "unknown" if type not found
@@ -0,0 +1,191 @@
+from Tiles import PlotTile, logic_link_types
+from Issues import Issue, IssueReport
+from Timeline import ChronologyIndex
+from Validation import check_logic_link
+
+#Base class for validation rules. A rule declares what it inspects and overrides the hooks it needs:
+#check_tile(context, tile) for every Tile of tile_types, check_link(context, tile, link, target) for every link of link_types
+#from a Tile of tile_types to a Tile of target_types (None = any type), and check_new_link(project, tile, target, link_type),
+#which runs in Tile.add_link before a link of link_types is created and raises ValueError to refuse it
+#Hooks return an iterable of Issues (the issue() helper fills in the rule's code and severity)
+#Links to Tiles missing from the project reach check_link (with target None) only if the rule sets missing_targets
+class Rule:
+    code = "rule"
+    severity = "error"
+    tile_types = None #Tile types inspected. None = all
+    link_types = () #Link types inspected by check_link and check_new_link
+    target_types = None #Link target Tile types inspected. None = all
+    missing_targets = False #True = check_link also sees links whose target is not in the project
+
+    def check_tile(self, context, tile):
+        return ()
+
+    def check_link(self, context, tile, link, target):
+        return ()
+
+    def check_new_link(self, project, tile, target, link_type):
+        pass
+
+    def issue(self, template, *args, tile_ids=(), link_type=None):
+        return Issue(self.code, self.severity, template, args, tile_ids, link_type)
+
+    def _overrides(self, hook):
+        return getattr(type(self), hook) is not getattr(Rule, hook)
+
+    def applies_to(self, tile, target=None):
+        if self.tile_types is not None and getattr(tile, "tile_type", None) not in self.tile_types:
+            return False
+        return target is None or self.target_types is None or getattr(target, "tile_type", None) in self.target_types
+
+#State shared by the rules during one traversal. Expensive lookups are built on first use
+class RuleContext:
+    def __init__(self, project):
+        self.project = project
+        self.tiles = project.tiles
+        self._timeline = None
+
+    #{"PlotTile ID": timeline_index} of placed PlotTiles
+    @property
+    def timeline(self):
+        if self._timeline is None:
+            self._timeline = self.project.get_index("chronology", ChronologyIndex).index_of
+        return self._timeline
+
+#Ordered set of rules, compiled into dispatch tables so every rule runs in a single pass over Tiles and links
+class RuleRegistry:
+    def __init__(self, rules=None):
+        self.rules = []
+        self._tile_dispatch = None
+        for rule in rules or []:
+            self.add(rule)
+
+    def add(self, rule):
+        if any(existing.code == rule.code for existing in self.rules):
+            raise ValueError(f"A rule with code {rule.code} is already registered")
+        self.rules.append(rule)
+        self._tile_dispatch = None
+
+    def remove(self, code):
+        kept = [rule for rule in self.rules if rule.code != code]
+        if len(kept) == len(self.rules):
+            raise ValueError(f"No rule with code {code} is registered")
+        self.rules = kept
+        self._tile_dispatch = None
+
+    def get(self, code):
+        return next((rule for rule in self.rules if rule.code == code), None)
+
+    def _compile(self):
+        self._tile_dispatch = {} #Tile type: rules with check_tile for it
+        self._link_dispatch = {} #(Tile type, link type): rules with check_link for it
+        self._new_link_dispatch = {} #(Tile type, link type): rules with check_new_link for it
+        self._tile_rules = [rule for rule in self.rules if rule._overrides("check_tile")]
+        self._link_rules = [rule for rule in self.rules if rule._overrides("check_link")]
+        self._new_link_rules = [rule for rule in self.rules if rule._overrides("check_new_link")]
+
+    #Rules are looked up once per (Tile type, link type) and cached, so a traversal costs one dict lookup per Tile and per link
+    def _for_tile(self, tile_type):
+        if self._tile_dispatch is None:
+            self._compile()
+        rules = self._tile_dispatch.get(tile_type)
+        if rules is None:
+            rules = [rule for rule in self._tile_rules if rule.tile_types is None or tile_type in rule.tile_types]
+            self._tile_dispatch[tile_type] = rules
+        return rules
+
+    def _for_link(self, dispatch, candidates, tile_type, link_type):
+        key = (tile_type, link_type)
+        rules = dispatch.get(key)
+        if rules is None:
+            rules = [rule for rule in candidates if link_type in rule.link_types and (rule.tile_types is None or tile_type in rule.tile_types)]
+            dispatch[key] = rules
+        return rules
+
+    #Runs every rule over the project (or only over tile_ids) in one traversal. Returns an Issues.IssueReport
+    def run(self, project, tile_ids=None):
+        if self._tile_dispatch is None:
+            self._compile()
+        context = RuleContext(project)
+        tiles = project.tiles
+        issues = []
+        for tile in (tiles.values() if tile_ids is None else (tiles[tile_id] for tile_id in tile_ids if tile_id in tiles)):
+            tile_type = getattr(tile, "tile_type", None)
+            for rule in self._for_tile(tile_type):
+                issues.extend(rule.check_tile(context, tile))
+            if not self._link_rules:
+                continue
+            for link in getattr(tile, "links", ()):
+                if not isinstance(link, dict):
+                    continue
+                rules = self._for_link(self._link_dispatch, self._link_rules, tile_type, link.get("type"))
+                if not rules:
+                    continue
+                target = tiles.get(link.get("target"))
+                for rule in rules:
+                    if target is None and not rule.missing_targets:
+                        continue
+                    if rule.applies_to(tile, target):
+                        issues.extend(rule.check_link(context, tile, link, target))
+        return IssueReport(issues)
+
+    #Called by Tile.add_link before a link is created. Raises ValueError if a rule refuses it
+    def check_new_link(self, project, tile, target, link_type):
+        if self._tile_dispatch is None:
+            self._compile()
+        for rule in self._for_link(self._new_link_dispatch, self._new_link_rules, getattr(tile, "tile_type", None), link_type):
+            rule.check_new_link(project, tile, target, link_type)
+
+#Story logic links (requires, causes, enables, blocks) order story events, so both ends must be PlotTiles
+class LogicLinkEndpointsRule(Rule):
+    code = "link.logic_endpoints"
+    link_types = logic_link_types
+
+    def check_new_link(self, project, tile, target, link_type):
+        if not isinstance(tile, PlotTile) or not isinstance(target, PlotTile):
+            raise ValueError("Story logic links (requires, causes, enables, blocks) must be between two PlotTiles because they represent story-event ordering.")
+
+    def check_link(self, context, tile, link, target):
+        if target is not None and (tile.tile_type != "PlotTile" or target.tile_type != "PlotTile"):
+            yield self.issue("{} {} {}, but story logic links must be between two PlotTiles", tile.name, link["type"], target.name,
+                             tile_ids=(tile.id, target.id), link_type=link["type"])
+
+#Story logic links must not close a cycle of events that can never happen in order
+class LogicCycleRule(Rule):
+    code = "link.logic_cycle"
+    link_types = logic_link_types
+    tile_types = {"PlotTile"}
+
+    def check_new_link(self, project, tile, target, link_type):
+        if tile.project is not project:
+            return #The project's indexes only know its own Tiles
+        cycle = project.find_logic_cycle(tile.id, target.id, link_type)
+        if cycle:
+            cycle_names = " -> ".join(project.tiles[tile_id].name for tile_id in cycle)
+            raise ValueError(f"Cannot add {link_type} link: it would create a cycle of story events that can never happen in order ({cycle_names})")
+
+#Story logic links between placed PlotTiles must agree with their timeline_index values
+class LogicOrderRule(Rule):
+    code = "plotmap.logic_order"
+    link_types = logic_link_types
+    tile_types = {"PlotTile"}
+    target_types = {"PlotTile"}
+
+    def check_link(self, context, tile, link, target):
+        issue = check_logic_link(context.tiles, context.timeline, tile.id, target.id, link["type"])
+        if issue is not None:
+            yield issue
+
+#Involves links tie story events to characters
+class InvolvesCharacterRule(Rule):
+    code = "link.involves_target"
+    severity = "warning"
+    link_types = {"involves"}
+
+    def check_link(self, context, tile, link, target):
+        if target is not None and "CharacterTile" not in (tile.tile_type, target.tile_type):
+            yield self.issue("{} involves {}, but involves links should connect a character", tile.name, target.name,
+                             tile_ids=(tile.id, target.id), link_type="involves")
+
+#Returns the rules every new Project starts with
+def default_rules():
+    return [LogicLinkEndpointsRule(), LogicCycleRule(), LogicOrderRule(), InvolvesCharacterRule()]
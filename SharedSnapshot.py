@@ -0,0 +1,204 @@
+from multiprocessing import shared_memory
+from array import array
+import json
+from Snapshot import GraphSnapshot
+from Timeline import is_timeline_index
+from Tiles import PlotTile
+
+#Read-only copy of a project in one shared memory block, for worker processes that analyse a project without loading its folder
+#The Project stays the source of truth: publish copies its graph snapshot (see Snapshot.GraphSnapshot), Tile IDs, names, types,
+#timeline_index values and PlotMap plot points into flat arrays, and workers attach by name and read them in place (no copy, no parsing)
+#Block layout: 8 byte header size, JSON header (type names, project metadata, section positions), then the arrays, each 8 byte aligned
+
+unplaced = -2 ** 63 #Stored timeline_index of Tiles that are not placed on the timeline
+
+#Array sections in layout order: name: array type code
+sections = {
+    "tile_codes": "h", #Row: Tile type code, -1 for link targets missing from the project (as in GraphSnapshot)
+    "offsets": "q", #CSR links, as in GraphSnapshot
+    "targets": "i",
+    "link_codes": "H",
+    "timeline": "q", #Row: timeline_index, or unplaced
+    "point_offsets": "q", #Row: start of its plot points in point_rows (PlotMaps only, others are empty)
+    "point_rows": "i", #Rows of plot points, in PlotMap order. Plot points missing from the project are left out
+    "id_offsets": "q", #Row: start of its UTF-8 ID in id_bytes
+    "id_bytes": "B",
+    "name_offsets": "q", #Row: start of its UTF-8 name in name_bytes
+    "name_bytes": "B",
+}
+
+def _pack_strings(values):
+    offsets = array("q", [0])
+    data = bytearray()
+    for value in values:
+        data += value.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, array("B", data)
+
+#Copies project into a new shared memory block (named name, or a generated name). Returns the publishing SharedProject
+#The publisher must close() and unlink() it once workers are done (or use it in a with block)
+def publish(project, name=None):
+    snapshot = project.graph_snapshot()
+    tiles = project.tiles
+    timeline = array("q")
+    point_offsets = array("q", [0])
+    point_rows = array("i")
+    names = []
+    for tile_id in snapshot.ids:
+        tile = tiles.get(tile_id)
+        names.append(getattr(tile, "name", "") or "")
+        timeline_index = tile.timeline_index if isinstance(tile, PlotTile) else None #Other Tiles have none (and stubs would load their files)
+        timeline.append(timeline_index if is_timeline_index(timeline_index) else unplaced)
+        if getattr(tile, "tile_type", None) == "PlotMap":
+            point_rows.extend(snapshot.index[plot_id] for plot_id in tile.plot_points if plot_id in snapshot.index and plot_id in tiles)
+        point_offsets.append(len(point_rows))
+    id_offsets, id_bytes = _pack_strings(snapshot.ids)
+    name_offsets, name_bytes = _pack_strings(names)
+    arrays = {"tile_codes": snapshot.tile_codes, "offsets": snapshot.offsets, "targets": snapshot.targets, "link_codes": snapshot.link_codes,
+              "timeline": timeline, "point_offsets": point_offsets, "point_rows": point_rows,
+              "id_offsets": id_offsets, "id_bytes": id_bytes, "name_offsets": name_offsets, "name_bytes": name_bytes}
+
+    header = {"tile_types": snapshot.tile_types, "link_types": snapshot.link_types,
+              "project": {"project_id": project.project_id, "project_name": project.project_name, "version": project.version},
+              "sections": {}}
+    position = 0 #Sections are placed after the header, at positions counted from the first 8 byte boundary after it
+    for section in sections:
+        values = arrays[section]
+        header["sections"][section] = [position, len(values)]
+        position = _align(position + len(values) * values.itemsize)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(8 + len(header_bytes))
+
+    memory = shared_memory.SharedMemory(name=name, create=True, size=data_start + max(position, 8))
+    try:
+        memory.buf[:8] = len(header_bytes).to_bytes(8, "little")
+        memory.buf[8:8 + len(header_bytes)] = header_bytes
+        for section, (start, count) in header["sections"].items():
+            data = arrays[section].tobytes()
+            memory.buf[data_start + start:data_start + start + len(data)] = data
+    except Exception:
+        memory.close()
+        memory.unlink()
+        raise
+    return SharedProject(memory, owner=True)
+
+#Attaches to a block published under name (ex: in a worker process). Returns a read-only SharedProject; close() it when done
+def attach(name):
+    try:
+        memory = shared_memory.SharedMemory(name=name, track=False) #Python 3.13+: the publisher alone removes the block
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+    return SharedProject(memory, owner=False)
+
+#Worker process helper for batch analytics: attaches to the block published under name and returns plain data, safe to send back
+#to the parent: project metadata, orphaned Tile IDs, the number of linked groups, "Tile ID": type, the descendants of each of tile_ids,
+#and [(ID, name, timeline_index)] of the plot points of each of plotmap_ids. Pass it to a process pool (ex: pool.map(summarize, names))
+def summarize(name, tile_ids=(), plotmap_ids=()):
+    shared = attach(name)
+    graph = None
+    try:
+        graph = shared.graph()
+        return {
+            "metadata": shared.metadata,
+            "orphans": graph.orphan_ids(),
+            "clusters": len(graph.components()),
+            "types": {shared.tile_id(row): shared.tile_type(row) for row in range(shared.size) if shared.tile_codes[row] >= 0},
+            "descendants": {tile_id: graph.descendants(tile_id) for tile_id in tile_ids},
+            "plot_points": {plotmap_id: [(shared.tile_id(row), shared.tile_name(row), shared.timeline_index(row)) for row in shared.plot_points(shared.row(plotmap_id))]
+                            for plotmap_id in plotmap_ids}
+        }
+    finally:
+        graph = None #Its arrays point into the block, so it must be dropped before close
+        shared.close()
+
+def _align(position):
+    return (position + 7) // 8 * 8
+
+#A published project, read in place from shared memory. Rows are the rows of the publisher's GraphSnapshot
+#Each array section (see sections) is an attribute holding a memoryview of the block. Views and GraphSnapshots taken from it must be
+#dropped before close(), because the block cannot be unmapped while they point into it
+class SharedProject:
+    def __init__(self, memory, owner=False):
+        self.memory = memory
+        self.owner = owner
+        header_size = int.from_bytes(memory.buf[:8], "little")
+        header = json.loads(bytes(memory.buf[8:8 + header_size]).decode("utf-8"))
+        self.tile_types = header["tile_types"]
+        self.link_types = header["link_types"]
+        self.metadata = header["project"] #project_id, project_name and version of the published Project
+        data_start = _align(8 + header_size)
+        self._views = []
+        for section, (start, count) in header["sections"].items():
+            start += data_start
+            view = memory.buf[start:start + count * array(sections[section]).itemsize].cast(sections[section])
+            self._views.append(view)
+            setattr(self, section, view)
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    @property
+    def size(self):
+        return len(self.tile_codes)
+
+    def tile_id(self, row):
+        return bytes(self.id_bytes[self.id_offsets[row]:self.id_offsets[row + 1]]).decode("utf-8")
+
+    def tile_name(self, row):
+        return bytes(self.name_bytes[self.name_offsets[row]:self.name_offsets[row + 1]]).decode("utf-8")
+
+    def tile_type(self, row):
+        code = self.tile_codes[row]
+        return self.tile_types[code] if code >= 0 else None
+
+    #Returns the timeline_index of row, or None if it is not placed
+    def timeline_index(self, row):
+        value = self.timeline[row]
+        return None if value == unplaced else value
+
+    #Returns the row of a published Tile, raising ValueError if it was not in the project. The ID lookup is decoded on first use
+    def row(self, tile_id):
+        if self._index is None:
+            self._index = {self.tile_id(row): row for row in range(self.size)}
+        row = self._index.get(tile_id)
+        if row is None or self.tile_codes[row] < 0:
+            raise ValueError(f"Tile {tile_id} not found in project")
+        return row
+
+    #Returns [(target row, link type)] for the links of row
+    def links(self, row):
+        return [(self.targets[position], self.link_types[self.link_codes[position]]) for position in range(self.offsets[row], self.offsets[row + 1])]
+
+    #Returns the rows of a PlotMap's plot points in story order
+    def plot_points(self, row):
+        return self.point_rows[self.point_offsets[row]:self.point_offsets[row + 1]].tolist()
+
+    #Returns a GraphSnapshot reading the shared link arrays in place, for its reachability, orphan and component queries
+    def graph(self):
+        ids = [self.tile_id(row) for row in range(self.size)]
+        if self._index is None:
+            self._index = {tile_id: row for row, tile_id in enumerate(ids)}
+        return GraphSnapshot(ids, self._index, self.tile_types, self.tile_codes, self.offsets, self.targets, self.link_types, self.link_codes)
+
+    #Detaches from the block. Raises BufferError if views of it are still in use
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.memory.close()
+
+    #Removes the block once every process has closed it. Only the publisher may unlink
+    def unlink(self):
+        if not self.owner:
+            raise ValueError("Only the publisher of a shared project can unlink it")
+        self.memory.unlink()
@@ -0,0 +1,280 @@
+from array import array
+from Indexes import ProjectIndex
+from Graph import directions
+
+#Immutable compressed sparse row (CSR) copy of the project's link graph, for analytics that read the whole graph from flat arrays
+#Every node is a row number. The links of row i go to rows targets[offsets[i]:offsets[i + 1]], with link type codes in link_codes[...]
+#(link_types[code] is the name). Link targets that are not in the project get rows too (tile code -1, no links), so a Tile added later
+#keeps the row its incoming links already point at. Links that are not dicts or have no target are left out
+#The arrays are never changed once built: refresh returns a new snapshot and leaves this one as it was
+class GraphSnapshot:
+    def __init__(self, ids, index, tile_types, tile_codes, offsets, targets, link_types, link_codes):
+        self.ids = ids #Row: "Tile ID"
+        self.index = index #"Tile ID": row
+        self.tile_types = tile_types #Tile type code: tile_type
+        self.tile_codes = tile_codes #array("h"). Row: Tile type code, -1 if the Tile is not in the project
+        self.offsets = offsets #array("q") of size + 1 entries
+        self.targets = targets #array("i"). Target row of every link, grouped by source row
+        self.link_types = link_types #Link type code: link type
+        self.link_codes = link_codes #array("H"). Link type code of every link, parallel to targets
+        self._reverse = None
+
+    #Builds a snapshot of every Tile in one pass over the registry
+    @classmethod
+    def from_project(cls, project):
+        empty = cls([], {}, [], array("h"), array("q", [0]), array("i"), [], array("H"))
+        return empty.refresh(project, project.tiles)
+
+    @property
+    def size(self):
+        return len(self.ids)
+
+    @property
+    def link_count(self):
+        return len(self.targets)
+
+    #Returns a new snapshot with the rows of tile_ids read again from the project (Tiles no longer in it lose their links)
+    #Unchanged rows are copied over as array slices, so the cost is one pass over the changed Tiles' links plus a copy of the arrays
+    def refresh(self, project, tile_ids):
+        ids = list(self.ids)
+        index = dict(self.index)
+        tile_codes = array("h", self.tile_codes)
+        tile_types = list(self.tile_types)
+        tile_type_codes = {tile_type: code for code, tile_type in enumerate(tile_types)}
+        link_types = list(self.link_types)
+        link_type_codes = {link_type: code for code, link_type in enumerate(link_types)}
+
+        def row_of(tile_id):
+            row = index.get(tile_id)
+            if row is None:
+                row = index[tile_id] = len(ids)
+                ids.append(tile_id)
+                tile_codes.append(-1)
+            return row
+
+        def code_of(codes, names, name):
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(names)
+                names.append(name)
+            return code
+
+        rows = {} #Row: (target rows, link type codes) read from the project
+        for tile_id in tile_ids:
+            row = row_of(tile_id)
+            tile = project.tiles.get(tile_id)
+            row_targets = array("i")
+            row_codes = array("H")
+            if tile is None:
+                tile_codes[row] = -1
+            else:
+                tile_codes[row] = code_of(tile_type_codes, tile_types, tile.tile_type)
+                for link in getattr(tile, "links", ()):
+                    if isinstance(link, dict) and link.get("target") is not None:
+                        row_targets.append(row_of(link["target"]))
+                        row_codes.append(code_of(link_type_codes, link_types, link.get("type")))
+            rows[row] = (row_targets, row_codes)
+
+        old_size = self.size
+        offsets = array("q", [0])
+        targets = array("i")
+        link_codes = array("H")
+        position = 0 #Next row to write
+        for row in sorted(rows) + [len(ids)]:
+            end_row = min(row, old_size)
+            if position < end_row: #Unchanged rows, copied from this snapshot
+                start, end = self.offsets[position], self.offsets[end_row]
+                shift = len(targets) - start
+                targets.extend(self.targets[start:end])
+                link_codes.extend(self.link_codes[start:end])
+                moved = self.offsets[position + 1:end_row + 1]
+                offsets.extend(moved if not shift else array("q", [offset + shift for offset in moved]))
+                position = end_row
+            if position < row: #New rows for missing link targets
+                offsets.extend([len(targets)] * (row - position))
+                position = row
+            if row < len(ids):
+                row_targets, row_codes = rows[row]
+                targets.extend(row_targets)
+                link_codes.extend(row_codes)
+                offsets.append(len(targets))
+                position = row + 1
+        return GraphSnapshot(ids, index, tile_types, tile_codes, offsets, targets, link_types, link_codes)
+
+    #Returns the row of a Tile in the project, raising ValueError if it is not in it
+    def row(self, tile_id):
+        row = self.index.get(tile_id)
+        if row is None or self.tile_codes[row] < 0:
+            raise ValueError(f"Tile {tile_id} not found in project")
+        return row
+
+    def tile_type(self, row):
+        code = self.tile_codes[row]
+        return self.tile_types[code] if code >= 0 else None
+
+    #Returns the set of link type codes for link_types (None = every type). Accepts a single link type str
+    def _codes(self, link_types):
+        if link_types is None:
+            return None
+        if isinstance(link_types, str):
+            link_types = (link_types,)
+        return {code for code, link_type in enumerate(self.link_types) if link_type in link_types}
+
+    #Returns the snapshot with every link reversed (row i holds the links pointing at Tile ids[i]). Built once on first use
+    def reverse(self):
+        if self._reverse is None:
+            size = self.size
+            counts = [0] * (size + 1)
+            for target in self.targets:
+                counts[target + 1] += 1
+            for row in range(size):
+                counts[row + 1] += counts[row]
+            offsets = array("q", counts)
+            slots = counts[:size] #Next free slot of each reversed row
+            targets = array("i", [0]) * len(self.targets)
+            link_codes = array("H", [0]) * len(self.targets)
+            source_offsets = self.offsets
+            for source in range(size):
+                for position in range(source_offsets[source], source_offsets[source + 1]):
+                    target = self.targets[position]
+                    slot = slots[target]
+                    targets[slot] = source
+                    link_codes[slot] = self.link_codes[position]
+                    slots[target] = slot + 1
+            self._reverse = GraphSnapshot(self.ids, self.index, self.tile_types, self.tile_codes, offsets, targets, self.link_types, link_codes)
+            self._reverse._reverse = self
+        return self._reverse
+
+    #Returns the rows linked from row by links of the given type codes (None = every type)
+    def _linked(self, row, codes):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        if codes is None:
+            return self.targets[start:end]
+        link_codes = self.link_codes
+        return [self.targets[position] for position in range(start, end) if link_codes[position] in codes]
+
+    #Breadth-first search from tile_ids over links of link_types followed in direction ("out", "in" or "both")
+    #Returns {"Tile ID": hops from the nearest of tile_ids} for Tiles in the project, like Project.neighbourhood
+    def distances(self, tile_ids, link_types=None, direction="out", max_depth=None):
+        if direction not in directions:
+            raise ValueError(f"Unknown direction {direction}. Use one of {', '.join(directions)}")
+        tile_ids = [tile_ids] if isinstance(tile_ids, str) else list(tile_ids)
+        codes = self._codes(link_types)
+        graphs = [graph for graph, followed in ((self, ("out", "both")), (self.reverse() if direction != "out" else None, ("in", "both")))
+                  if direction in followed]
+        tile_codes = self.tile_codes
+        distance = {}
+        for tile_id in tile_ids:
+            distance[self.row(tile_id)] = 0
+        frontier = list(distance)
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for row in frontier:
+                for graph in graphs:
+                    for other in graph._linked(row, codes):
+                        if other not in distance and tile_codes[other] >= 0:
+                            distance[other] = depth
+                            next_frontier.append(other)
+            frontier = next_frontier
+        return {self.ids[row]: hops for row, hops in distance.items()}
+
+    #Returns a frozenset of Tile IDs reachable from tile_id by following links of link_types forwards (within max_depth hops)
+    def descendants(self, tile_id, link_types=None, max_depth=None):
+        return frozenset(self.distances(tile_id, link_types, "out", max_depth)) - {tile_id}
+
+    #Returns a frozenset of Tile IDs that reach tile_id by following links of link_types forwards (within max_depth hops)
+    def ancestors(self, tile_id, link_types=None, max_depth=None):
+        return frozenset(self.distances(tile_id, link_types, "in", max_depth)) - {tile_id}
+
+    #Returns the set of orphaned Tile IDs, counted like Project.find_orphans: incoming links from other Tiles only, every link as outgoing
+    def orphan_ids(self, check_incoming=True, check_outgoing=True, require_both=False):
+        size = self.size
+        offsets = self.offsets
+        linked = bytearray(size) #Row: 1 if another Tile links to it
+        for row in range(size):
+            for position in range(offsets[row], offsets[row + 1]):
+                if self.targets[position] != row:
+                    linked[self.targets[position]] = 1
+        orphans = set()
+        for row in range(size):
+            if self.tile_codes[row] < 0:
+                continue
+            no_incoming = check_incoming and not linked[row]
+            no_outgoing = check_outgoing and offsets[row] == offsets[row + 1]
+            if (no_incoming and no_outgoing) if require_both else (no_incoming or no_outgoing):
+                orphans.add(self.ids[row])
+        return orphans
+
+    #Returns groups of linked Tiles (link direction ignored) with at least min_size Tiles, largest first, as lists of Tile IDs
+    #Union-find over the arrays, like Project.find_story_clusters. Links to missing Tiles join nothing
+    def components(self, min_size=1):
+        size = self.size
+        parent = list(range(size))
+
+        def find(row):
+            root = row
+            while parent[root] != root:
+                root = parent[root]
+            while parent[row] != root:
+                parent[row], row = root, parent[row]
+            return root
+
+        tile_codes = self.tile_codes
+        offsets = self.offsets
+        for row in range(size):
+            for position in range(offsets[row], offsets[row + 1]):
+                target = self.targets[position]
+                if tile_codes[target] >= 0:
+                    first, second = find(row), find(target)
+                    if first != second:
+                        parent[second] = first
+        groups = {}
+        for row in range(size):
+            if tile_codes[row] >= 0:
+                groups.setdefault(find(row), []).append(self.ids[row])
+        return sorted((group for group in groups.values() if len(group) >= min_size), key=len, reverse=True)
+
+    #Returns [("source ID", "missing target ID", link type)] for every link to a Tile that is not in the project
+    def dangling_links(self):
+        tile_codes = self.tile_codes
+        dangling = []
+        for row in range(self.size):
+            for position in range(self.offsets[row], self.offsets[row + 1]):
+                target = self.targets[position]
+                if tile_codes[target] < 0:
+                    dangling.append((self.ids[row], self.ids[target], self.link_types[self.link_codes[position]]))
+        return dangling
+
+#Keeps a GraphSnapshot of the project up to date for Project.graph_snapshot: hooks record which Tiles changed, and the next request
+#refreshes only their rows. The snapshot is rebuilt from scratch once rows of removed Tiles outnumber the Tiles still in the project
+class SnapshotIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.snapshot = GraphSnapshot.from_project(project)
+        self.changed = set() #"Tile ID"s whose rows are out of date
+
+    def link_added(self, tile, link):
+        self.changed.add(tile.id)
+
+    def link_removed(self, tile, link):
+        self.changed.add(tile.id)
+
+    def tile_added(self, tile):
+        self.changed.add(tile.id)
+
+    def tile_removed(self, tile):
+        self.changed.add(tile.id)
+
+    def tile_changed(self, tile):
+        self.changed.add(tile.id)
+
+    def current(self):
+        if self.changed:
+            snapshot = self.snapshot.refresh(self.project, self.changed)
+            if snapshot.size > 2 * len(self.project.tiles) + 64: #Mostly rows of removed Tiles and missing targets
+                snapshot = GraphSnapshot.from_project(self.project)
+            self.snapshot = snapshot
+            self.changed = set()
+        return self.snapshot
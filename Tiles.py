@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from Dates import parse_date
 
 # Mapping of Tile types to their respective prefixes for ID generation
 prefix_map = {
@@ -9,6 +10,9 @@ prefix_map = {
     "SettingTile": "st"
 }
 
+#Link types that express story-event ordering. Only valid between two PlotTiles
+logic_link_types = {"requires", "causes", "enables", "blocks"}
+
 class Tile:
     default_directories = {
         "PlotMap": "Tiles/PlotMaps",
@@ -24,6 +28,7 @@ class Tile:
         self.links = links if links is not None else [] # Prevent shared mutable default argument. List of linked tile IDs
         self.resolved_links = [] #List of Tile objects whose IDs make up self.links
         self.tags = set()
+        self.project = None #Project whose registry holds this Tile. Set by Project.add_tile so link changes can update the project's indexes
 
     def toDict(self):
         #Convert the Tile object to a dictionary for JSON serialization
@@ -110,16 +115,18 @@ class Tile:
             
         target_tile = project.tiles[target_id]
             
-        if link_type in {"requires", "causes", "enables", "blocks"}:
-            if not isinstance(self, PlotTile) or not isinstance(target_tile, PlotTile):
-                raise ValueError("Story logic links (requires, causes, enables, blocks) must be between two PlotTiles because they represent story-event ordering.")
+        project.rules.check_new_link(project, self, target_tile, link_type) #Link-type rules (ex: logical links only between PlotTiles). See Rules.py
             
-        self.links.append({"target": target_id, "type": link_type})
+        link = {"target": target_id, "type": link_type}
+        self.links.append(link)
         
         #Updated resolved links
         if target_tile not in self.resolved_links:
             self.resolved_links.append(target_tile)
 
+        if self.project is project: #Keeps project indexes in sync
+            project._notify("link_added", self, link)
+
         # if target_id not in self.links:
         #     self.links.append(target_id)
         #     target_tile = project.tiles[target_id]
@@ -130,10 +137,14 @@ class Tile:
 
     #Remove a link from this Tile (not bidirectional). Updates resolved_links. If link_type not provided, removes all link instances
     def remove_link(self, target_id, link_type=None):
-        self.links = [
-            link for link in self.links
-            if not (link["target"] == target_id and (link_type is None or link.get("type") == link_type))
-        ]
+        removed = []
+        kept = []
+        for link in self.links:
+            if link["target"] == target_id and (link_type is None or link.get("type") == link_type):
+                removed.append(link)
+            else:
+                kept.append(link)
+        self.links = kept
 
         #Only remove resolved tile if no remaining links point to it
         still_linked = any(link["target"] == target_id for link in self.links)
@@ -143,6 +154,10 @@ class Tile:
                 if tile.id != target_id
             ]
 
+        if self.project is not None: #Keeps project indexes in sync
+            for link in removed:
+                self.project._notify("link_removed", self, link)
+
         # if target_id in self.links:
         #     self.links.remove(target_id)
         #     self.resolved_links = [tile for tile in self.resolved_links if tile.id != target_id] #Filters resolved_links to remove Tile with target_id
@@ -242,6 +257,8 @@ class PlotMap(Tile):
         #Update both plot_points and resolved_plot_points
         self.plot_points.insert(index, plot_tile.id)
         self.resolved_plot_points.insert(index, plot_tile)
+        if self.project is not None:
+            self.project._notify("plot_points_changed", self)
         
     #Remove a PlotTile from plot_points. Also bidirectionally unlinks the PlotMap and PlotTile.
     def remove_plot_point(self, plot_tile):
@@ -258,6 +275,8 @@ class PlotMap(Tile):
 
         self.plot_points.pop(index) #Removes PlotTile ID from plot_points list
         self.resolved_plot_points.pop(index) #Removes PlotTile object from the resolved_plot_points
+        if self.project is not None:
+            self.project._notify("plot_points_changed", self)
 
     #Move a plot_point by changing the plot_point at the old_index to the new_index
     def move_plot_point(self, old_index, new_index):
@@ -275,6 +294,8 @@ class PlotMap(Tile):
         #Move resolved PlotTile object
         plot_tile = self.resolved_plot_points.pop(old_index)
         self.resolved_plot_points.insert(new_index, plot_tile)
+        if self.project is not None:
+            self.project._notify("plot_points_changed", self)
 
 class PlotTile(Tile):
     def __init__(self, name, id=None, links=None, description="", date="", location="", timeline_index=None, **kwargs):
@@ -284,6 +305,45 @@ class PlotTile(Tile):
         self.location = location
         self.timeline_index = timeline_index #Chronological order of this event in the Project world (not same as plot order). None = unplaced on timeline
 
+    @property
+    def timeline_index(self):
+        return self._timeline_index
+
+    #Setting timeline_index updates the project's chronology indexes
+    @timeline_index.setter
+    def timeline_index(self, value):
+        old_index = getattr(self, "_timeline_index", None)
+        self._timeline_index = value
+        if self.project is not None and old_index != value:
+            self.project._notify("timeline_changed", self, old_index)
+
+    @property
+    def date(self):
+        return self._date
+
+    #Setting date clears the cached date_key and updates the project's date index
+    @date.setter
+    def date(self, value):
+        old_date = getattr(self, "_date", None)
+        self._date = value
+        self.clear_date_key()
+        if self.project is not None and old_date != value:
+            self.project._notify("date_changed", self)
+
+    #Forgets the cached date_key so it is parsed again (ex: after the project's calendars change)
+    def clear_date_key(self):
+        self._date_key = None
+        self._date_key_parsed = False
+
+    #Sortable (absolute year, month, day) key parsed from date with the project's calendars. None if date can't be parsed. Cached until date changes
+    @property
+    def date_key(self):
+        if not self._date_key_parsed:
+            calendars = self.project.calendars.values() if self.project is not None else None
+            self._date_key = parse_date(self._date, calendars)
+            self._date_key_parsed = True
+        return self._date_key
+
     def toDict(self):
         data = super().toDict()
         data.update({
@@ -341,3 +401,51 @@ Tile.type_map = {
         "CharacterTile": CharacterTile,
         "SettingTile": SettingTile
     } #Mapping of Tile types to their respective classes. Inherited by all Tile subclasses. Used in fromDict method
+
+#Stand-in for a Tile whose file was left unread by a partial Project.load (see Project.hydrate). It holds only the fields kept in the
+#manifest's adjacency summary: id, tile_type, name, links, plot_points (PlotMaps) and timeline_index (PlotTiles)
+#Reading any other field loads the Tile's file: the object becomes the full Tile in place, so references to it stay valid
+class TileStub:
+    def __getattr__(self, attribute):
+        project = self.__dict__.get("project")
+        if attribute.startswith("__") or project is None or self.__dict__.get("id") not in project.unloaded:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attribute}'")
+        project.hydrate([self.id])
+        return getattr(self, attribute)
+
+#Stubs subclass their Tile type so isinstance checks still work
+class UnloadedTile(TileStub, Tile):
+    pass
+
+class UnloadedPlotMap(TileStub, PlotMap):
+    pass
+
+class UnloadedPlotTile(TileStub, PlotTile):
+    pass
+
+class UnloadedCharacterTile(TileStub, CharacterTile):
+    pass
+
+class UnloadedSettingTile(TileStub, SettingTile):
+    pass
+
+unloaded_type_map = {
+        "PlotMap": UnloadedPlotMap,
+        "PlotTile": UnloadedPlotTile,
+        "CharacterTile": UnloadedCharacterTile,
+        "SettingTile": UnloadedSettingTile
+    } #Mapping of Tile types to their stub classes. Other types get UnloadedTile
+
+#Returns a stub Tile built from a manifest entry (see Project._save_to_folder)
+def unloaded_tile(entry):
+    stub_class = unloaded_type_map.get(entry.get("tile_type"), UnloadedTile)
+    tile = stub_class.__new__(stub_class) #No __init__: fields it would default are read from the file on demand
+    tile.__dict__.update(id=entry["id"], tile_type=entry.get("tile_type", "Unknown"), name=entry.get("name", "Unnamed Tile"),
+                         links=[dict(link) for link in entry.get("links", [])], resolved_links=[], project=None)
+    if isinstance(tile, PlotMap):
+        tile.__dict__.update(plot_points=list(entry.get("plot_points", [])), resolved_plot_points=[])
+    elif isinstance(tile, PlotTile):
+        tile.__dict__["_timeline_index"] = entry.get("timeline_index")
+        if "date" in entry:
+            tile.__dict__.update(_date=entry["date"], _date_key=None, _date_key_parsed=False)
+    return tile
@@ -0,0 +1,208 @@
+from Tiles import PlotTile
+from Indexes import ProjectIndex
+from bisect import bisect_left, bisect_right
+
+timeline_gap = 1024 #Default spacing left between timeline_index values so events can be inserted without renumbering
+relabel_density = 1.25 #Order-maintenance threshold T (between 1 and 2): an aligned range of 2^i values may hold at most (2 / T)^i events
+
+#Returns True if value is a usable timeline_index (an int, not a bool)
+def is_timeline_index(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+#Sorted index of placed PlotTiles by timeline_index. Kept up to date as timeline_index values change (bisect-backed sorted list)
+#Answers range queries, nearest neighbours and duplicate timeline_index conflicts without rescanning the registry
+class ChronologyIndex(ProjectIndex):
+    def __init__(self, project):
+        super().__init__(project)
+        self.entries = [] #Sorted list of (timeline_index, Tile ID)
+        self.keys = [] #timeline_index of each entry, for bisecting by index alone
+        self.index_of = {} #"Tile ID": timeline_index for every placed PlotTile
+        self.tiles_at = {} #timeline_index: set of Tile IDs placed there
+        self.sorted_labels = [] #Distinct timeline_index values in use, sorted (the keys of tiles_at)
+        self.conflicting = set() #timeline_index values used by more than one PlotTile
+        for tile in project.tiles.values():
+            self._add(tile)
+
+    def _add(self, tile):
+        if not isinstance(tile, PlotTile) or not is_timeline_index(tile.timeline_index):
+            return
+        index = tile.timeline_index
+        position = bisect_left(self.entries, (index, tile.id))
+        self.entries.insert(position, (index, tile.id))
+        self.keys.insert(position, index)
+        self.index_of[tile.id] = index
+        at = self.tiles_at.get(index)
+        if at is None:
+            at = self.tiles_at[index] = set()
+            self.sorted_labels.insert(bisect_left(self.sorted_labels, index), index)
+        at.add(tile.id)
+        if len(at) > 1:
+            self.conflicting.add(index)
+
+    def _remove(self, tile_id):
+        index = self.index_of.pop(tile_id, None)
+        if index is None:
+            return
+        position = bisect_left(self.entries, (index, tile_id))
+        del self.entries[position]
+        del self.keys[position]
+        at = self.tiles_at[index]
+        at.discard(tile_id)
+        if not at:
+            del self.tiles_at[index]
+            del self.sorted_labels[bisect_left(self.sorted_labels, index)]
+        if len(at) < 2:
+            self.conflicting.discard(index)
+
+    def timeline_changed(self, tile, old_index):
+        self._remove(tile.id)
+        self._add(tile)
+
+    def tile_added(self, tile):
+        self._add(tile)
+
+    def tile_removed(self, tile):
+        self._remove(tile.id)
+
+    def _tiles(self, entries):
+        return [self.project.tiles[tile_id] for _, tile_id in entries]
+
+    #Returns PlotTiles with start <= timeline_index <= end in chronological order. Either bound may be None (open)
+    def events_between(self, start=None, end=None):
+        low = 0 if start is None else bisect_left(self.keys, start)
+        high = len(self.keys) if end is None else bisect_right(self.keys, end)
+        return self._tiles(self.entries[low:high])
+
+    #Returns the PlotTiles placed exactly at index
+    def events_at(self, index):
+        return self.events_between(index, index)
+
+    #Returns the PlotTile with the largest timeline_index below index, or None
+    def previous_event(self, index):
+        position = bisect_left(self.keys, index)
+        return self.project.tiles[self.entries[position - 1][1]] if position > 0 else None
+
+    #Returns the PlotTile with the smallest timeline_index above index, or None
+    def next_event(self, index):
+        position = bisect_right(self.keys, index)
+        return self.project.tiles[self.entries[position][1]] if position < len(self.entries) else None
+
+    #Returns the PlotTile placed closest to index (earlier wins ties), or None if nothing is placed
+    def nearest_event(self, index):
+        at = self.events_at(index)
+        if at:
+            return at[0]
+        previous = self.previous_event(index)
+        following = self.next_event(index)
+        if previous is None or following is None:
+            return previous or following
+        return previous if index - previous.timeline_index <= following.timeline_index - index else following
+
+    #Returns the number of placed PlotTiles with a timeline_index below index
+    def rank(self, index):
+        return bisect_left(self.keys, index)
+
+    #Returns the distinct timeline_index values in use, sorted
+    def labels(self):
+        return list(self.sorted_labels)
+
+    #Returns {timeline_index: [Tile IDs]} for every timeline_index used by more than one PlotTile
+    def conflicts(self):
+        return {index: sorted(self.tiles_at[index]) for index in sorted(self.conflicting)}
+
+#Returns the placed PlotTile with the smallest timeline_index greater than index (or largest smaller if later=False), or None
+def neighbour_event(project, index, later=True, skip_tile=None):
+    chronology = project.get_index("chronology", ChronologyIndex)
+    best = chronology.next_event(index) if later else chronology.previous_event(index)
+    if best is skip_tile and best is not None:
+        best = chronology.next_event(best.timeline_index) if later else chronology.previous_event(best.timeline_index)
+    return best
+
+#Places tile on the timeline between two events, treating timeline_index values as order-maintenance labels
+#after/before are PlotTiles already on the timeline. With only one given, the other side is its nearest neighbour. With neither, tile goes last
+#If there is room between the neighbours tile takes the midpoint and nothing else changes. Otherwise the smallest surrounding range
+#of timeline_index values that is sparse enough is spread out again (see _relabel_window), so an insert touches O(log n) Tiles amortized
+#instead of renumbering every later event
+#Returns the list of PlotTiles whose timeline_index changed (including tile)
+def insert_event(project, tile, after=None, before=None, gap=timeline_gap):
+    if not isinstance(tile, PlotTile):
+        raise TypeError("tile must be a PlotTile instance")
+    for neighbour in (after, before):
+        if neighbour is not None and not is_timeline_index(getattr(neighbour, "timeline_index", None)):
+            raise ValueError(f"{neighbour.name} is not placed on the timeline")
+    if after is not None and before is not None and not after.timeline_index < before.timeline_index:
+        raise ValueError(f"{after.name} does not happen before {before.name}")
+
+    if after is not None and before is None:
+        before = neighbour_event(project, after.timeline_index, later=True, skip_tile=tile)
+    elif before is not None and after is None:
+        after = neighbour_event(project, before.timeline_index, later=False, skip_tile=tile)
+    elif after is None and before is None:
+        chronology = project.get_index("chronology", ChronologyIndex)
+        after = chronology.previous_event(float("inf"))
+        if after is tile:
+            after = chronology.previous_event(tile.timeline_index)
+
+    low = after.timeline_index if after is not None else -1
+    if before is None:
+        tile.timeline_index = low + gap
+        return [tile]
+    if before.timeline_index - low >= 2:
+        tile.timeline_index = (low + before.timeline_index) // 2
+        return [tile]
+
+    return _relabel_window(project, tile, low)
+
+#Makes room for tile just after the group of events at low, then places it there (order maintenance, as in Bender et al.'s list labelling)
+#Looks at aligned ranges of timeline_index values around low: [base, base + 2^i) with base a multiple of 2^i, for i = 1, 2, ...
+#The first range holding fewer than (2 / relabel_density)^i events (the new tile included) has its events spread evenly over it.
+#Ranges grow by doubling and sparse ranges are left alone, so each insert relabels O(log n) Tiles amortized, however often the same spot is used
+def _relabel_window(project, tile, low):
+    #Events sharing a timeline_index stay together, so the window is made of groups of equal indices
+    chronology = project.get_index("chronology", ChronologyIndex)
+    if tile.id in chronology.index_of:
+        tile.timeline_index = None #Takes tile out of the index while the window is chosen
+    labels = chronology.sorted_labels
+
+    level = 1
+    while True:
+        size = 1 << level
+        base = max(low, 0) >> level << level #low is -1 when tile goes first
+        first = bisect_left(labels, base)
+        last = bisect_left(labels, base + size)
+        count = last - first + 1 #Groups in the range plus the new tile
+        if count <= (2 / relabel_density) ** level:
+            break
+        level += 1
+
+    window = labels[first:last]
+    insert_at = bisect_right(window, low) #The new tile goes right after the group holding low
+    groups = [chronology.events_at(label) for label in window]
+    groups.insert(insert_at, [tile])
+    step = size // count
+    changed = []
+    for position, members in enumerate(groups):
+        new_index = base + step * position + step // 2
+        for member in members:
+            if member.timeline_index != new_index:
+                member.timeline_index = new_index
+                changed.append(member)
+    return changed
+
+#Returns {"PlotTile ID": dense rank} for every placed PlotTile. Equal timeline_index values share a rank. This is the classic 0, 1, 2... timeline_index
+def dense_timeline_indexes(project, start=0):
+    chronology = project.get_index("chronology", ChronologyIndex)
+    ranks = {label: rank for rank, label in enumerate(chronology.labels(), start)}
+    return {tile_id: ranks[index] for index, tile_id in chronology.entries}
+
+#Rewrites every placed PlotTile's timeline_index as rank * gap (+ start). Returns the list of changed PlotTiles
+#gap=1 gives back dense indices. A larger gap leaves room for insert_event
+def respace_timeline(project, gap=timeline_gap, start=0):
+    changed = []
+    for tile_id, rank in dense_timeline_indexes(project).items():
+        tile = project.tiles[tile_id]
+        new_index = start + rank * gap
+        if tile.timeline_index != new_index:
+            tile.timeline_index = new_index
+            changed.append(tile)
+    return changed
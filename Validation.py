@@ -0,0 +1,153 @@
+from Tiles import PlotMap, logic_link_types
+from Causality import ReachabilityIndex
+from Timeline import ChronologyIndex
+from Analytics import count_inversions
+from Issues import Issue
+from bisect import bisect_right, insort
+
+#Builds "source ID": list of (target ID, link_type) for every logical link in the registry. One pass over all links
+def build_logic_edges(tiles):
+    logic_edges = {}
+    for tile in tiles.values():
+        for link in tile.links:
+            if link.get("type") in logic_link_types:
+                logic_edges.setdefault(tile.id, []).append((link["target"], link["type"]))
+    return logic_edges
+
+#Checks one logical link against the timeline. Returns an error Issue or None if the link is satisfied
+def check_logic_link(tiles, timeline, source_id, target_id, link_type):
+    if target_id not in timeline or source_id not in timeline:
+        return None #Only checks plot points and links with timeline index
+
+    time_source = timeline[source_id]
+    time_target = timeline[target_id]
+    source_name = tiles[source_id].name
+    target_name = tiles[target_id].name
+
+    if link_type == "requires" and not (time_source > time_target):
+        return Issue.error("plotmap.logic_order", "{} requires {}, but {} does not happen before {}", source_name, target_name, target_name, source_name,
+                           tile_ids=(source_id, target_id), link_type=link_type)
+    if link_type in ("causes", "enables", "blocks") and not (time_source < time_target):
+        return Issue.error("plotmap.logic_order", "{} {} {}, but {} does not happen after {}", source_name, link_type, target_name, target_name, source_name,
+                           tile_ids=(source_id, target_id), link_type=link_type)
+    return None
+
+#Checks the logical links of the plot points of many PlotMaps at once. Returns {"PlotMap ID": [error strs]}, or [Issues] if structured
+#The timeline and logical link index are built once and each link is only checked once, no matter how many PlotMaps share its PlotTile
+#If transitive, also checks plot points ordered by chains of logical links using the project's reachability index
+def validate_plotmaps(project, plotmap_ids=None, transitive=False, structured=False):
+    tiles = project.tiles
+
+    if plotmap_ids is None:
+        plotmaps = [tile for tile in tiles.values() if isinstance(tile, PlotMap)]
+    else:
+        plotmaps = []
+        for plotmap_id in plotmap_ids:
+            plotmap = tiles.get(plotmap_id)
+            if plotmap is None:
+                raise ValueError(f"PlotMap {plotmap_id} does not exist in project")
+            plotmaps.append(plotmap)
+
+    timeline = project.get_index("chronology", ChronologyIndex).index_of #Maintained as timeline_index values change, so no rescan
+    logic_edges = build_logic_edges(tiles)
+
+    #Each link is checked once and cached as "source ID": list of (error, target ID, link_type)
+    link_errors = {}
+    def errors_for(plot_tile_id):
+        if plot_tile_id not in link_errors:
+            found = []
+            for target_id, link_type in logic_edges.get(plot_tile_id, []):
+                error = check_logic_link(tiles, timeline, plot_tile_id, target_id, link_type)
+                if error:
+                    found.append((error, target_id, link_type))
+            link_errors[plot_tile_id] = found
+        return link_errors[plot_tile_id]
+
+    reachability = project.get_index("reachability", ReachabilityIndex) if transitive else None
+
+    results = {}
+    for plotmap in plotmaps:
+        plot_ids = set(plotmap.plot_points)
+        errors = []
+
+        for plot_tile_id in plotmap.plot_points:
+            if plot_tile_id not in tiles:
+                raise ValueError(f"Plot point {plot_tile_id} does not exist in project")
+
+            for error, target_id, link_type in errors_for(plot_tile_id):
+                if link_type == "blocks" and target_id not in plot_ids:
+                    continue #Ignore blocks if target isn't in this PlotMap
+                errors.append(error)
+
+        if reachability is not None:
+            errors.extend(reachability.transitive_errors(plotmap.plot_points, timeline))
+
+        results[plotmap.id] = errors if structured else [issue.message for issue in errors]
+
+    return results
+
+#Finds pairs of PlotMaps that tell their shared PlotTiles in contradictory orders. Returns a list of dicts, one per conflicting pair of PlotMaps:
+#"plotmaps": (first PlotMap ID, second PlotMap ID), "shared": number of shared plot points, "inversions": number of contradicting pairs,
+#"pairs": up to limit (PlotTile ID, PlotTile ID) tuples told in that order by the first PlotMap and the other way round by the second
+#An inverted index of PlotTile -> PlotMaps finds the PlotMaps that share Tiles, then each pair is checked by inversion counting in O(k log k)
+def find_plotmap_order_conflicts(project, plotmap_ids=None, limit=10):
+    tiles = project.tiles
+    if plotmap_ids is None:
+        plotmaps = [tile for tile in tiles.values() if isinstance(tile, PlotMap)]
+    else:
+        plotmaps = []
+        for plotmap_id in plotmap_ids:
+            plotmap = tiles.get(plotmap_id)
+            if plotmap is None:
+                raise ValueError(f"PlotMap {plotmap_id} does not exist in project")
+            plotmaps.append(plotmap)
+
+    #Position maps and the inverted index
+    positions = {} #"PlotMap ID": {"PlotTile ID": position}
+    maps_of = {} #"PlotTile ID": list of PlotMap IDs holding it, in plotmaps order
+    for plotmap in plotmaps:
+        position_map = {}
+        for position, plot_tile_id in enumerate(plotmap.plot_points):
+            if plot_tile_id not in position_map:
+                position_map[plot_tile_id] = position
+                maps_of.setdefault(plot_tile_id, []).append(plotmap.id)
+        positions[plotmap.id] = position_map
+
+    #Shared PlotTiles of every pair of PlotMaps that share at least one
+    shared = {} #(first PlotMap ID, second PlotMap ID): list of shared PlotTile IDs
+    for plot_tile_id, holders in maps_of.items():
+        for i in range(len(holders)):
+            for j in range(i + 1, len(holders)):
+                shared.setdefault((holders[i], holders[j]), []).append(plot_tile_id)
+
+    conflicts = []
+    for (first_id, second_id), common in shared.items():
+        if len(common) < 2:
+            continue
+        first_positions = positions[first_id]
+        second_positions = positions[second_id]
+        common.sort(key=first_positions.__getitem__) #Story order of the first PlotMap
+        second_order = [second_positions[plot_tile_id] for plot_tile_id in common]
+        inversions = count_inversions(second_order)
+        if not inversions:
+            continue
+
+        #Concrete examples: earlier Tiles (in the first PlotMap) that the second PlotMap places later
+        pairs = []
+        seen = [] #Sorted (second position, PlotTile ID) of Tiles already passed
+        for plot_tile_id, second_position in zip(common, second_order):
+            if len(pairs) >= limit:
+                break
+            for _, earlier_id in seen[bisect_right(seen, (second_position,)):]:
+                pairs.append((earlier_id, plot_tile_id))
+                if len(pairs) >= limit:
+                    break
+            insort(seen, (second_position, plot_tile_id))
+
+        conflicts.append({
+            "plotmaps": (first_id, second_id),
+            "shared": len(common),
+            "inversions": inversions,
+            "pairs": pairs
+        })
+    return conflicts
@@ -0,0 +1,81 @@
+from Graph import directions
+
+#Read-only view of part of a project: the Tiles within depth hops of some seed Tiles and the links among them (the induced subgraph)
+#Tiles are the project's own objects, not copies, so a view is cheap to make and edits to them show in the project. Building one costs
+#a breadth-first search over the view's Tiles (Project.neighbourhood, cached by the link graph index), not a pass over the registry
+#Membership is fixed when the view is made: call refresh() after adding or removing links to pick up Tiles that came into range
+class ProjectView:
+    #depth None = no limit
+    def __init__(self, project, seed_ids, depth=1, link_types=None, direction="both", include_plot_points=True):
+        if direction not in directions:
+            raise ValueError(f"Unknown direction {direction}. Use one of {', '.join(directions)}")
+        if depth is not None and depth < 0:
+            raise ValueError("Depth must be 0 or more")
+        self.project = project
+        self.seed_ids = [seed_ids] if isinstance(seed_ids, str) else list(seed_ids)
+        self.depth = depth
+        self.link_types = None if link_types is None else ({link_types} if isinstance(link_types, str) else set(link_types))
+        self.direction = direction
+        self.include_plot_points = include_plot_points #Plot points of seed PlotMaps are seeds too
+        self.refresh()
+
+    #Finds the Tiles in range again
+    def refresh(self):
+        tiles = self.project.tiles
+        seeds = list(self.seed_ids)
+        for seed_id in self.seed_ids:
+            if seed_id not in tiles:
+                raise ValueError(f"Tile {seed_id} not found in project")
+            if self.include_plot_points and tiles[seed_id].tile_type == "PlotMap":
+                seeds.extend(plot_id for plot_id in tiles[seed_id].plot_points if plot_id in tiles)
+        link_types = None if self.link_types is None else sorted(self.link_types)
+        self.distance = self.project.neighbourhood(seeds, self.depth, link_types, self.direction) #"Tile ID": hops from the nearest seed
+        self.tiles = {tile_id: tiles[tile_id] for tile_id in self.distance} #"Tile ID": Tile object, nearest first
+
+    @property
+    def tile_count(self):
+        return len(self.tiles)
+
+    def __contains__(self, tile_id):
+        return tile_id in self.tiles
+
+    def __len__(self):
+        return len(self.tiles)
+
+    #Returns the links of a Tile in the view that stay inside it (and are of the view's link types, if limited)
+    def links(self, tile_id):
+        if tile_id not in self.tiles:
+            raise ValueError(f"Tile {tile_id} is not in this view")
+        return [link for link in self.tiles[tile_id].links if link.get("target") in self.tiles and (self.link_types is None or link.get("type") in self.link_types)]
+
+    #Yields (source Tile ID, link) for every link inside the view
+    def edges(self):
+        for tile_id in self.tiles:
+            for link in self.links(tile_id):
+                yield tile_id, link
+
+    #Returns the IDs of Tiles outside the view that share a link (of the view's link types) with a Tile in it: where the view could grow
+    def boundary(self):
+        link_types = None if self.link_types is None else sorted(self.link_types)
+        around = self.project.neighbourhood(list(self.tiles), 1, link_types, self.direction) if self.tiles else {}
+        return {tile_id for tile_id in around if tile_id not in self.tiles}
+
+    #Returns a list of Tiles in the view matching filter_function(tile) == True
+    def select_tiles(self, filter_function):
+        return [tile for tile in self.tiles.values() if filter_function(tile)]
+
+    #Same as Project.visualize_graph(export=True), limited to the view: keys are Tile IDs, values are info dicts of links inside the view
+    def export_graph(self):
+        graph = {}
+        for tile_id, tile in self.tiles.items():
+            tile_data = {
+                "name": tile.name,
+                "tile_type": tile.tile_type,
+                "links": [dict(link) for link in self.links(tile_id)],
+                "tags": list(tile.tags),
+                "distance": self.distance[tile_id]
+            }
+            if tile.tile_type == "PlotMap":
+                tile_data["plot_points"] = [plot_id for plot_id in tile.plot_points if plot_id in self.tiles]
+            graph[tile_id] = tile_data
+        return graph
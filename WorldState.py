@@ -0,0 +1,244 @@
+from Indexes import ProjectIndex, involvement
+from Timeline import is_timeline_index
+from bisect import bisect_left, bisect_right
+
+lift_link_types = {"enables", "causes"} #Links that lift an active block on their target
+
+#Precomputed "state of the world at time t" over the timeline, built from blocks, enables/causes and involves links
+#A block (source blocks target) is active from the source's timeline_index until the first later event that enables or causes the target
+#A character is present from the first to the last event that involves them (involves links in either direction between a PlotTile and a CharacterTile)
+#Intervals are kept per blocked event and per character and only rebuilt for the entities touched by a change. Their starts and ends are
+#kept as the changes at each breakpoint (deltas), with the full state stored every checkpoint_every breakpoints. state_at(t) bisects to
+#t's breakpoint and replays at most checkpoint_every deltas from the checkpoint before it. A change only drops checkpoints from its time on
+class WorldStateIndex(ProjectIndex):
+    checkpoint_every = 64 #Breakpoints between stored states
+
+    def __init__(self, project):
+        super().__init__(project)
+        self.blockers = {} #"Target ID": {"blocking PlotTile ID": link count}
+        self.blocking = {} #"PlotTile ID": {"blocked target ID": link count}
+        self.lifters = {} #"Target ID": {"enabling/causing PlotTile ID": link count}
+        self.lifting = {} #"PlotTile ID": {"lifted target ID": link count}
+        self.cast = {} #"PlotTile ID": {"CharacterTile ID": link count}
+        self.appearances = {} #"CharacterTile ID": {"PlotTile ID": link count}
+
+        self.block_intervals = {} #"Target ID": sorted list of (start, end, blocker ID). end is None when the block is never lifted
+        self.block_spans = {} #"Target ID": (starts, ends) of the merged intervals, for O(log n) is_blocked
+        self.presence = {} #"CharacterTile ID": (first timeline_index, last timeline_index)
+        self.dirty_targets = set()
+        self.dirty_characters = set()
+
+        self.breakpoints = [] #Sorted timeline_index values where the world state changes
+        self.changes = {} #timeline_index: {(kind, key): +1 starts / -1 ends}. kind is "block" (key (blocker ID, target ID)) or "character"
+        self.contributed = {} #(kind, "Target or CharacterTile ID"): [(timeline_index, (kind, key), delta)] its intervals added to changes
+        self.checkpoints = [] #checkpoints[j] = ({block: count}, {character: count}) active once breakpoints[:j * checkpoint_every + 1] apply
+
+        for tile in project.tiles.values():
+            for link in tile.links:
+                self._link(tile, link, 1)
+
+    @staticmethod
+    def _count(forward, backward, a, b, delta):
+        counts = forward.setdefault(a, {})
+        counts[b] = counts.get(b, 0) + delta
+        backward.setdefault(b, {})[a] = counts[b]
+        if counts[b] <= 0:
+            del counts[b]
+            del backward[b][a]
+
+    def _link(self, tile, link, delta):
+        link_type = link.get("type")
+        if link_type == "blocks":
+            self._count(self.blocking, self.blockers, tile.id, link["target"], delta)
+            self._mark_target(link["target"])
+        elif link_type in lift_link_types:
+            self._count(self.lifting, self.lifters, tile.id, link["target"], delta)
+            self._mark_target(link["target"])
+        elif link_type == "involves":
+            pair = involvement(self.project.tiles, tile, link)
+            if pair is not None:
+                self._count(self.cast, self.appearances, pair[0], pair[1], delta)
+                self._mark_character(pair[1])
+
+    def _mark_target(self, target_id):
+        self.dirty_targets.add(target_id)
+
+    def _mark_character(self, character_id):
+        self.dirty_characters.add(character_id)
+
+    def link_added(self, tile, link):
+        self._link(tile, link, 1)
+
+    def link_removed(self, tile, link):
+        self._link(tile, link, -1)
+
+    def tile_added(self, tile):
+        for link in tile.links:
+            self._link(tile, link, 1)
+
+    def tile_removed(self, tile):
+        for link in tile.links:
+            self._link(tile, link, -1)
+        self._mark_target(tile.id)
+        self._mark_character(tile.id)
+
+    #Only the intervals that depend on the moved event are rebuilt
+    def timeline_changed(self, tile, old_index):
+        for target_id in list(self.blocking.get(tile.id, ())) + list(self.lifting.get(tile.id, ())):
+            self._mark_target(target_id)
+        for character_id in self.cast.get(tile.id, ()):
+            self._mark_character(character_id)
+
+    def _time(self, tile_id):
+        tile = self.project.tiles.get(tile_id)
+        index = getattr(tile, "timeline_index", None)
+        return index if is_timeline_index(index) else None
+
+    def _refresh(self):
+        for target_id in self.dirty_targets:
+            self._rebuild_target(target_id)
+        self.dirty_targets.clear()
+        for character_id in self.dirty_characters:
+            self._rebuild_character(character_id)
+        self.dirty_characters.clear()
+
+    #Replaces what an entity's intervals added to changes, dropping the checkpoints from the earliest time that changed
+    def _set_changes(self, entity, entries):
+        old = self.contributed.pop(entity, [])
+        if entries:
+            self.contributed[entity] = entries
+        if old == entries:
+            return
+        for time, key, delta in old:
+            self._change(time, key, -delta)
+        for time, key, delta in entries:
+            self._change(time, key, delta)
+
+    def _change(self, time, key, delta):
+        at = self.changes.get(time)
+        if at is None:
+            at = self.changes[time] = {}
+            self.breakpoints.insert(bisect_left(self.breakpoints, time), time)
+        position = bisect_left(self.breakpoints, time)
+        count = at.get(key, 0) + delta
+        if count:
+            at[key] = count
+        else:
+            del at[key]
+        if not at:
+            del self.changes[time]
+            del self.breakpoints[position]
+        del self.checkpoints[-(-position // self.checkpoint_every):] #Checkpoints at or after the changed breakpoint
+
+    def _rebuild_target(self, target_id):
+        self.block_intervals.pop(target_id, None)
+        self.block_spans.pop(target_id, None)
+        starts = sorted((self._time(blocker_id), blocker_id) for blocker_id in self.blockers.get(target_id, ()) if self._time(blocker_id) is not None)
+        if not starts:
+            self._set_changes(("block", target_id), [])
+            return
+        lift_times = sorted(self._time(lifter_id) for lifter_id in self.lifters.get(target_id, ()) if self._time(lifter_id) is not None)
+        intervals = []
+        for start, blocker_id in starts:
+            position = bisect_right(lift_times, start)
+            intervals.append((start, lift_times[position] if position < len(lift_times) else None, blocker_id))
+        self.block_intervals[target_id] = intervals
+        entries = []
+        for start, end, blocker_id in intervals:
+            entries.append((start, ("block", (blocker_id, target_id)), 1))
+            if end is not None:
+                entries.append((end, ("block", (blocker_id, target_id)), -1))
+        self._set_changes(("block", target_id), entries)
+
+        #Merged, disjoint spans so is_blocked is a single bisect
+        span_starts, span_ends = [], []
+        for start, end, _ in intervals:
+            if span_ends and (span_ends[-1] is None or start <= span_ends[-1]):
+                if span_ends[-1] is not None and (end is None or end > span_ends[-1]):
+                    span_ends[-1] = end
+                continue
+            span_starts.append(start)
+            span_ends.append(end)
+        self.block_spans[target_id] = (span_starts, span_ends)
+
+    def _rebuild_character(self, character_id):
+        times = [self._time(plot_id) for plot_id in self.appearances.get(character_id, ()) if self._time(plot_id) is not None]
+        if times:
+            first, last = min(times), max(times)
+            self.presence[character_id] = (first, last)
+            self._set_changes(("character", character_id), [(first, ("character", character_id), 1), (last + 1, ("character", character_id), -1)])
+        else:
+            self.presence.pop(character_id, None)
+            self._set_changes(("character", character_id), [])
+
+    #Applies the changes at breakpoints[start:end] to the (blocks, characters) counts
+    def _replay(self, state, start, end):
+        for time in self.breakpoints[start:end]:
+            for (kind, key), delta in self.changes[time].items():
+                counts = state[0] if kind == "block" else state[1]
+                count = counts.get(key, 0) + delta
+                if count > 0:
+                    counts[key] = count
+                else:
+                    counts.pop(key, None)
+        return state
+
+    #Returns {"blocks": set of (blocker ID, target ID) active at t, "characters": set of CharacterTile IDs present at t}
+    def state_at(self, time):
+        self._refresh()
+        position = bisect_right(self.breakpoints, time) - 1
+        if position < 0:
+            return {"blocks": set(), "characters": set()}
+        every = self.checkpoint_every
+        checkpoint = position // every
+        while len(self.checkpoints) <= checkpoint: #Stored states up to t's, each from the one before
+            made = len(self.checkpoints)
+            if made == 0:
+                state = self._replay(({}, {}), 0, 1)
+            else:
+                previous = self.checkpoints[-1]
+                state = self._replay((dict(previous[0]), dict(previous[1])), (made - 1) * every + 1, made * every + 1)
+            self.checkpoints.append(state)
+        blocks, characters = self.checkpoints[checkpoint]
+        blocks, characters = self._replay((dict(blocks), dict(characters)), checkpoint * every + 1, position + 1)
+        return {"blocks": set(blocks), "characters": set(characters)}
+
+    #Returns True if any block on target_id is active at t
+    def is_blocked(self, target_id, time):
+        if target_id in self.dirty_targets:
+            self._rebuild_target(target_id)
+            self.dirty_targets.discard(target_id)
+        spans = self.block_spans.get(target_id)
+        if spans is None:
+            return False
+        position = bisect_right(spans[0], time) - 1
+        return position >= 0 and (spans[1][position] is None or time < spans[1][position])
+
+    #Returns the IDs of the PlotTiles whose block on target_id is active at t
+    def active_blockers(self, target_id, time):
+        if not self.is_blocked(target_id, time):
+            return []
+        return [blocker_id for start, end, blocker_id in self.block_intervals[target_id] if start <= time and (end is None or time < end)]
+
+    #Returns True if the character is present (between their first and last involved event) at t
+    def is_present(self, character_id, time):
+        if character_id in self.dirty_characters:
+            self._rebuild_character(character_id)
+            self.dirty_characters.discard(character_id)
+        span = self.presence.get(character_id)
+        return span is not None and span[0] <= time <= span[1]
+
+    #Returns (first, last) timeline_index of the character's presence, or None if no placed event involves them
+    def presence_of(self, character_id):
+        self.is_present(character_id, 0)
+        return self.presence.get(character_id)
+
+    #Returns (blocked PlotTile, [blocking PlotTiles]) for every placed event that happens while a block on it is active
+    def blocked_events(self):
+        self._refresh()
+        found = []
+        for target_id in self.block_intervals:
+            time = self._time(target_id)
+            if time is not None and self.is_blocked(target_id, time):
+                found.append((self.project.tiles[target_id], [self.project.tiles[blocker_id] for blocker_id in self.active_blockers(target_id, time)]))
+        return found
@@ -1,9 +1,10 @@
 import sys
 from PySide6.QtWidgets import (
 QApplication, QMainWindow, QTreeWidget, QTreeWidgetItem, QWidget, QHBoxLayout, QLabel, QDialog, QComboBox, QSpinBox,
-QVBoxLayout, QFileDialog, QMessageBox, QLineEdit, QFormLayout, QTextEdit, QPushButton, QListWidget, QListWidgetItem, QMenu
+QVBoxLayout, QFileDialog, QMessageBox, QLineEdit, QFormLayout, QTextEdit, QPushButton, QListWidget, QListWidgetItem, QMenu, QStyle
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QBrush, QColor, QIcon
 from Project import Project
 from Tiles import Tile, PlotMap, PlotTile, CharacterTile, SettingTile
 
@@ -124,6 +125,26 @@ class StoryTree(QTreeWidget):
         mw.mark_dirty()
         event.accept()
 
+#Signals of a ValidationWorker. Emitted on the worker thread, delivered on the main thread
+class ValidationSignals(QObject):
+    finished = Signal(object, object, object) #Project, job, results (None if the check failed)
+
+#Runs the Tile checks of a background check job on a QThreadPool thread. Only reads the job's copies of the Tiles, so editing never waits
+class ValidationWorker(QRunnable):
+    def __init__(self, project, job):
+        super().__init__()
+        self.project = project
+        self.job = job
+        self.signals = ValidationSignals()
+
+    def run(self):
+        try:
+            results = Project.run_background_check(self.job)
+        except Exception as error:
+            print(f"Background validation failed: {error}")
+            results = None
+        self.signals.finished.emit(self.project, self.job, results)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -232,6 +253,16 @@ class MainWindow(QMainWindow):
         #Add right panel to main_layout
         main_layout.addWidget(self.detail_panel, 2)  #2 = stretch factor. Add detail panel to overall layout
 
+        #---Background validation---
+
+        self.validation_report = None #IssueReport of the last finished check, shown as badges in the tree
+        self.validation_worker = None #Running ValidationWorker, if any
+        self.validation_pending = False #True if edits were made while a check was running
+        self.validation_timer = QTimer(self) #Debounce: restarted by every edit, so checks only run once edits settle
+        self.validation_timer.setSingleShot(True)
+        self.validation_timer.setInterval(500)
+        self.validation_timer.timeout.connect(self.start_validation)
+
     #Update window title based on name and dirty status
     def update_window_title(self):
         name = self.project.project_name if self.project else "StoryAlign"
@@ -243,6 +274,68 @@ class MainWindow(QMainWindow):
         if not self.dirty:
             self.dirty = True
             self.update_window_title()
+        self.schedule_validation()
+
+    #Restarts the debounce timer. The project is checked once no edit has been made for the timer's interval
+    def schedule_validation(self):
+        if self.project:
+            self.validation_timer.start()
+
+    #Copies the changed Tiles on the main thread and checks them on a worker thread. See Project.begin_background_check
+    def start_validation(self):
+        if not self.project:
+            return
+        if self.validation_worker:
+            self.validation_pending = True #One check at a time. Runs again when the current one finishes
+            return
+
+        job = self.project.begin_background_check()
+        self.validation_worker = ValidationWorker(self.project, job)
+        self.validation_worker.signals.finished.connect(self.on_validation_finished)
+        QThreadPool.globalInstance().start(self.validation_worker)
+
+    def on_validation_finished(self, project, job, results):
+        self.validation_worker = None
+        if project is not self.project or results is None:
+            return #Project was replaced while checking, or the check failed (the next edit tries again)
+
+        report = project.finish_background_check(job, results)
+        if report is not None:
+            self.validation_report = report
+            self.apply_validation_badges()
+        if report is None or self.validation_pending: #Stale results (ex: saving checked the project meanwhile) or newer edits
+            self.validation_pending = False
+            self.schedule_validation()
+
+    #Marks tree items of Tiles with issues from the last check: red for errors, orange for warnings, messages in the tooltip
+    def apply_validation_badges(self):
+        def walk(item):
+            self.set_validation_badge(item)
+            for i in range(item.childCount()):
+                walk(item.child(i))
+
+        self.tile_tree.blockSignals(True) #Badge changes are not renames (see on_tree_item_renamed)
+        try:
+            for i in range(self.tile_tree.topLevelItemCount()):
+                walk(self.tile_tree.topLevelItem(i))
+        finally:
+            self.tile_tree.blockSignals(False)
+
+    def set_validation_badge(self, item):
+        tile_id = item.data(0, Qt.UserRole)
+        issues = self.validation_report.by_tile(tile_id) if self.validation_report and tile_id else []
+        if not issues:
+            item.setData(0, Qt.ForegroundRole, None)
+            item.setIcon(0, QIcon())
+            item.setToolTip(0, "")
+            return
+
+        has_errors = any(issue.severity == "error" for issue in issues)
+        item.setForeground(0, QBrush(QColor("red" if has_errors else "darkorange")))
+        item.setIcon(0, self.style().standardIcon(QStyle.SP_MessageBoxCritical if has_errors else QStyle.SP_MessageBoxWarning))
+        shown = "\n".join(issue.message for issue in issues[:10])
+        more = f"\n...and {len(issues) - 10} more" if len(issues) > 10 else ""
+        item.setToolTip(0, shown + more)
 
     def refresh_tree_preserve_view(self, selected_id=None, initial=False):
         def get_expanded_keys():
@@ -279,6 +372,7 @@ class MainWindow(QMainWindow):
                 walk(self.tile_tree.topLevelItem(i))
 
         restore_expanded(expanded)
+        self.apply_validation_badges()
         if selected_id:
             self.open_tile_by_id(selected_id)
         self.tile_tree.verticalScrollBar().setValue(scroll)
@@ -425,6 +519,7 @@ class MainWindow(QMainWindow):
 
         if tile.name != new_name:
             tile.name = new_name
+            self.project.mark_changed(tile)
             self.mark_dirty()
             self.refresh_tree_preserve_view(selected_id=tile_id)
 
@@ -799,6 +894,7 @@ class MainWindow(QMainWindow):
             
             if tile.name != new_name:
                 tile.name = new_name
+                self.project.mark_changed(tile)
                 self.mark_dirty()
 
                 self.refresh_tree_preserve_view(selected_id=tile.id)
@@ -855,7 +951,7 @@ class MainWindow(QMainWindow):
             #Timeline index field
             timeline_index_edit = QSpinBox()
             timeline_index_edit.setMinimum(-1)
-            timeline_index_edit.setMaximum(100000)
+            timeline_index_edit.setMaximum(2147483647) #timeline_index values may be spaced out (see Timeline.insert_event)
             if tile.timeline_index is None:
                 timeline_index_edit.setValue(-1)
             else:
@@ -870,8 +966,29 @@ class MainWindow(QMainWindow):
                 if tile.timeline_index != new_val:
                     tile.timeline_index = new_val
                     self.mark_dirty()
+                update_timeline_neighbours()
             timeline_index_edit.valueChanged.connect(on_timeline_index_changed)
             form.addRow("Timeline Index:", timeline_index_edit)
+
+            #Neighbouring events and conflicts from the project's chronology index (no rescan of all tiles)
+            timeline_neighbours = QLabel()
+            timeline_neighbours.setWordWrap(True)
+
+            def update_timeline_neighbours():
+                if tile.timeline_index is None:
+                    timeline_neighbours.setText("Not placed on the timeline")
+                    return
+                chronology = self.project.chronology
+                previous_event = chronology.previous_event(tile.timeline_index)
+                next_event = chronology.next_event(tile.timeline_index)
+                text = f"After: {previous_event.name if previous_event else '(start)'}    Before: {next_event.name if next_event else '(end)'}"
+                shared = [other.name for other in chronology.events_at(tile.timeline_index) if other is not tile]
+                if shared:
+                    text += f"\nTimeline conflict with: {', '.join(shared)}"
+                timeline_neighbours.setText(text)
+
+            update_timeline_neighbours()
+            form.addRow("", timeline_neighbours)
         elif isinstance(tile, CharacterTile):
             #Title field
             title_edit = QLineEdit(tile.title)
@@ -1166,6 +1283,7 @@ class MainWindow(QMainWindow):
     def new_project(self):
         self.project = Project()
         self.project_folder = None
+        self.validation_report = None
 
         self.save_action.setEnabled(True)
         self.save_as_action.setEnabled(True)
@@ -1190,6 +1308,7 @@ class MainWindow(QMainWindow):
 
         self.project = loaded_project
         self.project_folder = folder
+        self.validation_report = load_check_report #Loading already checked every Tile, so the background checks start incremental
         self.dirty = False
         self.update_window_title()
 
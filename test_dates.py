@@ -0,0 +1,105 @@
+from Project import Project
+from Tiles import PlotTile
+from Dates import Calendar, parse_date
+import tempfile
+import os
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+
+print("\n--- Stage 1: Parsing Gregorian dates ---")
+assert_true(parse_date("2024-05-01") == (2024, 5, 1), "ISO date")
+assert_true(parse_date("1 May 2024") == (2024, 5, 1), "Day month year")
+assert_true(parse_date("May 1st, 2024") == (2024, 5, 1), "Month day, year")
+assert_true(parse_date("March 1203") == (1203, 3, 0), "Month year")
+assert_true(parse_date("1203") == (1203, 0, 0), "Bare year")
+assert_true(parse_date("300 BC") < parse_date("1 AD"), "BC years sort first")
+assert_true(parse_date("") is None and parse_date("sometime later") is None, "Unparseable dates give None")
+assert_true(parse_date("2024 May 1") == (2024, 5, 1), "Year before month and day")
+assert_true(parse_date("May 2024 1st") == (2024, 5, 1), "A number too big for a day is the year")
+assert_true(parse_date("40 May 50") is None, "Neither number fits as a day")
+assert_true(parse_date("31 February 2024") is None and parse_date("29 February 2024") == (2024, 2, 29), "Days past the end of the month rejected")
+assert_true(parse_date("2024-13-45") is None and parse_date("2024-02-30") is None and parse_date("2024-00") is None, "Out of range ISO dates rejected")
+assert_true(parse_date("2024-12-31") == (2024, 12, 31), "Last day of the year")
+
+print_ok("Gregorian formats parsed")
+
+
+print("\n--- Stage 2: In-world calendars ---")
+shire = Calendar("Shire Reckoning", ["Afteryule", "Solmath", "Rethe"], {"TA": (0, 1), "FA": (3021, 1)}, default_era="TA")
+thaw = Calendar("Thaw Reckoning", ["Thaw", "Melt"], {"TR": (0, 1)}, month_lengths=[10, 40])
+assert_true(parse_date("3019 Thaw 10 TR", [thaw]) == (3019, 1, 10), "Custom month length")
+assert_true(parse_date("11 Thaw 3019 TR", [thaw]) is None and parse_date("35 Melt 3019 TR", [thaw]) == (3019, 2, 35), "Days checked against the calendar's month lengths")
+assert_true(Calendar.fromDict(thaw.toDict()).month_lengths == [10, 40] and shire.days_in_month(2) == 31, "Month lengths saved; 31 days without them")
+assert_true(parse_date("12 Solmath 3019 TA", [shire]) == (3019, 2, 12), "Custom month and era")
+assert_true(parse_date("Rethe 5 FA", [shire]) == (3026, 3, 0), "Era offset")
+assert_true(parse_date("12 Solmath 3019 TA") is None, "Custom calendar words unknown without the calendar")
+
+print_ok("Custom calendars parsed")
+
+
+print("\n--- Stage 3: Date index ---")
+project = Project()
+council = PlotTile("Council", date="25 Rethe 3018 TA", timeline_index=0)
+departure = PlotTile("Departure", date="Afteryule 3019 TA", timeline_index=1)
+battle = PlotTile("Battle", date="3019", timeline_index=2)
+coronation = PlotTile("Coronation", date="1 FA", timeline_index=3)
+legend = PlotTile("Legend", date="long ago")
+for tile in [council, departure, battle, coronation, legend]:
+    project.add_tile(tile)
+
+dates = project.dates
+assert_true(dates.events_in_year(3018) == [], "Calendar not added yet, so Shire dates are unparsed")
+project.add_calendar(shire)
+dates = project.dates
+assert_true(dates.events_in_year(3018) == [council], "Council in 3018")
+assert_true(set(dates.events_in_year(3019)) == {departure, battle}, "Departure and Battle in 3019")
+assert_true(dates.events_in_years(3018, 3030) == [council, battle, departure, coronation], "Year range in date order")
+assert_true(dates.unparsed == {legend.id}, "Unparseable date tracked")
+undated = PlotTile.fromDict({**PlotTile("Undated").toDict(), "date": None}) #Older files may hold null dates
+project.add_tile(undated)
+assert_true(undated.id not in dates.unparsed and undated not in dates.events_between_keys(), "Null date should be skipped, not indexed")
+project.remove_tile(undated.id)
+fresh = Project()
+fresh.add_tile(undated)
+assert_true(fresh.dates.entries == [] and fresh.dates.unparsed == set(), "Building the index over a null date failed")
+assert_true(dates.timeline_conflicts() == [], "Dates agree with timeline")
+
+battle.date = "3017" #Index updates as the date changes
+assert_true(battle.date_key == (3017, 0, 0), "date_key reparsed")
+assert_true(dates.events_in_year(3017) == [battle], "Index not updated after date change")
+assert_true(dates.timeline_conflicts() == [(departure, battle)], "Date running backwards on the timeline not reported")
+
+#A vague or undated event between two events does not hide their conflict
+vague = Project()
+arrival = PlotTile("Arrival", date="5 May 3019", timeline_index=0)
+season = PlotTile("Season", date="3019", timeline_index=1)
+rumour = PlotTile("Rumour", timeline_index=2)
+letter = PlotTile("Letter", date="1 May 3019", timeline_index=3)
+for tile in [arrival, season, rumour, letter]:
+    vague.add_tile(tile)
+assert_true(vague.dates.timeline_conflicts() == [(arrival, letter)], f"Conflict across a vague event not reported: {vague.dates.timeline_conflicts()}")
+
+project.remove_tile(council.id)
+assert_true(dates.events_in_year(3018) == [], "Removed tile still indexed")
+
+print_ok("Date index answers year queries and stays in sync")
+
+
+print("\n--- Stage 4: Calendars are saved with the project ---")
+folder = os.path.join(tempfile.mkdtemp(), "DatedProject")
+assert_true(project.save(folder), "Save failed")
+loaded, load_report, load_check_report = Project.load(folder, strict=False)
+assert_true(load_report["errors"] == [] and load_check_report["errors"] == [], "Load failed")
+assert_true(list(loaded.calendars) == ["Shire Reckoning"], "Calendar not loaded")
+assert_true(loaded.calendars["Shire Reckoning"].eras["FA"] == (3021, 1), "Calendar eras not restored")
+assert_true(loaded.tiles[coronation.id].date_key == (3022, 0, 0), "Loaded dates should use loaded calendars")
+
+print_ok("Calendars persist")
+
+print("\n🎉 ALL DATE TESTS PASSED")
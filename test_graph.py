@@ -0,0 +1,546 @@
+from Project import Project
+from Tiles import Tile, PlotMap, PlotTile, CharacterTile, SettingTile
+from collections import deque
+import random
+import time
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+#Plain breadth-first search over tile.links, for comparison
+def brute_distances(project, start, link_types, direction, max_depth=None):
+    edges = {}
+    for tile in project.tiles.values():
+        for link in tile.links:
+            if link_types is None or link["type"] in link_types:
+                if direction in ("out", "both"):
+                    edges.setdefault(tile.id, set()).add(link["target"])
+                if direction in ("in", "both"):
+                    edges.setdefault(link["target"], set()).add(tile.id)
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if max_depth is not None and distance[node] == max_depth:
+            continue
+        for other in edges.get(node, ()):
+            if other not in distance and other in project.tiles:
+                distance[other] = distance[node] + 1
+                queue.append(other)
+    return distance
+
+
+print("\n--- Stage 1: Reachability and path queries ---")
+project = Project()
+spark = PlotTile("Spark")
+riot = PlotTile("Riot")
+war = PlotTile("War")
+peace = PlotTile("Peace")
+hero = CharacterTile("Hero")
+rival = CharacterTile("Rival")
+castle = SettingTile("Castle")
+for tile in [spark, riot, war, peace, hero, rival, castle]:
+    project.add_tile(tile)
+
+spark.add_link(riot.id, project, "causes")
+riot.add_link(war.id, project, "causes")
+war.add_link(peace.id, project, "enables")
+riot.add_link(hero.id, project, "involves")
+war.add_link(rival.id, project, "involves")
+rival.add_link(castle.id, project, "references")
+
+assert_true(project.descendants(spark.id, "causes") == {riot.id, war.id}, "Wrong causal descendants")
+assert_true(project.descendants(spark.id, ["causes", "enables"]) == {riot.id, war.id, peace.id}, "Wrong descendants over two types")
+assert_true(project.descendants(spark.id, max_depth=1) == {riot.id}, "max_depth not respected")
+assert_true(project.ancestors(peace.id, ["causes", "enables"]) == {spark.id, riot.id, war.id}, "Wrong ancestors")
+assert_true(project.ancestors(spark.id) == frozenset(), "Spark has no ancestors")
+
+path = project.shortest_path(hero.id, castle.id)
+assert_true([(step["source"], step["type"], step["target"]) for step in path] == [
+    (riot.id, "involves", hero.id), (riot.id, "causes", war.id), (war.id, "involves", rival.id), (rival.id, "references", castle.id)],
+    f"Wrong connection between Hero and Castle: {path}")
+assert_true(project.shortest_path(hero.id, castle.id, directed=True) is None, "Directed path should not walk links backwards")
+assert_true(len(project.shortest_path(spark.id, peace.id, directed=True)) == 3, "Directed path not found")
+assert_true(project.shortest_path(hero.id, castle.id, ["involves", "references"]) is None, "Path should only use the given link types")
+assert_true(project.shortest_path(war.id, war.id) == [], "Path to itself should be empty")
+
+assert_true(project.neighbourhood(riot.id) == {riot.id: 0, spark.id: 1, war.id: 1, hero.id: 1}, "Wrong 1-hop neighbourhood")
+assert_true(project.neighbourhood([spark.id, castle.id], hops=1, direction="out") == {spark.id: 0, castle.id: 0, riot.id: 1}, "Wrong outgoing neighbourhood")
+try:
+    project.descendants("missing")
+    assert_true(False, "Unknown Tile should raise")
+except ValueError:
+    pass
+
+print_ok("Descendants, ancestors, paths and neighbourhoods found")
+
+
+print("\n--- Stage 2: Cached results follow link changes ---")
+graph = project.link_graph
+causes = project.descendants(spark.id, "causes")
+assert_true(project.descendants(spark.id, "causes") is causes, "Repeated query should come from the cache")
+hero.add_link(castle.id, project, "references") #Other link type, so the cached answer stays valid
+assert_true(project.descendants(spark.id, "causes") is causes, "Unrelated link type invalidated the cache")
+war.add_link(peace.id, project, "causes")
+assert_true(project.descendants(spark.id, "causes") == {riot.id, war.id, peace.id}, "New causes link not followed")
+assert_true(project.shortest_path(hero.id, castle.id) == [{"source": hero.id, "target": castle.id, "type": "references"}], "Cached path not refreshed")
+
+war.remove_link(peace.id, "causes")
+assert_true(project.descendants(spark.id, "causes") == {riot.id, war.id}, "Removed link still followed")
+project.remove_tile(riot.id)
+assert_true(project.descendants(spark.id) == frozenset(), "Removed Tile still reachable")
+
+#Links edited directly are picked up after mark_changed
+spark.links.append({"target": war.id, "type": "causes"})
+project.mark_changed(spark)
+assert_true(project.descendants(spark.id, "causes") == {war.id}, "Direct link edit not indexed after mark_changed")
+
+#A link to a missing Tile is followed once the Tile exists
+spark.add_link(war.id, project, "references")
+spark.links.append({"target": "later", "type": "causes"})
+project.mark_changed(spark)
+assert_true("later" not in project.descendants(spark.id), "Missing Tile should not be reached")
+project.add_tile(Tile("PlotTile", "Later", id="later"))
+assert_true("later" in project.descendants(spark.id), "Added Tile should be reached")
+
+print_ok("Caches are invalidated per link type")
+
+
+print("\n--- Stage 3: Random graphs agree with plain search ---")
+rng = random.Random(42)
+link_types = ["causes", "references", "involves", "enables"]
+random_project = Project()
+nodes = [Tile("Tile", f"Node {i}") for i in range(400)]
+for tile in nodes:
+    random_project.add_tile(tile)
+for _ in range(1200):
+    source, target = rng.sample(nodes, 2)
+    random_project.tiles[source.id].links.append({"target": target.id, "type": rng.choice(link_types)})
+random_project.reset_indexes()
+
+for step in range(150):
+    start = rng.choice(nodes).id
+    types = rng.choice([None, ["causes"], ["causes", "enables"]])
+    depth = rng.choice([None, 1, 2, 3])
+    assert_true(random_project.descendants(start, types, depth) == set(brute_distances(random_project, start, types, "out", depth)) - {start}, "Descendants differ")
+    assert_true(random_project.ancestors(start, types, depth) == set(brute_distances(random_project, start, types, "in", depth)) - {start}, "Ancestors differ")
+    assert_true(random_project.neighbourhood(start, depth or 2, types) == brute_distances(random_project, start, types, "both", depth or 2), "Neighbourhood differs")
+
+    end = rng.choice(nodes).id
+    directed = rng.random() < 0.5
+    expected = brute_distances(random_project, start, types, "out" if directed else "both").get(end)
+    path = random_project.shortest_path(start, end, types, directed)
+    assert_true((None if path is None else len(path)) == expected, f"Path length {path and len(path)} differs from {expected}")
+    if path:
+        walked = start
+        for link in path:
+            assert_true(link in [{"source": tile.id, **stored} for tile in [random_project.tiles[link["source"]]] for stored in tile.links], "Path uses a link that does not exist")
+            assert_true(walked in (link["source"], link["target"]) and (not directed or walked == link["source"]), "Path steps do not chain")
+            walked = link["target"] if walked == link["source"] else link["source"]
+        assert_true(walked == end, "Path does not end at the target")
+
+    if step % 10 == 0: #Edit the graph between queries
+        tile = rng.choice(nodes)
+        if tile.links and rng.random() < 0.5:
+            tile.remove_link(rng.choice(tile.links)["target"])
+        else:
+            tile.add_link(rng.choice(nodes).id, random_project, rng.choice(["references", "involves"]))
+
+print_ok("Queries match plain breadth-first search")
+
+
+print("\n--- Stage 4: Million-link graph ---")
+big = Project()
+tiles = [Tile("Tile", f"Tile {i}", id=f"t{i}") for i in range(100000)]
+for tile in tiles:
+    big.add_tile(tile)
+for i, tile in enumerate(tiles):
+    for offset in rng.sample(range(1, 100000), 10):
+        tile.links.append({"target": f"t{(i + offset) % 100000}", "type": link_types[offset % 4]})
+big.reset_indexes()
+
+start = time.perf_counter()
+big.link_graph
+print(f"Indexed 1,000,000 links in {time.perf_counter() - start:.2f}s")
+
+start = time.perf_counter()
+for _ in range(20):
+    big.shortest_path(rng.choice(tiles).id, rng.choice(tiles).id)
+path_time = (time.perf_counter() - start) / 20
+start = time.perf_counter()
+for _ in range(20):
+    big.neighbourhood(rng.choice(tiles).id, hops=2, link_types="causes")
+hop_time = (time.perf_counter() - start) / 20
+print(f"Shortest path in {path_time * 1000:.1f}ms, typed 2-hop neighbourhood in {hop_time * 1000:.1f}ms")
+assert_true(path_time < 0.1 and hop_time < 0.05, "Queries on a million links should take milliseconds")
+
+print_ok("Large graph queries are fast")
+
+print("\n--- Stage 5: Connected story clusters ---")
+#Plain component labelling over tile.links, for comparison
+def brute_components(project):
+    label = {}
+    for tile_id in project.tiles:
+        if tile_id not in label:
+            for other in brute_distances(project, tile_id, None, "both"):
+                label[other] = tile_id
+    return label
+
+world = Project()
+main_plot = [PlotTile(f"Main {i}") for i in range(5)]
+subplot = [PlotTile(f"Side {i}") for i in range(3)]
+loner = CharacterTile("Loner")
+for tile in main_plot + subplot + [loner]:
+    world.add_tile(tile)
+for earlier, later in zip(main_plot, main_plot[1:]):
+    earlier.add_link(later.id, world, "causes")
+subplot[0].add_link(subplot[1].id, world, "causes")
+subplot[2].add_link(subplot[1].id, world, "references")
+
+assert_true(world.components.component_count == 3, "Expected main plot, subplot and loner")
+assert_true(world.find_story_fragments() == [world.components.component_members(subplot[0].id)], "Subplot not reported as a fragment")
+assert_true(sorted(world.find_story_fragments()[0]) == sorted(tile.id for tile in subplot), "Wrong fragment members")
+assert_true(world.components.component_size(main_plot[2].id) == 5 and not world.are_connected(main_plot[0].id, subplot[0].id), "Wrong clusters")
+
+subplot[1].add_link(main_plot[3].id, world, "references") #Ties the subplot in
+assert_true(world.find_story_fragments() == [] and world.are_connected(subplot[2].id, main_plot[0].id), "Subplot should join the main plot")
+subplot[1].remove_link(main_plot[3].id)
+assert_true(len(world.find_story_fragments()) == 1, "Removing the link should split the clusters again")
+world.remove_tile(main_plot[2].id)
+assert_true(not world.are_connected(main_plot[0].id, main_plot[4].id), "Removing a Tile should split its cluster")
+assert_true(sorted(map(len, world.find_story_clusters(min_size=2))) == [2, 2, 3], "Wrong clusters after removal")
+
+#Random edits against plain component labelling
+components = random_project.components
+for step in range(300):
+    tile = rng.choice(nodes)
+    if tile.id not in random_project.tiles:
+        continue
+    action = rng.random()
+    if action < 0.6:
+        target = rng.choice(nodes)
+        if target.id in random_project.tiles:
+            tile.add_link(target.id, random_project, "references")
+    elif action < 0.85 and tile.links:
+        tile.remove_link(rng.choice(tile.links)["target"])
+    elif action < 0.95:
+        random_project.remove_tile(tile.id)
+    else:
+        random_project.add_tile(Tile("Tile", "Newcomer"))
+    if step % 25 == 0:
+        label = brute_components(random_project)
+        for tile_id in random_project.tiles:
+            members = components.component_members(tile_id)
+            assert_true(sorted(members) == sorted(other for other in label if label[other] == label[tile_id]), "Component members differ")
+        assert_true(components.component_count == len(set(label.values())), "Component count differs")
+
+#Incremental merging on a large project
+clusters = Project()
+pieces = [Tile("Tile", f"Piece {i}", id=f"p{i}") for i in range(200000)]
+for tile in pieces:
+    clusters.add_tile(tile)
+components = clusters.components
+start = time.perf_counter()
+for i in range(0, 200000, 2):
+    pieces[i].add_link(pieces[i + 1].id, clusters, "references")
+for i in range(0, 200000, 4): #Joins pairs into groups of four
+    pieces[i].add_link(pieces[i + 2].id, clusters, "references")
+merge_time = time.perf_counter() - start
+start = time.perf_counter()
+sizes = [components.component_size(tile.id) for tile in pieces]
+query_time = (time.perf_counter() - start) / len(pieces)
+assert_true(set(sizes) == {4} and components.component_count == 50000, "Wrong cluster sizes")
+print(f"150,000 links merged in {merge_time:.2f}s, {query_time * 1e6:.2f}us per size query")
+
+print_ok("Components tracked incrementally")
+
+print("\n--- Stage 6: Orphans from degree counters ---")
+#The original scan over every pair of Tiles, for comparison
+def scan_orphans(project, check_incoming=True, check_outgoing=True, require_both=False, ignore_types=None, ignore_ids=None):
+    orphans = []
+    for tile in project.tiles.values():
+        if tile.tile_type in set(ignore_types or []) or tile.id in set(ignore_ids or []):
+            continue
+        conditions = []
+        if check_incoming:
+            conditions.append(not any(any(link["target"] == tile.id for link in t.links) for t in project.tiles.values() if t.id != tile.id))
+        if check_outgoing:
+            conditions.append(not tile.links)
+        if (all if require_both else any)(conditions):
+            orphans.append(tile)
+    return orphans
+
+flags = [(incoming, outgoing, both) for incoming in (True, False) for outgoing in (True, False) for both in (True, False) if incoming or outgoing]
+cast = Project()
+people = [rng.choice([CharacterTile, SettingTile, PlotTile])(f"Person {i}") for i in range(150)]
+for person in people:
+    cast.add_tile(person)
+for step in range(400):
+    tile = rng.choice(people)
+    if tile.id not in cast.tiles:
+        continue
+    action = rng.random()
+    if action < 0.5:
+        target = rng.choice(people)
+        if target.id in cast.tiles:
+            tile.add_link(target.id, cast, "references") #Includes links to itself
+    elif action < 0.8 and tile.links:
+        tile.remove_link(rng.choice(tile.links)["target"])
+    elif action < 0.9:
+        cast.remove_tile(tile.id)
+    else:
+        newcomer = CharacterTile("Newcomer")
+        cast.add_tile(newcomer)
+        people.append(newcomer)
+    if step % 40 == 0:
+        ignored = [tile.id for tile in rng.sample(people, 10)]
+        for incoming, outgoing, both in flags:
+            for ignore_types, ignore_ids in ((None, None), (["SettingTile"], ignored)):
+                assert_true(cast.find_orphans(incoming, outgoing, both, ignore_types, ignore_ids) == scan_orphans(cast, incoming, outgoing, both, ignore_types, ignore_ids),
+                            f"Orphans differ for {incoming, outgoing, both, ignore_types}")
+try:
+    cast.find_orphans(check_incoming=False, check_outgoing=False)
+    assert_true(False, "Checking nothing should raise")
+except ValueError:
+    pass
+assert_true(cast.find_orphans(False, False, ignore_types=["CharacterTile", "SettingTile", "PlotTile"]) == [], "Nothing to check should not raise")
+
+#Live sets follow link changes
+lonely, friend = CharacterTile("Lonely"), CharacterTile("Friend")
+cast.add_tile(lonely)
+cast.add_tile(friend)
+degrees = cast.degrees
+assert_true(lonely.id in degrees.isolated, "New Tile should be isolated")
+friend.add_link(lonely.id, cast, "references")
+assert_true(lonely.id not in degrees.no_incoming and lonely.id in degrees.no_outgoing and friend.id in degrees.no_incoming, "Live sets not updated on add")
+friend.remove_link(lonely.id)
+assert_true(lonely.id in degrees.isolated and friend.id in degrees.isolated, "Live sets not updated on remove")
+lonely.links.append({"target": lonely.id, "type": "references"}) #Direct edit, announced with mark_changed
+cast.mark_changed(lonely)
+assert_true(lonely.id in degrees.no_incoming and lonely.id not in degrees.no_outgoing, "Self link should only count as outgoing")
+
+#Large project
+crowd = Project()
+extras = [CharacterTile(f"Extra {i}") for i in range(100000)]
+for extra in extras:
+    crowd.add_tile(extra)
+for i in range(0, 100000, 3):
+    extras[i].add_link(extras[(i * 7 + 1) % 100000].id, crowd, "references")
+start = time.perf_counter()
+for incoming, outgoing, both in flags:
+    crowd.find_orphans(incoming, outgoing, both, ["SettingTile"], [extras[0].id])
+orphan_time = (time.perf_counter() - start) / len(flags)
+print(f"find_orphans on 100,000 Tiles in {orphan_time * 1000:.1f}ms")
+assert_true(orphan_time < 0.5, "find_orphans should be linear")
+
+print_ok("Orphans match the original scan")
+
+print("\n--- Stage 7: CSR snapshot ---")
+from Snapshot import GraphSnapshot
+
+#{"Tile ID": sorted [(target ID, link type)]} for every Tile in a snapshot
+def snapshot_links(snapshot):
+    links = {}
+    for row, tile_id in enumerate(snapshot.ids):
+        if snapshot.tile_codes[row] >= 0:
+            links[tile_id] = sorted((snapshot.ids[snapshot.targets[position]], snapshot.link_types[snapshot.link_codes[position]])
+                                    for position in range(snapshot.offsets[row], snapshot.offsets[row + 1]))
+    return links
+
+def project_links(project):
+    return {tile.id: sorted((link["target"], link["type"]) for link in tile.links) for tile in project.tiles.values()}
+
+world = Project()
+members = [rng.choice([CharacterTile, SettingTile, PlotTile])(f"Member {i}") for i in range(200)]
+for member in members:
+    world.add_tile(member)
+for _ in range(300):
+    source, target = rng.sample(members, 2)
+    if not source.get_links_to(target.id):
+        source.add_link(target.id, world, rng.choice(["references", "involves"]))
+first = world.graph_snapshot()
+first_links = snapshot_links(first)
+assert_true(first_links == project_links(world), "Snapshot differs from tile.links")
+
+for step in range(300):
+    tile = rng.choice(members)
+    action = rng.random()
+    if tile.id not in world.tiles:
+        world.add_tile(tile) #Back with its old links, some may point at removed Tiles
+    elif action < 0.4:
+        target = rng.choice(members)
+        if target.id != tile.id and target.id in world.tiles and not tile.get_links_to(target.id):
+            tile.add_link(target.id, world, rng.choice(["references", "involves", "mentions"]))
+    elif action < 0.7 and tile.links:
+        tile.remove_link(rng.choice(tile.links)["target"])
+    elif action < 0.8:
+        tile.links.append({"target": f"missing_{step % 7}", "type": "references"}) #Direct edit to a missing Tile
+        world.mark_changed(tile)
+    else:
+        world.remove_tile(tile.id)
+    if step % 30 == 0:
+        snapshot = world.graph_snapshot()
+        assert_true(snapshot_links(snapshot) == project_links(world) == snapshot_links(GraphSnapshot.from_project(world)), f"Refreshed snapshot differs at step {step}")
+        assert_true(snapshot.orphan_ids() == world.degrees.orphan_ids() and snapshot.orphan_ids(True, False) == world.degrees.orphan_ids(True, False)
+                    and snapshot.orphan_ids(require_both=True) == world.degrees.orphan_ids(require_both=True), "Snapshot orphans differ")
+        assert_true(sorted(map(sorted, snapshot.components())) == sorted(map(sorted, world.find_story_clusters())), "Snapshot components differ")
+        assert_true(sorted(snapshot.dangling_links()) == sorted((tile.id, link["target"], link["type"]) for tile in world.tiles.values()
+                                                                for link in tile.links if link["target"] not in world.tiles), "Dangling links differ")
+        for start in rng.sample(list(world.tiles), 5):
+            types = rng.choice([None, ["involves"], "references"])
+            depth = rng.choice([None, 1, 2])
+            assert_true(snapshot.descendants(start, types, depth) == world.descendants(start, types, depth), "Snapshot descendants differ")
+            assert_true(snapshot.ancestors(start, types, depth) == world.ancestors(start, types, depth), "Snapshot ancestors differ")
+            assert_true(snapshot.distances(start, types, "both", depth or 2) == world.neighbourhood(start, depth or 2, types), "Snapshot neighbourhood differs")
+assert_true(snapshot_links(first) == first_links, "Refreshing changed an older snapshot")
+assert_true(world.graph_snapshot() is world.graph_snapshot(), "Unchanged project should reuse its snapshot")
+try:
+    snapshot.row("missing_0")
+    assert_true(False, "Missing Tiles have no row to query")
+except ValueError:
+    pass
+
+#Refreshing a few rows of a large snapshot
+start = time.perf_counter()
+snapshot = big.graph_snapshot()
+build_time = time.perf_counter() - start
+for tile in tiles[:10]:
+    tile.add_link(tiles[-1].id, big, "mentions")
+start = time.perf_counter()
+refreshed = big.graph_snapshot()
+refresh_time = time.perf_counter() - start
+print(f"Snapshot of {refreshed.link_count} links built in {build_time:.2f}s, 10 rows refreshed in {refresh_time * 1000:.0f}ms")
+assert_true(refreshed.link_count == snapshot.link_count + 10 and tiles[-1].id in refreshed.descendants(tiles[0].id, "mentions"), "Refresh missed new links")
+assert_true(refresh_time < build_time / 3, "Refreshing a few rows should not rebuild the snapshot")
+
+print_ok("Snapshot matches the project through edits")
+
+print("\n--- Stage 8: Shared memory snapshot for workers ---")
+from concurrent.futures import ProcessPoolExecutor
+from SharedSnapshot import summarize #Workers answer from the shared arrays. It lives in a library module so workers can import it
+
+story = Project()
+story.project_name = "Shared Story"
+chapter = PlotMap("Chapter")
+events = [PlotTile(f"Event {i} ✨", timeline_index=i * 10 if i % 3 else None) for i in range(30)]
+people = [CharacterTile(f"Person {i}") for i in range(10)]
+for tile in [chapter] + events + people:
+    story.add_tile(tile)
+for event in events[::2]:
+    chapter.add_plot_point(event, story)
+for first, second in zip(events, events[1:]):
+    if rng.random() < 0.7:
+        first.add_link(second.id, story, "references")
+for event in events:
+    event.add_link(rng.choice(people).id, story, "involves")
+events[5].links.append({"target": "gone", "type": "references"})
+story.mark_changed(events[5])
+
+expected = {"metadata": {"project_id": story.project_id, "project_name": "Shared Story", "version": 0},
+            "orphans": story.degrees.orphan_ids(),
+            "clusters": len(story.find_story_clusters()),
+            "types": {tile.id: tile.tile_type for tile in story.tiles.values()},
+            "descendants": {events[0].id: story.descendants(events[0].id)},
+            "plot_points": {chapter.id: [(plot_id, story.tiles[plot_id].name, story.tiles[plot_id].timeline_index) for plot_id in chapter.plot_points]}}
+with story.publish_shared() as shared:
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(summarize, [shared.name] * 3, [[events[0].id]] * 3, [[chapter.id]] * 3))
+    assert_true(all(result == expected for result in results), f"Worker view differs: {results[0]}")
+    gone_row, link_type = shared.links(shared.row(events[5].id))[-1]
+    assert_true(shared.tile_id(gone_row) == "gone" and link_type == "references" and shared.tile_type(gone_row) is None,
+                "Links to missing Tiles should point at a row with no Tile")
+    try:
+        shared.row("gone")
+        assert_true(False, "Missing Tiles have no row")
+    except ValueError:
+        pass
+
+#Attaching to a large project is much faster than reading it again
+start = time.perf_counter()
+shared = big.publish_shared()
+publish_time = time.perf_counter() - start
+try:
+    start = time.perf_counter()
+    attached = Project.attach_shared(shared.name)
+    attach_time = time.perf_counter() - start
+    start = time.perf_counter()
+    graph = attached.graph()
+    graph_time = time.perf_counter() - start
+    assert_true(graph.link_count == refreshed.link_count and graph.descendants(tiles[0].id, "mentions") == {tiles[-1].id}, "Attached graph differs")
+    print(f"Published {graph.link_count} links in {publish_time:.2f}s, attached in {attach_time * 1000:.2f}ms, IDs decoded in {graph_time:.2f}s")
+    assert_true(attach_time < 0.05, "Attaching should not copy the arrays")
+    del graph
+    attached.close()
+finally:
+    shared.close()
+    shared.unlink()
+
+print_ok("Workers read the published project")
+
+print("\n--- Stage 9: Focused views ---")
+saga = Project()
+chapter_one, chapter_two = PlotMap("Chapter 1"), PlotMap("Chapter 2")
+scenes = [PlotTile(f"Scene {i}") for i in range(8)]
+heroes = [CharacterTile(f"Hero {i}") for i in range(4)]
+town = SettingTile("Town")
+for tile in [chapter_one, chapter_two, town] + scenes + heroes:
+    saga.add_tile(tile)
+for scene in scenes[:4]:
+    chapter_one.add_plot_point(scene, saga)
+for scene in scenes[4:]:
+    chapter_two.add_plot_point(scene, saga)
+for hero, scene in zip(heroes, scenes[::2]):
+    scene.add_link(hero.id, saga, "involves")
+scenes[3].add_link(scenes[4].id, saga, "causes") #Chapter 1 leads into chapter 2
+heroes[3].add_link(town.id, saga, "references")
+
+view = saga.extract_view(chapter_one.id, depth=1, link_types=["involves", "causes"])
+assert_true(set(view.tiles) == {chapter_one.id} | {scene.id for scene in scenes[:5]} | {heroes[0].id, heroes[1].id},
+            f"Chapter view should hold its plot points and what they involve or cause: {[tile.name for tile in view.tiles.values()]}")
+assert_true(all(view.tiles[tile_id] is saga.tiles[tile_id] for tile_id in view.tiles), "Views should share the project's Tile objects")
+assert_true(view.distance[chapter_one.id] == 0 and view.distance[scenes[0].id] == 0 and view.distance[scenes[4].id] == 1, "Plot points should be seeds")
+assert_true(view.links(chapter_one.id) == [] and view.links(scenes[3].id) == [{"target": scenes[4].id, "type": "causes"}], "Only chosen link types inside the view")
+assert_true(view.boundary() == {heroes[2].id}, f"Boundary wrong: {view.boundary()}")
+assert_true(view.export_graph()[scenes[4].id]["links"] == [] and "plot_points" in view.export_graph()[chapter_one.id], "Export should keep links inside the view")
+whole = saga.extract_view(chapter_one.id, depth=None)
+assert_true(len(whole) == saga.tile_count and sum(1 for _ in whole.edges()) == sum(len(tile.links) for tile in saga.tiles.values()), "Unlimited view should hold everything linked")
+assert_true(len(saga.extract_view(town.id, depth=1, direction="out")) == 1 and len(saga.extract_view(town.id, depth=1, direction="in")) == 2, "Direction ignored")
+
+heroes[2].add_link(scenes[1].id, saga, "involves")
+assert_true(heroes[2].id not in view, "Views keep their Tiles until refreshed")
+view.refresh()
+assert_true(heroes[2].id in view and heroes[2].id not in view.boundary(), "Refresh should pick up new links")
+for seed_ids, depth in (("nowhere", 1), (chapter_one.id, -1)):
+    try:
+        saga.extract_view(seed_ids, depth)
+        assert_true(False, "Bad view should raise")
+    except ValueError:
+        pass
+
+#Random views agree with plain search
+for _ in range(50):
+    start = rng.choice(list(random_project.tiles))
+    types = rng.choice([None, ["causes"], ["causes", "enables"]])
+    depth = rng.choice([0, 1, 2, 3])
+    random_view = random_project.extract_view(start, depth, types)
+    assert_true(random_view.distance == brute_distances(random_project, start, types, "both", depth), "View differs from plain search")
+    assert_true(sorted((source, link["target"]) for source, link in random_view.edges()) == sorted(
+        (tile.id, link["target"]) for tile in random_project.tiles.values() if tile.id in random_view
+        for link in tile.links if link["target"] in random_view and (types is None or link["type"] in types)), "View links are not the induced subgraph")
+
+#Views of a 100,000 Tile project only touch the Tiles they hold
+start = time.perf_counter()
+for _ in range(20):
+    focused = big.extract_view(rng.choice(tiles).id, depth=2, link_types=["causes", "enables"])
+    sum(1 for _ in focused.edges())
+view_time = (time.perf_counter() - start) / 20
+print(f"2-hop view of {len(focused)} Tiles from 100,000 in {view_time * 1000:.1f}ms")
+assert_true(view_time < 0.05, "Views should not scan the whole project")
+
+print_ok("Views hold the induced subgraph around their seeds")
+
+print("\n🎉 ALL GRAPH TESTS PASSED")
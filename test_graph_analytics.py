@@ -0,0 +1,170 @@
+from Project import Project
+from Tiles import Tile, PlotMap, PlotTile, CharacterTile, SettingTile
+from GraphAnalytics import LinkMatrix, degrees, pagerank, betweenness, rank_tiles
+from collections import deque
+import random
+import time
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+def close(first, second, tolerance=1e-6):
+    return all(abs(a - b) <= tolerance for a, b in zip(first, second)) and len(first) == len(second)
+
+#Adjacency lists {row: [(target row, weight)]} read straight from tile.links, for comparison
+def plain_adjacency(project, weights, undirected):
+    rows = {tile_id: row for row, tile_id in enumerate(project.tiles)}
+    adjacency = {row: [] for row in rows.values()}
+    for tile_id, tile in project.tiles.items():
+        for link in tile.links:
+            weight = weights.get(link["type"], 1.0)
+            if link["target"] in rows and weight:
+                adjacency[rows[tile_id]].append((rows[link["target"]], weight))
+                if undirected:
+                    adjacency[rows[link["target"]]].append((rows[tile_id], weight))
+    return adjacency
+
+def plain_pagerank(adjacency, damping=0.85, iterations=300):
+    size = len(adjacency)
+    rank = [1.0 / size] * size
+    for _ in range(iterations):
+        new_rank = [(1 - damping) / size] * size
+        for row, links in adjacency.items():
+            total = sum(weight for _, weight in links)
+            if not total:
+                for other in range(size):
+                    new_rank[other] += damping * rank[row] / size
+            for target, weight in links:
+                new_rank[target] += damping * rank[row] * weight / total
+        rank = new_rank
+    return rank
+
+#Brandes' algorithm from every source
+def plain_betweenness(adjacency):
+    size = len(adjacency)
+    centrality = [0.0] * size
+    for source in range(size):
+        order = []
+        predecessors = {row: [] for row in range(size)}
+        paths = [0] * size
+        paths[source] = 1
+        distance = [-1] * size
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            row = queue.popleft()
+            order.append(row)
+            for target, _ in adjacency[row]:
+                if distance[target] < 0:
+                    distance[target] = distance[row] + 1
+                    queue.append(target)
+                if distance[target] == distance[row] + 1:
+                    paths[target] += paths[row]
+                    predecessors[target].append(row)
+        dependency = [0.0] * size
+        for row in reversed(order):
+            for predecessor in predecessors[row]:
+                dependency[predecessor] += paths[predecessor] / paths[row] * (1 + dependency[row])
+            if row != source:
+                centrality[row] += dependency[row]
+    return centrality
+
+
+print("\n--- Stage 1: Export the link graph ---")
+rng = random.Random(8)
+project = Project()
+plots = [PlotTile(f"Scene {i}") for i in range(60)]
+people = [CharacterTile(f"Person {i}") for i in range(15)]
+places = [SettingTile(f"Place {i}") for i in range(5)]
+for tile in plots + people + places:
+    project.add_tile(tile)
+story = PlotMap("Story")
+project.add_tile(story)
+for plot in plots[:30]:
+    story.add_plot_point(plot, project)
+for plot in plots:
+    for person in rng.sample(people[:5], 2) + rng.sample(people, 1): #The first five people appear far more often
+        if not plot.get_links_to(person.id):
+            plot.add_link(person.id, project, "involves")
+    plot.add_link(rng.choice(places).id, project, "references")
+plots[0].links.append({"target": "missing", "type": "involves"}) #Links to missing Tiles are skipped
+weights = {"involves": 1.0, "references": 0.5, "plot point": 0.0}
+
+for undirected in (False, True):
+    matrix = LinkMatrix.from_project(project, weights, undirected=undirected)
+    adjacency = plain_adjacency(project, weights, undirected)
+    assert_true(matrix.ids == list(project.tiles) and all(matrix.index[tile_id] == row for row, tile_id in enumerate(matrix.ids)), "Row maps wrong")
+    for row, links in adjacency.items():
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        stored = sorted(zip(matrix.indices[start:end].tolist(), matrix.data[start:end].tolist()))
+        assert_true(stored == sorted(links), f"Row {row} differs from tile.links")
+
+    incoming, outgoing = degrees(matrix)
+    assert_true(close(outgoing, [sum(weight for _, weight in adjacency[row]) for row in range(matrix.size)]), "Weighted outgoing degree wrong")
+    counts, _ = degrees(matrix, weighted=False)
+    assert_true(close(counts, [sum(target == row for links in adjacency.values() for target, _ in links) for row in range(matrix.size)]), "Incoming link counts wrong")
+
+print_ok("CSR export matches tile.links")
+
+
+print("\n--- Stage 2: Measures match plain implementations ---")
+for undirected in (False, True):
+    matrix = LinkMatrix.from_project(project, weights, undirected=undirected)
+    adjacency = plain_adjacency(project, weights, undirected)
+    rank = pagerank(matrix)
+    assert_true(abs(rank.sum() - 1) < 1e-9, "PageRank should sum to 1")
+    assert_true(close(rank, plain_pagerank(adjacency), 1e-8), "PageRank differs from plain power iteration")
+    assert_true(close(betweenness(matrix, samples=matrix.size), plain_betweenness(adjacency)), "Exact betweenness differs from Brandes")
+
+#Sampled betweenness is an unbiased estimate of the exact value
+matrix = LinkMatrix.from_project(project, weights, undirected=True)
+exact = betweenness(matrix, samples=matrix.size)
+estimate = sum(betweenness(matrix, samples=20, seed=seed) for seed in range(30)) / 30
+top = exact.argsort()[-5:]
+assert_true(all(abs(estimate[row] - exact[row]) < 0.25 * exact[row] for row in top), "Sampled betweenness far from exact")
+
+ranking = rank_tiles(project, weights=weights, limit=5)
+assert_true({tile_id for tile_id, _ in ranking} == {person.id for person in people[:5]}, f"Most involved characters should rank first: {ranking}")
+assert_true(all(project.tiles[tile_id].tile_type in ("CharacterTile", "SettingTile") for tile_id, _ in rank_tiles(project)), "Only Characters and Settings ranked")
+assert_true([score for _, score in ranking] == sorted((score for _, score in ranking), reverse=True), "Ranking not sorted")
+assert_true(rank_tiles(project, measure="degree", limit=1)[0][0] in {place.id for place in places} | {person.id for person in people[:5]}, "Degree ranking wrong")
+try:
+    rank_tiles(project, measure="fame")
+    assert_true(False, "Unknown measure should raise")
+except ValueError:
+    pass
+
+print_ok("PageRank, degree and betweenness agree with plain versions")
+
+
+print("\n--- Stage 3: Ranking a 200,000 Tile world ---")
+world = Project()
+cast = [CharacterTile(f"Character {i}", id=f"ch_{i}") for i in range(20000)]
+settings = [SettingTile(f"Setting {i}", id=f"st_{i}") for i in range(5000)]
+events = [PlotTile(f"Event {i}", id=f"pt_{i}") for i in range(175000)]
+for tile in cast + settings + events:
+    world.tiles[tile.id] = tile #Bulk build, no index to notify
+for event in events:
+    event.links = [{"target": cast[int(rng.paretovariate(1.2)) % 20000].id, "type": "involves"} for _ in range(3)]
+    event.links.append({"target": settings[rng.randrange(5000)].id, "type": "references"})
+
+start = time.perf_counter()
+matrix = LinkMatrix.from_project(world, undirected=True)
+export_time = time.perf_counter() - start
+start = time.perf_counter()
+top = rank_tiles(world, limit=10, matrix=matrix)
+rank_time = time.perf_counter() - start
+start = time.perf_counter()
+rank_tiles(world, measure="betweenness", limit=10, matrix=matrix, samples=16, seed=1)
+betweenness_time = time.perf_counter() - start
+print(f"Exported {len(matrix.indices)} links in {export_time:.2f}s, PageRank in {rank_time:.2f}s, sampled betweenness in {betweenness_time:.2f}s")
+assert_true(top[0][0] == cast[1].id, "The most involved character should rank first")
+assert_true(export_time + rank_time < 5, "Ranking 200,000 Tiles should take seconds")
+
+print_ok("Large world ranked")
+
+print("\n🎉 ALL GRAPH ANALYTICS TESTS PASSED")
@@ -0,0 +1,363 @@
+from Project import Project
+from Tiles import Tile, PlotMap, PlotTile, CharacterTile
+from Issues import Issue, IssueReport
+from types import SimpleNamespace
+import threading
+import tempfile
+import pickle
+import random
+import time
+import os
+from pathlib import Path
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+def same_as_full(project):
+    incremental = project.load_check(raise_on_error=False, incremental=True)
+    full = project.load_check(raise_on_error=False)
+    return incremental == full
+
+
+print("\n--- Stage 1: Build a large project ---")
+rng = random.Random(4)
+project = Project()
+plots = [PlotTile(f"Plot {i}", timeline_index=i) for i in range(20000)]
+people = [CharacterTile(f"Person {i}") for i in range(5000)]
+for tile in plots + people:
+    project.add_tile(tile)
+maps = [PlotMap(f"Map {i}") for i in range(20)]
+for plotmap in maps:
+    project.add_tile(plotmap)
+    for plot in rng.sample(plots, 200):
+        plotmap.add_plot_point(plot, project)
+for plot in plots:
+    plot.add_link(rng.choice(people).id, project, "involves")
+
+start = time.perf_counter()
+report = project.load_check(raise_on_error=False)
+full_time = time.perf_counter() - start
+assert_true(report == {"errors": [], "warnings": []}, f"Clean project should pass: {report['errors'][:3]}")
+
+print_ok(f"Full check of {len(project.tiles)} Tiles in {full_time:.3f}s")
+
+
+print("\n--- Stage 2: Incremental checks only revisit touched Tiles ---")
+plots[5].add_link(plots[6].id, project, "causes")
+start = time.perf_counter()
+report = project.load_check(raise_on_error=False, incremental=True)
+incremental_time = time.perf_counter() - start
+assert_true(report["errors"] == [], "Valid link should not error")
+assert_true(incremental_time < full_time / 10, f"Incremental check not faster: {incremental_time:.4f}s vs {full_time:.4f}s")
+print(f"Incremental check after one edit in {incremental_time * 1000:.2f}ms")
+
+print_ok("Incremental check is fast")
+
+
+print("\n--- Stage 3: Incremental results match a full check ---")
+#Broken link written directly, then reported
+plots[10].links.append({"target": "ghost", "type": "references"})
+project.mark_changed(plots[10])
+report = project.load_check(raise_on_error=False, incremental=True)
+assert_true(any("links to nonexistent tile ghost" in error for error in report["errors"]), "Broken link not found incrementally")
+assert_true(same_as_full(project), "Incremental differs from full after broken link")
+
+#The missing Tile appears, so the Tile pointing at it is checked again
+ghost = Tile("Tile", "Ghost", id="ghost")
+project.add_tile(ghost)
+report = project.load_check(raise_on_error=False, incremental=True)
+assert_true(not any("links to nonexistent tile ghost" in error for error in report["errors"]), "Dangling link should resolve when the Tile is added")
+assert_true(same_as_full(project), "Incremental differs from full after adding missing Tile")
+
+#A PlotTile loses its back link, so the PlotMap holding it reports it
+plotmap = maps[3]
+plot = project.tiles[plotmap.plot_points[7]]
+plot.links = [link for link in plot.links if link["target"] != plotmap.id]
+project.mark_changed(plot)
+report = project.load_check(raise_on_error=False, incremental=True)
+assert_true(any(f"not linked back to PlotMap {plotmap.name}" in error for error in report["errors"]), "PlotMap reader not rechecked")
+assert_true(same_as_full(project), "Incremental differs from full after back link removal")
+
+#Renamed Tiles show their new name in the reports of Tiles that read them
+plot.name = "Renamed Plot"
+project.mark_changed(plot)
+assert_true(same_as_full(project), "Incremental differs from full after rename")
+
+#Removing Tiles cleans up links and results
+project.remove_tile(plots[10].id)
+project.remove_tile(ghost.id)
+plot.links.append({"target": plotmap.id, "type": "plot point"})
+project.mark_changed(plot)
+report = project.load_check(raise_on_error=False, incremental=True)
+assert_true(report["errors"] == [], f"Project should be clean again: {report['errors']}")
+assert_true(same_as_full(project), "Incremental differs from full after removals")
+
+#Random edits
+for step in range(200):
+    tile = rng.choice(plots)
+    if tile.id not in project.tiles:
+        continue
+    action = rng.random()
+    if action < 0.4:
+        target = rng.choice(people)
+        if not tile.get_links_to(target.id):
+            tile.add_link(target.id, project, "references")
+    elif action < 0.6:
+        tile.timeline_index = rng.choice([rng.randrange(100), -1])
+    elif action < 0.8 and tile.links:
+        tile.remove_link(rng.choice(tile.links)["target"])
+    else:
+        project.remove_tile(tile.id)
+    if step % 20 == 0:
+        assert_true(same_as_full(project), f"Incremental differs from full at step {step}")
+assert_true(same_as_full(project), "Incremental differs from full after random edits")
+
+print_ok("Incremental check matches full check")
+
+#Save checks every Tile, so an edit made without the hooks can't be saved
+folder = os.path.join(tempfile.mkdtemp(), "UnhookedEdit")
+guarded = Project()
+first, second = PlotTile("First"), PlotTile("Second")
+guarded.add_tile(first)
+guarded.add_tile(second)
+first.add_link(second.id, guarded, "references")
+for i in range(20):
+    guarded.add_tile(PlotTile(f"Bystander {i}"))
+assert_true(guarded.save(folder), "Clean project should save")
+guard_cache = guarded.indexes["load_check"]
+rechecked = []
+check_one = guard_cache._check_one
+guard_cache._check_one = lambda tile_id, tile: (rechecked.append(tile_id), check_one(tile_id, tile))
+first.links.append({"target": "pt_missing", "type": "references"}) #No hook sees this
+assert_true(not guarded.save(folder), "Save should refuse a link to a missing Tile")
+assert_true(rechecked == [first.id], f"Save's incremental check should only recheck the edited Tile: {rechecked}")
+assert_true(any("pt_missing" in error for error in guarded.load_check(raise_on_error=False, incremental=True)["errors"]), "The cache should keep the error")
+first.links.pop()
+guarded.save(folder)
+first.__dict__["_timeline_index"] = "soon" #Bypasses the timeline_index setter
+assert_true(not guarded.save(folder), "Save should refuse a bad timeline_index set without a hook")
+first.timeline_index = 1
+del guarded.tiles[second.id] #Removed without remove_tile
+assert_true(not guarded.save(folder), "Save should refuse a link to a Tile removed from the registry directly")
+
+print("\n--- Stage 4: Parallel full check matches the serial one ---")
+#Damage the project in every way load_check looks for
+broken_map = maps[0]
+del project.tiles[broken_map.plot_points[0]].links[:] #Plot point no longer links back
+broken_map.plot_points.append("missing_plot")
+broken_map.resolved_plot_points.append(people[0])
+survivors = [tile for tile in plots if tile.id in project.tiles]
+survivors[0].links.append({"target": "nowhere", "type": "references"})
+survivors[1].links.append({"target": people[2].id}) #Missing type
+del survivors[2].description
+del survivors[3].tags
+survivors[4].timeline_index = "soon"
+survivors[5].resolved_links.append(SimpleNamespace(id="phantom", name="Phantom"))
+del people[1].backstory
+survivors[6].timeline_index = survivors[7].timeline_index = 3
+project.reset_indexes()
+
+serial = project.load_check(raise_on_error=False)
+assert_true(len(serial["errors"]) > 8 and serial["warnings"], "Damage not detected serially")
+start = time.perf_counter()
+parallel = project.parallel_load_check(raise_on_error=False, workers=4)
+parallel_time = time.perf_counter() - start
+assert_true(parallel == serial, "Parallel check differs from serial check")
+assert_true(project.parallel_load_check(raise_on_error=False, workers=1, shard_size=7) == serial, "In-process sharding differs from serial check")
+print(f"Parallel check with 4 workers in {parallel_time:.3f}s")
+
+print_ok("Parallel check is identical to serial check")
+
+print("\n--- Stage 5: Structured reports ---")
+report = project.load_check(raise_on_error=False)
+assert_true(isinstance(report["errors"][0], str) and len(report["errors"]) == len(report.errors), "Compatibility view should list messages")
+assert_true(report.toDict() == {"errors": list(report["errors"]), "warnings": list(report["warnings"])}, "toDict should give the old shape")
+missing = report.by_code("link.missing_target")
+assert_true(any(issue.tile_ids == (survivors[0].id, "nowhere") for issue in missing), "Broken link not indexed by code")
+assert_true(any(issue.code == "tile.missing_attribute" for issue in report.by_tile(survivors[2].id)), "Missing description not indexed by Tile")
+backlinks = report.filter(code="plotmap.missing_backlink", tile_id=broken_map.id)
+assert_true(backlinks and all(issue.link_type == "plot point" for issue in backlinks), "Back link issue not filterable")
+assert_true(report.code_counts()["timeline.conflict"] == len(report.by_code("timeline.conflict")), "Code counts wrong")
+
+#Issues are kept unformatted, and the report still works like the old dict
+issue = Issue.error("demo", "{} and {}", "cats", "dogs", tile_ids=("a",))
+plain = IssueReport([issue], extra=1)
+plain["warnings"].append("Old style warning")
+assert_true(plain == {"extra": 1, "errors": ["cats and dogs"], "warnings": ["Old style warning"]}, "Report should compare like the old dict")
+assert_true(pickle.loads(pickle.dumps(plain)).by_tile("a")[0].message == "cats and dogs", "Issues should pickle")
+
+#Load failures keep their traceback until displayed
+folder = os.path.join(tempfile.mkdtemp(), "BrokenProject")
+small = Project()
+small.add_tile(PlotTile("Only"))
+small.save(folder)
+with open(os.path.join(folder, "Broken.json"), "w", encoding="utf-8") as file:
+    file.write("{not json")
+os.remove(os.path.join(folder, "manifest.json")) #Forces the fallback scan
+loaded, load_report = Project._load_from_disk(folder)
+failures = load_report.by_code("load.file_failed")
+assert_true(len(failures) == 1 and "Traceback (most recent call last)" in failures[0].message, "Load failure should carry its traceback")
+assert_true(load_report["fallback_used"] and load_report["errors"][0] == failures[0].message, "Load report compatibility view broken")
+
+print_ok("Reports are structured, indexed and lazily formatted")
+
+print("\n--- Stage 6: Background checks ---")
+#A background check (as the GUI runs it) gives the same report as a synchronous incremental check
+def background_check(project, edit=None):
+    job = project.begin_background_check()
+    results = []
+    worker = threading.Thread(target=lambda: results.append(Project.run_background_check(job)))
+    worker.start()
+    if edit:
+        edit() #Editing continues while the worker checks its copies
+    worker.join()
+    return project.finish_background_check(job, results[0])
+
+report = background_check(project)
+assert_true(report == project.load_check(raise_on_error=False), "Background check differs from full check")
+
+#Tiles edited while the worker runs are checked by the next job
+survivors[8].links.append({"target": "elsewhere", "type": "references"})
+project.mark_changed(survivors[8])
+def late_edit():
+    survivors[9].links.append({"target": "later", "type": "references"})
+    project.mark_changed(survivors[9])
+report = background_check(project, late_edit)
+assert_true(any("nonexistent tile elsewhere" in error for error in report["errors"]), "Edit before the job not checked")
+assert_true(not any("nonexistent tile later" in error for error in report["errors"]), "Job should only see Tiles copied when it began")
+report = background_check(project)
+assert_true(any("nonexistent tile later" in error for error in report["errors"]), "Edit during the job not checked by the next one")
+assert_true(report == project.load_check(raise_on_error=False), "Background checks differ from full check after edits")
+
+#A job overtaken by a synchronous check is dropped, and the check covers its Tiles
+survivors[10].links.append({"target": "overtaken", "type": "references"})
+project.mark_changed(survivors[10])
+job = project.begin_background_check()
+results = Project.run_background_check(job)
+synchronous = project.load_check(raise_on_error=False, incremental=True)
+assert_true(any("nonexistent tile overtaken" in error for error in synchronous["errors"]), "Synchronous check skipped the job's Tiles")
+assert_true(project.finish_background_check(job, results) is None, "Stale job should be dropped")
+job = project.begin_background_check()
+project.reset_indexes()
+assert_true(project.finish_background_check(job, Project.run_background_check(job)) is None, "Job from before reset_indexes should be dropped")
+report = background_check(project) #First job after a reset checks every Tile
+assert_true(report == project.load_check(raise_on_error=False), "Full background check differs from full check")
+
+print_ok("Background checks match synchronous checks")
+
+print("\n--- Stage 7: Partial load around one PlotMap ---")
+from Tiles import TileStub, SettingTile
+import json
+import shutil
+
+#Every Tile as saved, to compare projects
+def saved_form(project):
+    return {tile_id: tile.toDict() for tile_id, tile in project.tiles.items()}
+
+rng = random.Random(50)
+world = Project()
+chapters = [PlotMap(f"Chapter {i}") for i in range(40)]
+scenes = [PlotTile(f"Scene {i}", description=f"What happens in scene {i}", date=f"{3000 + i // 100}", timeline_index=i) for i in range(4000)]
+cast = [CharacterTile(f"Character {i}", description=f"Character {i}") for i in range(60)]
+places = [SettingTile(f"Place {i}") for i in range(20)]
+for tile in chapters + scenes + cast + places:
+    world.add_tile(tile)
+for position, scene in enumerate(scenes):
+    chapters[position // 100].add_plot_point(scene, world)
+    scene.add_link(cast[position % 60].id, world, "involves")
+    scene.add_link(places[position % 20].id, world, "references")
+    if position:
+        scene.add_link(scenes[position - 1].id, world, "requires")
+folder = os.path.join(tempfile.mkdtemp(), "World")
+assert_true(world.save(folder), "World should save")
+original = saved_form(world)
+
+start = time.perf_counter()
+full, _, _ = Project.load(folder)
+full_time = time.perf_counter() - start
+start = time.perf_counter()
+focused, focus_report, focus_check = Project.load(folder, focus=chapters[0].id, depth=1)
+focus_time = time.perf_counter() - start
+print(f"Full load in {full_time:.2f}s, one chapter in {focus_time:.2f}s ({len(focused.tiles) - len(focused.unloaded)} of {len(focused.tiles)} Tiles read)")
+assert_true(focus_time < full_time, "A partial load should read far fewer files")
+
+expected = set(full.neighbourhood([chapters[0].id] + chapters[0].plot_points, hops=1))
+loaded = {tile_id for tile_id in focused.tiles if tile_id not in focused.unloaded}
+assert_true(loaded == expected, "Partial load should read the chapter, its plot points and their neighbours")
+assert_true(set(focus_report["tiles_unloaded"]) == set(focused.unloaded) and not isinstance(focused.tiles[scenes[0].id], TileStub), "Unloaded Tiles not reported")
+assert_true(focus_check["errors"] == [] and len(focused.tiles) == len(original), "Partial project should hold every Tile and check clean")
+
+#Stubs answer from the manifest summary without reading their files
+stub = focused.tiles[scenes[200].id]
+assert_true(isinstance(stub, TileStub) and isinstance(stub, PlotTile), "Stubs should keep their Tile type")
+assert_true(stub.name == "Scene 200" and stub.timeline_index == 200 and stub.links == scenes[200].links, "Stub summary fields wrong")
+assert_true(focused.tiles[chapters[9].id].plot_points == chapters[9].plot_points, "Stub PlotMap should know its plot points")
+assert_true(focused.descendants(scenes[399].id, "requires") == full.descendants(scenes[399].id, "requires"), "Graph queries should see stub links")
+with focused.publish_shared() as shared:
+    assert_true(shared.timeline_index(shared.row(scenes[399].id)) == 399 and len(focused.unloaded) == len(focus_report["tiles_unloaded"]),
+                "Publishing should read stub summaries without loading files")
+assert_true([tile.id for tile in focused.find_orphans()] == [tile.id for tile in full.find_orphans()] and focused.validate_plotmap(chapters[0].id) == [],
+            "Queries should not differ from a full load")
+unloaded_count = len(focused.unloaded)
+assert_true([tile.id for tile in focused.dates.events_in_year(3007)] == [tile.id for tile in full.dates.events_in_year(3007)] and
+            len(focused.unloaded) == unloaded_count, "Dates should come from the manifest summary without loading stubs")
+assert_true(stub.description == "What happens in scene 200", "Reading a field should load the file")
+assert_true(type(stub) is PlotTile and len(focused.unloaded) == unloaded_count - 1, "Only the read Tile should be loaded")
+assert_true(focused.dates.key_of.get(stub.id) == (3002, 0, 0), "A loaded stub should stay in the date index")
+assert_true(focused.tiles[scenes[201].id].links[1]["target"] == cast[201 % 60].id and scenes[201].id in focused.unloaded, "Links are in the summary")
+
+#Saving merges back without losing unloaded Tiles
+focused.tiles[scenes[0].id].description = "Rewritten"
+focused.tiles[scenes[300].id].name = "Renamed while unloaded"
+focused.tiles[chapters[0].id].add_link(cast[59].id, focused, "references") #Links to a stub
+edited = {scenes[300].id} | {tile_id for tile_id in focused.unloaded if focused.tiles[tile_id].get_links_to(places[19].id)}
+focused.remove_tile(places[19].id) #Removing a stub edits the links of loaded and unloaded Tiles linking to it
+untouched = set(focused.unloaded) - edited
+assert_true(focused.save(folder), "Partial project should save")
+assert_true(set(focused.unloaded) == untouched, "Saving should only load stubs whose summary fields were edited")
+merged, _, merged_check = Project.load(folder)
+assert_true(merged_check["errors"] == [], f"Merged project has errors: {merged_check['errors']}")
+world.tiles[scenes[0].id].description = "Rewritten"
+world.tiles[scenes[300].id].name = "Renamed while unloaded"
+chapters[0].add_link(cast[59].id, world, "references")
+world.remove_tile(places[19].id)
+assert_true(saved_form(merged) == saved_form(world), "Saved project should match the same edits made on a full project")
+assert_true(all(Path(path).parent.parent.parent == Path(folder) for path, _ in focused.unloaded.values()), "Stubs should read from the saved folder")
+focused.hydrate()
+assert_true(not focused.unloaded and saved_form(focused) == saved_form(world), "Hydrating everything should give the full project")
+
+#Depth, several focus Tiles and older manifests
+wide, _, _ = Project.load(folder, focus=[chapters[1].id, cast[0].id], depth=2)
+assert_true(len(wide.tiles) - len(wide.unloaded) == len(world.neighbourhood([chapters[1].id, cast[0].id] + chapters[1].plot_points, hops=2)), "Depth ignored")
+try:
+    Project.load(folder, focus="nowhere")
+    assert_true(False, "Unknown focus should raise")
+except ValueError:
+    pass
+manifest_path = os.path.join(folder, "manifest.json")
+with open(manifest_path, encoding="utf-8") as file:
+    manifest = json.load(file)
+for entry in manifest["tiles"]:
+    entry.pop("date", None)
+with open(manifest_path, "w", encoding="utf-8") as file:
+    json.dump(manifest, file)
+undated, _, _ = Project.load(folder, focus=chapters[0].id)
+undated_count = len(undated.unloaded)
+assert_true(undated.dates.events_in_year(3020) == [] and len(undated.unloaded) == undated_count, "Stubs without a dated summary should be skipped, not loaded")
+undated.hydrate([scenes[2000].id])
+assert_true([tile.id for tile in undated.dates.events_in_year(3020)] == [scenes[2000].id], "A stub should be dated once its file is read")
+for entry in manifest["tiles"]:
+    entry.pop("links")
+with open(manifest_path, "w", encoding="utf-8") as file:
+    json.dump(manifest, file)
+old, old_report, _ = Project.load(folder, focus=chapters[0].id)
+assert_true(not old.unloaded and old_report.by_code("load.no_summary"), "Old manifests should load every Tile")
+shutil.rmtree(os.path.dirname(folder))
+
+print_ok("Partial loads read the focus and save back the whole project")
+
+print("\n🎉 ALL LOAD CHECK TESTS PASSED")
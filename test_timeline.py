@@ -0,0 +1,341 @@
+from Project import Project
+from Tiles import PlotMap, PlotTile, CharacterTile
+import random
+import time
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+def satisfies_links(project):
+    for tile in project.tiles.values():
+        for link in tile.links:
+            if link["type"] not in ("requires", "causes", "enables", "blocks"):
+                continue
+            source_time = tile.timeline_index
+            target_time = project.tiles[link["target"]].timeline_index
+            if link["type"] == "requires" and not source_time > target_time:
+                return False
+            if link["type"] != "requires" and not source_time < target_time:
+                return False
+    return True
+
+
+print("\n--- Stage 1: Solve a small timeline ---")
+project = Project()
+dawn = PlotTile("Dawn", timeline_index=0)
+siege = PlotTile("Siege", timeline_index=1)
+rescue = PlotTile("Rescue", timeline_index=2)
+feast = PlotTile("Feast") #Unplaced
+epilogue = PlotTile("Epilogue") #Unplaced, no constraints
+for t in [dawn, siege, rescue, feast, epilogue]:
+    project.add_tile(t)
+
+siege.add_link(rescue.id, project, "requires") #Rescue must come before Siege
+rescue.add_link(feast.id, project, "causes") #Feast after Rescue
+
+result = project.solve_timeline()
+assert_true(result["conflicts"] == [], "No conflicts expected")
+assert_true(result["order"] == [dawn.id, rescue.id, siege.id, feast.id, epilogue.id], f"Unexpected order: {[project.tiles[i].name for i in result['order']]}")
+assert_true(dawn.id not in result["changed"], "Dawn keeps its index")
+assert_true(satisfies_links(project), "Written timeline must satisfy every link")
+assert_true(project.validate_all_plotmaps() == {}, "No PlotMaps to validate")
+
+print_ok("Solver respects links and existing order")
+
+
+print("\n--- Stage 2: Already valid timelines are untouched ---")
+again = project.solve_timeline()
+assert_true(again["changed"] == [], "Re-solving a valid timeline should change nothing")
+
+print_ok("Stable re-solve")
+
+
+print("\n--- Stage 3: Conflicts are reported ---")
+a, b, c = PlotTile("A"), PlotTile("B"), PlotTile("C")
+for t in [a, b, c]:
+    project.add_tile(t)
+#Cycles cannot be made through add_link, so write them directly like a hand-edited file would
+a.links.append({"target": b.id, "type": "causes"})
+b.links.append({"target": c.id, "type": "causes"})
+c.links.append({"target": a.id, "type": "causes"})
+project.reset_indexes()
+
+before = {tile.id: tile.timeline_index for tile in project.tiles.values()}
+result = project.solve_timeline()
+assert_true(len(result["conflicts"]) == 1, f"Expected one conflict, got {result['conflicts']}")
+assert_true(len(result["conflicts"][0]) == 3, "Conflict should be the 3-link cycle")
+assert_true({link[2] for link in result["conflicts"][0]} == {"causes"}, "Conflict should list link types")
+assert_true(before == {tile.id: tile.timeline_index for tile in project.tiles.values()}, "Nothing should be written on conflict")
+assert_true(len(project.find_logic_cycles()) == 1, "Existing cycle should be reported")
+
+print_ok("Minimal conflicting constraints reported")
+
+
+print("\n--- Stage 4: 100k events ---")
+big = Project()
+rng = random.Random(3)
+events = [PlotTile(f"E{i}", timeline_index=rng.randrange(1000000) if rng.random() < 0.7 else None) for i in range(100000)]
+for event in events:
+    big.add_tile(event)
+for i in range(1, len(events)):
+    j = rng.randrange(max(0, i - 50), i)
+    events[i].links.append({"target": events[j].id, "type": "requires"})
+big.reset_indexes()
+
+start = time.perf_counter()
+result = big.solve_timeline()
+elapsed = time.perf_counter() - start
+assert_true(result["conflicts"] == [], "Random DAG has no conflicts")
+assert_true(len(result["order"]) == 100000, "Every event ordered")
+assert_true(satisfies_links(big), "Solved timeline must satisfy every link")
+print(f"Solved 100k events in {elapsed:.2f}s")
+
+print_ok("Solver scales")
+
+print("\n--- Stage 5: Inserting events without renumbering ---")
+world = Project()
+chapters = [PlotTile(f"Chapter {i}") for i in range(200)]
+for chapter in chapters:
+    world.add_tile(chapter)
+    world.insert_event(chapter) #Appends at the end
+assert_true(all(chapters[i].timeline_index < chapters[i + 1].timeline_index for i in range(199)), "Appended events should be in order")
+
+interlude = PlotTile("Interlude")
+world.add_tile(interlude)
+changed = world.insert_event(interlude, after=chapters[50])
+assert_true(changed == [interlude], "Insert with room should only touch the new event")
+assert_true(chapters[50].timeline_index < interlude.timeline_index < chapters[51].timeline_index, "Interlude misplaced")
+
+#Keep inserting at the same spot until labels run out, then check relabelling stays local and cheap
+expected = [tile.id for tile in chapters[:51]] + [interlude.id] + [tile.id for tile in chapters[51:]]
+touched = 0
+previous = interlude
+for i in range(300):
+    scene = PlotTile(f"Scene {i}")
+    world.add_tile(scene)
+    touched += len(world.insert_event(scene, after=previous, before=chapters[51]))
+    expected.insert(expected.index(chapters[51].id), scene.id)
+    previous = scene
+
+order = sorted(expected, key=lambda tile_id: world.tiles[tile_id].timeline_index)
+assert_true(order == expected, "Inserted events out of order")
+assert_true(len({world.tiles[tile_id].timeline_index for tile_id in expected}) == len(expected), "Indices should stay unique")
+assert_true(touched < 300 * 12, f"Relabelling touched too many events: {touched}")
+print(f"300 inserts at one spot touched {touched} events")
+
+ranks = world.dense_timeline_indexes()
+assert_true(sorted(ranks.values()) == list(range(len(expected))), "Dense ranks should be 0..n-1")
+assert_true(ranks[interlude.id] == 51, "Interlude should be 52nd")
+
+#Inserting right after the same event again and again (each new event goes first) keeps relabelling amortized cheap too
+anchor = chapters[100]
+expected = [tile_id for tile_id in order]
+stacked = []
+touched = 0
+start = time.perf_counter()
+for i in range(3000):
+    scene = PlotTile(f"Stacked {i}")
+    world.add_tile(scene)
+    touched += len(world.insert_event(scene, after=anchor))
+    stacked.insert(0, scene.id)
+stack_time = time.perf_counter() - start
+expected[expected.index(anchor.id) + 1:expected.index(anchor.id) + 1] = stacked
+order = sorted(expected, key=lambda tile_id: world.tiles[tile_id].timeline_index)
+assert_true(order == expected, "Events inserted after the same anchor out of order")
+assert_true(len(world.chronology.conflicts()) == 0, "Indices should stay unique")
+print(f"3000 inserts after one event touched {touched} events in {stack_time:.2f}s")
+assert_true(touched < 3000 * 25, f"Relabelling after one anchor should be O(log n) amortized, touched {touched}")
+assert_true(max(world.chronology.labels()) < 2 ** 31, "Labels should stay in the GUI's int range")
+
+print_ok("Order-maintenance inserts stay local")
+
+
+print("\n--- Stage 6: Dense legacy timelines ---")
+legacy = Project()
+old_events = [PlotTile(f"Old {i}", timeline_index=i) for i in range(10)]
+for event in old_events:
+    legacy.add_tile(event)
+newcomer = PlotTile("Newcomer")
+legacy.add_tile(newcomer)
+legacy.insert_event(newcomer, before=old_events[3])
+assert_true(old_events[2].timeline_index < newcomer.timeline_index < old_events[3].timeline_index, "Newcomer misplaced in dense timeline")
+assert_true(all(old_events[i].timeline_index < old_events[i + 1].timeline_index for i in range(9)), "Legacy order broken")
+
+legacy.respace_timeline(gap=1)
+assert_true(newcomer.timeline_index == 3 and old_events[3].timeline_index == 4, "Compacting should restore dense indices")
+
+print_ok("Dense timelines are relabelled locally and can be compacted")
+
+print("\n--- Stage 7: Chronology index ---")
+history = Project()
+moments = [PlotTile(f"Moment {i}", timeline_index=i * 10) for i in range(10)]
+for moment in moments:
+    history.add_tile(moment)
+chronology = history.chronology
+
+assert_true([t.name for t in chronology.events_between(25, 55)] == ["Moment 3", "Moment 4", "Moment 5"], "Range query wrong")
+assert_true(chronology.previous_event(30) is moments[2] and chronology.next_event(30) is moments[4], "Neighbour lookup wrong")
+assert_true(chronology.nearest_event(34) is moments[3] and chronology.nearest_event(36) is moments[4], "Nearest lookup wrong")
+assert_true(chronology.conflicts() == {}, "No conflicts yet")
+
+moments[7].timeline_index = 30 #Index updates as timeline_index changes
+assert_true(chronology.conflicts() == {30: sorted([moments[3].id, moments[7].id])}, "Conflict not detected")
+assert_true(any("timeline_index 30" in w for w in history.load_check()["warnings"]), "load_check should report the conflict")
+assert_true(moments[7] not in chronology.events_between(65, 75), "Moved event still in old position")
+
+moments[7].timeline_index = None
+assert_true(chronology.conflicts() == {}, "Unplacing should clear conflict")
+history.remove_tile(moments[0].id)
+assert_true(chronology.previous_event(10) is None, "Removed tile still indexed")
+
+late = PlotTile("Late", timeline_index=500)
+history.add_tile(late)
+assert_true(chronology.next_event(90) is late, "Added tile not indexed")
+
+print_ok("Chronology index answers queries and stays in sync")
+
+print("\n--- Stage 8: World state sweep ---")
+world = Project()
+curse = PlotTile("Curse", timeline_index=10)
+wedding = PlotTile("Wedding", timeline_index=20)
+cure = PlotTile("Cure", timeline_index=30)
+feast = PlotTile("Feast", timeline_index=40)
+hero = CharacterTile("Hero")
+witch = CharacterTile("Witch")
+for tile in [curse, wedding, cure, feast, hero, witch]:
+    world.add_tile(tile)
+curse.add_link(wedding.id, world, "blocks")
+curse.add_link(feast.id, world, "blocks")
+cure.add_link(feast.id, world, "enables")
+curse.add_link(witch.id, world, "involves")
+wedding.add_link(hero.id, world, "involves")
+hero.add_link(feast.id, world, "involves") #Character to event works too
+
+state = world.world_state
+assert_true(state.state_at(5) == {"blocks": set(), "characters": set()}, "Nothing active before the first event")
+assert_true(state.state_at(25) == {"blocks": {(curse.id, wedding.id), (curse.id, feast.id)}, "characters": {hero.id}}, "Wrong state at 25")
+assert_true(state.state_at(35)["blocks"] == {(curse.id, wedding.id)}, "Cure should lift the block on Feast")
+assert_true(state.is_present(hero.id, 40) and not state.is_present(hero.id, 41), "Hero present until Feast")
+assert_true(state.is_present(witch.id, 10) and not state.is_present(witch.id, 11), "Witch only at Curse")
+assert_true([(event, blockers) for event, blockers in state.blocked_events()] == [(wedding, [curse])], "Wedding happens while cursed")
+
+cure.timeline_index = 50 #Moving an event only rebuilds what depends on it
+assert_true(state.dirty_targets == {feast.id} and state.dirty_characters == set(), "Only Feast's blocks should be rebuilt")
+assert_true(state.is_blocked(feast.id, 45), "Feast blocked until the later Cure")
+assert_true(sorted(event.name for event, _ in state.blocked_events()) == ["Feast", "Wedding"], "Feast now blocked")
+world.remove_tile(curse.id)
+assert_true(state.blocked_events() == [] and state.presence_of(witch.id) is None, "Removing Curse clears its block and the Witch")
+
+#Sweep agrees with a brute-force scan
+rng = random.Random(5)
+crowd = Project()
+plots = [PlotTile(f"P{i}", timeline_index=rng.randrange(200)) for i in range(60)]
+people = [CharacterTile(f"C{i}") for i in range(10)]
+for tile in plots + people:
+    crowd.add_tile(tile)
+for _ in range(80):
+    source, target = rng.sample(plots, 2)
+    link_type = rng.choice(["blocks", "enables", "causes", "involves"])
+    if link_type == "involves":
+        target = rng.choice(people)
+    try:
+        source.add_link(target.id, crowd, link_type)
+    except ValueError:
+        pass #Duplicate or cyclic
+for tile in rng.sample(plots, 10):
+    tile.timeline_index = rng.randrange(200)
+
+def brute_state(project, time):
+    blocks, characters = set(), set()
+    for tile in project.tiles.values():
+        for link in tile.links:
+            target = project.tiles[link["target"]]
+            if link["type"] == "blocks" and tile.timeline_index <= time:
+                lifted = any(other.timeline_index > tile.timeline_index and other.timeline_index <= time
+                             for other in project.tiles.values() for l in other.links
+                             if l["target"] == target.id and l["type"] in ("enables", "causes"))
+                if not lifted:
+                    blocks.add((tile.id, target.id))
+        if isinstance(tile, CharacterTile):
+            times = [other.timeline_index for other in project.tiles.values() for l in other.links if l["target"] == tile.id and l["type"] == "involves"]
+            if times and min(times) <= time <= max(times):
+                characters.add(tile.id)
+    return {"blocks": blocks, "characters": characters}
+
+crowd.world_state.checkpoint_every = 2 #Several checkpoints over this timeline
+for when in range(-1, 201, 7):
+    assert_true(crowd.world_state.state_at(when) == brute_state(crowd, when), f"Replay disagrees with brute force at {when}")
+
+#A change late in the timeline keeps the checkpoints before it
+world = crowd.world_state
+world.state_at(200)
+built = list(world.checkpoints)
+late = max(plots, key=lambda tile: tile.timeline_index)
+late.timeline_index += 1
+world.state_at(0)
+kept = len(world.checkpoints)
+assert_true(0 < kept < len(built) and all(world.checkpoints[j] is built[j] for j in range(kept)), "Only checkpoints after the change should be dropped")
+for tile in rng.sample(plots, 10):
+    tile.timeline_index = rng.randrange(200)
+for when in range(-1, 202, 5):
+    assert_true(world.state_at(when) == brute_state(crowd, when), f"Replay disagrees with brute force at {when} after edits")
+
+print_ok("World state answers time queries and rebuilds incrementally")
+
+print("\n--- Stage 9: Story order vs chronology ---")
+tale = Project()
+beats = [PlotTile(f"Beat {i}", timeline_index=i * 10) for i in range(6)]
+for beat in beats:
+    tale.add_tile(beat)
+telling = PlotMap("Telling")
+tale.add_tile(telling)
+for i in [0, 1, 4, 2, 3, 5]: #Beat 4 is told early, as a flash-forward
+    telling.add_plot_point(beats[i], tale)
+drifter = PlotTile("Drifter") #Unplaced
+tale.add_tile(drifter)
+telling.add_plot_point(drifter, tale)
+
+metrics = tale.plotmap_nonlinearity(telling.id)
+assert_true(metrics["inversions"] == 2 and metrics["max_inversions"] == 15, f"Wrong inversion count: {metrics['inversions']}")
+assert_true(metrics["flashbacks"] == [beats[4].id], "Beat 4 is the single out-of-order event")
+assert_true(metrics["unplaced"] == [drifter.id], "Unplaced plot point not reported")
+assert_true(metrics["displacement"][beats[4].id] == -2 and metrics["displacement"][beats[2].id] == 1, "Wrong displacement")
+
+#Matches brute force on random maps
+rng = random.Random(9)
+from Analytics import count_inversions, longest_non_decreasing
+for _ in range(50):
+    values = [rng.randrange(20) for _ in range(rng.randrange(40))]
+    brute = sum(1 for i in range(len(values)) for j in range(i + 1, len(values)) if values[i] > values[j])
+    assert_true(count_inversions(values) == brute, "Fenwick inversion count wrong")
+    chosen = longest_non_decreasing(values)
+    picked = [values[i] for i in chosen]
+    assert_true(picked == sorted(picked) and chosen == sorted(chosen), "Subsequence not in order")
+    best = [1] * len(values) #O(n^2) longest non-decreasing length
+    for i in range(len(values)):
+        for j in range(i):
+            if values[j] <= values[i]:
+                best[i] = max(best[i], best[j] + 1)
+    assert_true(len(chosen) == max(best, default=0), "Subsequence not longest")
+
+#50k plot points
+epic = Project()
+epic_map = PlotMap("Epic")
+epic.add_tile(epic_map)
+for i in range(50000):
+    point = PlotTile(f"Point {i}", timeline_index=rng.randrange(1000000))
+    epic.add_tile(point)
+    epic_map.plot_points.append(point.id) #Bulk build without per-insert link bookkeeping
+start = time.perf_counter()
+metrics = epic.plotmap_nonlinearity(epic_map.id)
+elapsed = time.perf_counter() - start
+assert_true(len(metrics["in_order"]) + len(metrics["flashbacks"]) == 50000, "Every plot point classified")
+print(f"Analyzed 50k plot points in {elapsed:.2f}s")
+
+print_ok("Nonlinearity metrics are exact and fast")
+
+print("\n🎉 ALL TIMELINE TESTS PASSED")
@@ -0,0 +1,594 @@
+from Project import Project
+from Tiles import PlotMap, PlotTile, CharacterTile
+from Causality import TopologicalOrderIndex
+from Rules import Rule
+import time
+
+def assert_true(condition, message):
+    if not condition:
+        raise AssertionError("❌ " + message)
+
+def print_ok(msg):
+    print("✅", msg)
+
+
+print("\n--- Stage 1: Build Project ---")
+project = Project()
+
+map1 = PlotMap("Main Story")
+map2 = PlotMap("Side Story")
+p1 = PlotTile("Call to Adventure", timeline_index=1)
+p2 = PlotTile("Meet the Mentor", timeline_index=2)
+p3 = PlotTile("First Trial", timeline_index=3)
+p4 = PlotTile("Ambush", timeline_index=4)
+char = CharacterTile("Arin")
+
+for t in [map1, map2, p1, p2, p3, p4, char]:
+    project.add_tile(t)
+
+map1.add_plot_point(p1, project)
+map1.add_plot_point(p2, project)
+map1.add_plot_point(p3, project)
+map2.add_plot_point(p3, project)
+map2.add_plot_point(p4, project)
+
+print_ok("Project built")
+
+
+print("\n--- Stage 2: Valid logical links ---")
+p3.add_link(p2.id, project, "requires")
+p1.add_link(p2.id, project, "causes")
+char.add_link(p1.id, project, "involves")
+
+assert_true(project.validate_plotmap(map1.id) == [], "Valid links should produce no errors")
+assert_true(project.validate_all_plotmaps() == {map1.id: [], map2.id: []}, "All PlotMaps should be valid")
+
+print_ok("Satisfied links produce no errors")
+
+
+print("\n--- Stage 3: Every broken link is reported ---")
+p2.add_link(p4.id, project, "requires") #Meet the Mentor requires Ambush, but it happens later
+p4.add_link(p1.id, project, "enables") #Ambush enables Call to Adventure, but it happens earlier
+p4.add_link(p3.id, project, "blocks") #Blocks target is only in map2
+
+results = project.validate_all_plotmaps()
+assert_true(len(results[map1.id]) == 1, f"map1 should have 1 error, got {results[map1.id]}")
+assert_true(any("requires Ambush" in e for e in results[map1.id]), "Missing requires error")
+assert_true(len(results[map2.id]) == 2, f"map2 should have 2 errors, got {results[map2.id]}")
+assert_true(any("enables Call to Adventure" in e for e in results[map2.id]), "Missing enables error")
+assert_true(any("blocks First Trial" in e for e in results[map2.id]), "Missing blocks error")
+assert_true(project.validate_plotmap(map2.id) == results[map2.id], "Single and whole-project validation differ")
+
+print_ok("Per-map results report every broken constraint")
+
+
+print("\n--- Stage 4: Unknown PlotMap ---")
+try:
+    project.validate_plotmap("pm_missing")
+    assert_true(False, "Unknown PlotMap should raise ValueError")
+except ValueError:
+    pass
+
+print_ok("Unknown PlotMap raises ValueError")
+
+
+print("\n--- Stage 5: Many PlotMaps sharing events ---")
+big = Project()
+events = [PlotTile(f"Event {i}", timeline_index=i) for i in range(2000)]
+for event in events:
+    big.add_tile(event)
+for i in range(1, len(events)):
+    events[i].add_link(events[i - 1].id, big, "requires")
+
+maps = [PlotMap(f"Map {m}") for m in range(500)]
+for plotmap in maps:
+    big.add_tile(plotmap)
+    plotmap.plot_points = [event.id for event in events] #Bulk assign (no links needed for validation)
+
+start = time.perf_counter()
+results = big.validate_all_plotmaps()
+elapsed = time.perf_counter() - start
+
+assert_true(len(results) == 500, "Should validate every PlotMap")
+assert_true(all(errors == [] for errors in results.values()), "Chain should be valid in every PlotMap")
+print(f"Validated 500 PlotMaps x 2000 plot points in {elapsed:.3f}s")
+
+print_ok("Whole-project validation scales")
+
+print("\n--- Stage 6: Transitive validation ---")
+chain = Project()
+c_map = PlotMap("Chain")
+a = PlotTile("A", timeline_index=1)
+b = PlotTile("B", timeline_index=5)
+c = PlotTile("C", timeline_index=3)
+for t in [c_map, a, b, c]:
+    chain.add_tile(t)
+for t in [a, b, c]:
+    c_map.add_plot_point(t, chain)
+
+#C requires B, B requires A. Each hop is valid except C/B, and A/C is only related through B
+c.add_link(b.id, chain, "requires")
+b.add_link(a.id, chain, "requires")
+
+direct = chain.validate_plotmap(c_map.id)
+transitive = chain.validate_plotmap(c_map.id, transitive=True)
+assert_true(len(direct) == 1, f"Only C requires B is directly broken, got {direct}")
+assert_true(len(transitive) == 1, f"A/C chain is satisfied, got {transitive}")
+
+a.timeline_index = 4 #Now A happens after C, which is only caught through the chain
+transitive = chain.validate_plotmap(c_map.id, transitive=True)
+assert_true(any("A must happen before C" in e for e in transitive), f"Chain violation not reported: {transitive}")
+assert_true(chain.must_precede(a.id, c.id), "A must precede C through B")
+assert_true(not chain.must_precede(c.id, a.id), "C does not precede A")
+
+print_ok("Chains of logical links are validated")
+
+
+print("\n--- Stage 7: Reachability index stays in sync with link changes ---")
+import random
+
+def brute_force_precedes(project, before_id, after_id):
+    successors = {}
+    for tile in project.tiles.values():
+        for link in tile.links:
+            if link["type"] in ("requires", "causes", "enables", "blocks"):
+                if link["type"] == "requires":
+                    successors.setdefault(link["target"], set()).add(tile.id)
+                else:
+                    successors.setdefault(tile.id, set()).add(link["target"])
+    stack = list(successors.get(before_id, ()))
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if node == after_id:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(successors.get(node, ()))
+    return False
+
+rng = random.Random(7)
+graph = Project()
+nodes = [PlotTile(f"N{i}") for i in range(25)]
+for node in nodes:
+    graph.add_tile(node)
+graph.must_precede(nodes[0].id, nodes[1].id) #Builds the index so every later change is incremental
+
+for step in range(300):
+    source, target = rng.sample(nodes, 2)
+    link_type = rng.choice(["requires", "causes", "enables", "blocks"])
+    if any(link["target"] == target.id and link["type"] == link_type for link in source.links):
+        source.remove_link(target.id, link_type)
+    else:
+        try:
+            source.add_link(target.id, graph, link_type)
+        except ValueError:
+            pass #Cycle-creating links are rejected
+
+    x, y = rng.sample(nodes, 2)
+    assert_true(graph.must_precede(x.id, y.id) == brute_force_precedes(graph, x.id, y.id), f"Reachability mismatch at step {step}")
+
+print_ok("Incremental reachability matches brute force")
+
+print("\n--- Stage 8: Cycle-creating links are rejected ---")
+loop = Project()
+e1, e2, e3 = PlotTile("Spark"), PlotTile("Fire"), PlotTile("Ash")
+for t in [e1, e2, e3]:
+    loop.add_tile(t)
+e2.add_link(e1.id, loop, "requires") #Spark -> Fire
+e2.add_link(e3.id, loop, "causes") #Fire -> Ash
+
+cycle = loop.find_logic_cycle(e3.id, e1.id, "causes") #Ash -> Spark would close the loop
+assert_true(cycle == [e3.id, e1.id, e2.id, e3.id], f"Wrong cycle path: {cycle}")
+assert_true(loop.find_logic_cycle(e1.id, e3.id, "causes") is None, "Spark -> Ash is consistent")
+
+try:
+    e1.add_link(e3.id, loop, "requires") #Spark requires Ash: Ash -> Spark
+    assert_true(False, "Cycle should be rejected")
+except ValueError as error:
+    assert_true("Spark -> Fire -> Ash -> Spark" in str(error) or "Ash -> Spark -> Fire -> Ash" in str(error), f"Cycle path missing from error: {error}")
+assert_true(not any(link["target"] == e3.id for link in e1.links), "Rejected link should not be added")
+
+try:
+    e1.add_link(e1.id, loop, "causes")
+    assert_true(False, "Self cycle should be rejected")
+except ValueError:
+    pass
+
+print_ok("Cycle path reported and link rejected")
+
+
+print("\n--- Stage 9: Order stays topological under random edits ---")
+rng = random.Random(11)
+dag = Project()
+nodes = [PlotTile(f"D{i}") for i in range(40)]
+for node in nodes:
+    dag.add_tile(node)
+order_index = dag.get_index("topological_order", TopologicalOrderIndex)
+
+for step in range(600):
+    source, target = rng.sample(nodes, 2)
+    link_type = rng.choice(["requires", "causes"])
+    existing = [link for link in source.links if link["target"] == target.id and link["type"] == link_type]
+    if existing and rng.random() < 0.5:
+        source.remove_link(target.id, link_type)
+        continue
+    if existing:
+        continue
+    would_cycle = brute_force_precedes(dag, *( (source.id, target.id) if link_type == "requires" else (target.id, source.id) ))
+    try:
+        source.add_link(target.id, dag, link_type)
+        assert_true(not would_cycle, f"Cycle not detected at step {step}")
+    except ValueError:
+        assert_true(would_cycle, f"False cycle reported at step {step}")
+
+    for tile in nodes:
+        for link in tile.links:
+            before, after = (link["target"], tile.id) if link["type"] == "requires" else (tile.id, link["target"])
+            assert_true(order_index.order[before] < order_index.order[after], f"Order broken at step {step}")
+
+assert_true(dag.find_logic_cycles() == [], "No cycles should exist")
+
+print_ok("Incremental topological order detects exactly the cycle-creating links")
+
+print("\n--- Stage 10: Character appearances and continuity ---")
+story = Project()
+prologue = PlotTile("Prologue", timeline_index=0)
+ambush = PlotTile("Ambush", timeline_index=10)
+meeting = PlotTile("Meeting", timeline_index=20)
+duel = PlotTile("Duel", timeline_index=30)
+rogue = CharacterTile("Rogue")
+knight = CharacterTile("Knight")
+saga = PlotMap("Saga")
+for tile in [prologue, ambush, meeting, duel, rogue, knight, saga]:
+    story.add_tile(tile)
+for plot in [prologue, ambush, meeting, duel]:
+    saga.add_plot_point(plot, story)
+ambush.add_link(rogue.id, story, "involves")
+meeting.add_link(rogue.id, story, "involves")
+knight.add_link(duel.id, story, "involves") #Character to event works too
+meeting.add_tag("introduction")
+
+characters = story.characters
+assert_true(characters.first_appearance(rogue.id) is ambush, "Rogue first appears on the timeline at the Ambush")
+assert_true(characters.first_appearance(rogue.id, saga.id) is ambush, "Rogue first appears in the Saga at the Ambush")
+assert_true(characters.appearances_in_map(knight.id, saga.id) == [(3, duel.id)], "Knight's appearances wrong")
+errors = story.validate_characters()
+assert_true(len(errors) == 2, f"Expected a timeline and a PlotMap continuity error, got {errors}")
+assert_true(all("Rogue appears in Ambush" in error for error in errors), "Errors should name the early appearance")
+
+saga.move_plot_point(1, 2) #Meeting now comes before the Ambush in the Saga
+assert_true(characters.first_appearance(rogue.id, saga.id) is meeting, "Index not updated after move_plot_point")
+ambush.timeline_index = 25 #And after it on the timeline
+assert_true(characters.first_appearance(rogue.id) is meeting, "Index not updated after timeline change")
+assert_true(story.validate_characters() == [], "Continuity should now hold")
+
+flashback = PlotTile("Flashback", timeline_index=5)
+story.add_tile(flashback)
+saga.add_plot_point(flashback, story, index=0)
+flashback.add_link(rogue.id, story, "involves")
+errors = story.validate_characters([rogue.id])
+assert_true(len(errors) == 2 and all("Flashback" in error for error in errors), f"New appearance not indexed: {errors}")
+flashback.remove_link(rogue.id, "involves")
+assert_true(story.validate_characters() == [], "Removed appearance still indexed")
+
+#Index agrees with walking every PlotMap
+rng = random.Random(11)
+crowd = Project()
+plots = [PlotTile(f"P{i}", timeline_index=rng.randrange(100)) for i in range(80)]
+people = [CharacterTile(f"C{i}") for i in range(12)]
+books = [PlotMap(f"Book {i}") for i in range(4)]
+for tile in plots + people + books:
+    crowd.add_tile(tile)
+for book in books:
+    for plot in rng.sample(plots, 30):
+        book.add_plot_point(plot, crowd)
+for _ in range(120):
+    plot, person = rng.choice(plots), rng.choice(people)
+    if not plot.get_links_to(person.id):
+        plot.add_link(person.id, crowd, "involves")
+for _ in range(20):
+    book = rng.choice(books)
+    book.move_plot_point(rng.randrange(30), rng.randrange(30))
+for person in people:
+    for book in books:
+        walked = [(position, plot_id) for position, plot_id in enumerate(book.plot_points) if crowd.tiles[plot_id].get_links_to(person.id)]
+        assert_true(crowd.characters.appearances_in_map(person.id, book.id) == walked, "Index disagrees with PlotMap walk")
+
+print_ok("Character index tracks appearances and powers continuity checks")
+
+print("\n--- Stage 11: PlotMaps that disagree on shared events ---")
+shared = Project()
+events = [PlotTile(f"Event {i}") for i in range(5)]
+for event in events:
+    shared.add_tile(event)
+first, second, third = PlotMap("First"), PlotMap("Second"), PlotMap("Third")
+for plotmap in [first, second, third]:
+    shared.add_tile(plotmap)
+for i in [0, 1, 2, 3]:
+    first.add_plot_point(events[i], shared)
+for i in [0, 2, 1, 4]: #Swaps Event 1 and Event 2
+    second.add_plot_point(events[i], shared)
+for i in [3, 4]: #Shares nothing ordered with First
+    third.add_plot_point(events[i], shared)
+
+conflicts = shared.find_plotmap_order_conflicts()
+assert_true(len(conflicts) == 1, f"Expected one conflicting pair of PlotMaps, got {conflicts}")
+assert_true(conflicts[0]["plotmaps"] == (first.id, second.id) and conflicts[0]["shared"] == 3, "Wrong PlotMaps reported")
+assert_true(conflicts[0]["inversions"] == 1 and conflicts[0]["pairs"] == [(events[1].id, events[2].id)], "Wrong conflicting events")
+second.move_plot_point(1, 2)
+assert_true(shared.find_plotmap_order_conflicts() == [], "Conflict should be gone")
+
+#Hundreds of PlotMaps, checked against pairwise brute force on a sample
+rng = random.Random(21)
+library = Project()
+scenes = [PlotTile(f"Scene {i}") for i in range(3000)]
+for scene in scenes:
+    library.add_tile(scene)
+volumes = []
+for i in range(300):
+    volume = PlotMap(f"Volume {i}")
+    library.add_tile(volume)
+    volume.plot_points = [scene.id for scene in rng.sample(scenes, 150)] #Bulk build
+    volumes.append(volume)
+
+start = time.perf_counter()
+conflicts = library.find_plotmap_order_conflicts(limit=3)
+elapsed = time.perf_counter() - start
+print(f"Checked 300 PlotMaps in {elapsed:.2f}s, {len(conflicts)} conflicting pairs")
+
+found = {conflict["plotmaps"]: conflict for conflict in conflicts}
+for _ in range(200):
+    a, b = rng.sample(volumes, 2)
+    if (a.id, b.id) not in found:
+        a, b = b, a
+    common = [tile_id for tile_id in a.plot_points if tile_id in set(b.plot_points)]
+    brute = sum(1 for i in range(len(common)) for j in range(i + 1, len(common)) if b.plot_points.index(common[i]) > b.plot_points.index(common[j]))
+    conflict = found.get((a.id, b.id))
+    assert_true((conflict["inversions"] if conflict else 0) == brute, "Inversion count disagrees with brute force")
+    for earlier, later in (conflict["pairs"] if conflict else []):
+        assert_true(a.plot_points.index(earlier) < a.plot_points.index(later) and b.plot_points.index(earlier) > b.plot_points.index(later), "Reported pair is not a conflict")
+
+print_ok("Cross-PlotMap order conflicts found by inversion counting")
+
+print("\n--- Stage 12: Project rules run in one traversal ---")
+ruled = Project()
+story = [PlotTile(f"Beat {i}", timeline_index=i) for i in range(6)]
+hero = CharacterTile("Hero")
+for tile in story + [hero]:
+    ruled.add_tile(tile)
+outline = PlotMap("Outline")
+ruled.add_tile(outline)
+for beat in story:
+    outline.add_plot_point(beat, ruled)
+story[1].add_link(story[3].id, ruled, "causes")
+story[4].add_link(story[2].id, ruled, "requires") #Requires an earlier beat, so valid
+story[2].add_link(story[5].id, ruled, "requires") #Requires a later beat
+story[0].add_link(hero.id, ruled, "involves")
+assert_true(len(ruled.run_rules().errors) == 1, "Default rules should only find the broken requires link")
+
+#The logic order rule finds the same broken links as PlotMap validation
+order_issues = ruled.run_rules().by_code("plotmap.logic_order")
+assert_true([issue.message for issue in order_issues] == ruled.validate_plotmap(outline.id), "Logic order rule disagrees with validate_plotmap")
+
+#Links written directly (skipping add_link) are still caught
+hero.links.append({"target": story[0].id, "type": "blocks"})
+story[5].links.append({"target": story[1].id, "type": "involves"})
+report = ruled.run_rules()
+assert_true([issue.tile_ids for issue in report.by_code("link.logic_endpoints")] == [(hero.id, story[0].id)], "Logic link from a character not reported")
+assert_true([issue.tile_ids for issue in report.by_code("link.involves_target")] == [(story[5].id, story[1].id)], "Involves link without a character not reported")
+assert_true(report.by_code("link.involves_target")[0].severity == "warning", "Involves rule should warn")
+hero.links.pop()
+story[5].links.pop()
+
+#Links to missing Tiles are skipped by link rules unless they ask for them
+story[3].links.append({"target": "pt_gone", "type": "causes"})
+hero.links.append({"target": "pt_gone", "type": "involves"})
+assert_true(len(ruled.run_rules().errors) == 1, "Links to missing Tiles should not crash or change the built-in results")
+class DanglingRule(Rule):
+    code = "custom.dangling"
+    link_types = {"causes"}
+    missing_targets = True
+    def check_link(self, context, tile, link, target):
+        if target is None:
+            yield self.issue("{} {} missing Tile {}", tile.name, link["type"], link["target"], tile_ids=(tile.id,), link_type=link["type"])
+ruled.add_rule(DanglingRule())
+assert_true([issue.tile_ids for issue in ruled.run_rules().by_code("custom.dangling")] == [(story[3].id,)], "Opted-in rule should see the missing target")
+ruled.remove_rule("custom.dangling")
+story[3].links.pop()
+hero.links.pop()
+
+#add_link still refuses bad logic links through the rules
+try:
+    hero.add_link(story[0].id, ruled, "causes")
+    assert_true(False, "Logic link from a character should be refused")
+except ValueError as error:
+    assert_true("must be between two PlotTiles" in str(error), f"Wrong error: {error}")
+try:
+    story[3].add_link(story[1].id, ruled, "causes")
+    assert_true(False, "Cycle should be refused")
+except ValueError as error:
+    assert_true("cycle" in str(error), f"Wrong error: {error}")
+
+#Project-specific rules share the traversal: each Tile and link is visited once however many rules are registered
+class UnnamedBeatRule(Rule):
+    code = "custom.unnamed"
+    tile_types = {"PlotTile"}
+    visits = 0
+    def check_tile(self, context, tile):
+        UnnamedBeatRule.visits += 1
+        if not tile.name.strip():
+            yield self.issue("{} has no name", tile.id, tile_ids=(tile.id,))
+
+class ReferenceRule(Rule):
+    code = "custom.references"
+    link_types = {"references"}
+    target_types = {"CharacterTile"}
+    visits = 0
+    def check_link(self, context, tile, link, target):
+        ReferenceRule.visits += 1
+        yield self.issue("{} references {}", tile.name, target.name, tile_ids=(tile.id, target.id), link_type="references")
+    def check_new_link(self, project, tile, target, link_type):
+        if tile is target:
+            raise ValueError("A Tile cannot reference itself")
+
+ruled.add_rule(UnnamedBeatRule())
+ruled.add_rule(ReferenceRule())
+story[2].name = " "
+story[1].add_link(hero.id, ruled, "references")
+story[1].add_link(story[4].id, ruled, "references") #Target is not a character, so the rule skips it
+report = ruled.run_rules()
+assert_true(UnnamedBeatRule.visits == len(story), f"Tile rule should see each PlotTile once, saw {UnnamedBeatRule.visits}")
+assert_true(ReferenceRule.visits == 1, f"Link rule should only see matching links, saw {ReferenceRule.visits}")
+assert_true([issue.tile_ids for issue in report.by_code("custom.unnamed")] == [(story[2].id,)], "Custom tile rule not reported")
+assert_true(len(report.by_code("plotmap.logic_order")) == len(order_issues), "Custom rules changed built-in results")
+assert_true(ruled.run_rules([story[2].id]).by_code("custom.unnamed") and not ruled.run_rules([story[1].id]).by_code("custom.unnamed"), "tile_ids should limit the traversal")
+try:
+    ruled.add_rule(UnnamedBeatRule())
+    assert_true(False, "Duplicate rule codes should be refused")
+except ValueError:
+    pass
+try:
+    hero.add_link(hero.id, ruled, "references")
+    assert_true(False, "Custom new link rule should refuse the link")
+except ValueError as error:
+    assert_true("cannot reference itself" in str(error), f"Wrong error: {error}")
+
+ruled.remove_rule("custom.unnamed")
+assert_true(not ruled.run_rules().by_code("custom.unnamed"), "Removed rule still runs")
+assert_true(Project().rules.get("custom.references") is None, "Project rules should not be shared")
+
+print_ok("Built-in and project rules checked in a single pass")
+
+print("\n--- Stage 13: Characters that appear together ---")
+#Shared PlotTiles counted straight from the involves links, for comparison
+def brute_shared(project, plot_ids=None):
+    cast = {}
+    for tile in project.tiles.values():
+        for link in tile.links:
+            target = project.tiles.get(link["target"])
+            if link["type"] != "involves" or target is None:
+                continue
+            if tile.tile_type == "PlotTile" and target.tile_type == "CharacterTile":
+                cast.setdefault(tile.id, set()).add(target.id)
+            elif tile.tile_type == "CharacterTile" and target.tile_type == "PlotTile":
+                cast.setdefault(target.id, set()).add(tile.id)
+    counts = {}
+    for plot_id, characters in cast.items():
+        if plot_ids is None or plot_id in plot_ids:
+            for first in characters:
+                for second in characters:
+                    if first < second:
+                        counts[(first, second)] = counts.get((first, second), 0) + 1
+    return counts
+
+ensemble = Project()
+anna, ben, cara, dev = [CharacterTile(name) for name in ["Anna", "Ben", "Cara", "Dev"]]
+scenes = [PlotTile(f"Scene {i}", timeline_index=i) for i in range(5)]
+for tile in [anna, ben, cara, dev] + scenes:
+    ensemble.add_tile(tile)
+chapter = PlotMap("Chapter")
+ensemble.add_tile(chapter)
+for scene in scenes[:2]:
+    chapter.add_plot_point(scene, ensemble)
+for scene in scenes[:4]:
+    scene.add_link(anna.id, ensemble, "involves")
+    ben.add_link(scene.id, ensemble, "involves") #Either direction counts
+scenes[0].add_link(cara.id, ensemble, "involves")
+scenes[4].add_link(cara.id, ensemble, "involves")
+scenes[4].add_link(dev.id, ensemble, "involves")
+
+suggestions = ensemble.suggest_character_links()
+assert_true([(suggestion["characters"], suggestion["shared"]) for suggestion in suggestions] == [(tuple(sorted((anna.id, ben.id))), 4)],
+            f"Anna and Ben should be suggested: {suggestions}")
+assert_true(suggestions[0]["ratio"] == 1.0, "Anna and Ben always appear together")
+assert_true(ensemble.coappearances.shared(cara.id, dev.id) == 1 and ensemble.suggest_character_links(min_shared=1)[-1]["shared"] == 1, "Single shared scene not counted")
+assert_true(ensemble.suggest_character_links(plotmap_id=chapter.id)[0]["shared"] == 2, "Chapter should only count its plot points")
+
+anna.add_link(ben.id, ensemble, "references") #Linked characters are not suggested
+assert_true(ensemble.suggest_character_links() == [], "Linked characters should not be suggested")
+anna.remove_link(ben.id)
+scenes[1].remove_link(anna.id)
+assert_true(ensemble.coappearances.shared(anna.id, ben.id) == 3, "Removed involvement still counted")
+chapter.remove_plot_point(scenes[1])
+assert_true(ensemble.coappearances.shared(anna.id, ben.id, chapter.id) == 1, "Chapter counts not refreshed")
+
+#Random edits against counts from scratch
+rng = random.Random(46)
+crowd = Project()
+characters = [CharacterTile(f"Character {i}") for i in range(25)]
+events = [PlotTile(f"Event {i}") for i in range(80)]
+for tile in characters + events:
+    crowd.add_tile(tile)
+acts = [PlotMap(f"Act {i}") for i in range(3)]
+for act in acts:
+    crowd.add_tile(act)
+    for event in rng.sample(events, 20):
+        act.add_plot_point(event, crowd)
+counts = crowd.coappearances
+for step in range(600):
+    event = rng.choice(events)
+    character = rng.choice(characters)
+    action = rng.random()
+    if action < 0.6:
+        source, target = (event, character) if rng.random() < 0.5 else (character, event)
+        if not source.get_links_to(target.id):
+            source.add_link(target.id, crowd, "involves")
+    elif action < 0.9:
+        event.remove_link(character.id)
+        character.remove_link(event.id)
+    else:
+        act = rng.choice(acts)
+        if event.id in act.plot_points:
+            act.remove_plot_point(event)
+        else:
+            act.add_plot_point(event, crowd)
+    if step % 50 == 0:
+        assert_true(counts.pairs == brute_shared(crowd), f"Co-appearance counts differ at step {step}")
+        for act in acts:
+            assert_true(counts._map_counts(act.id) == brute_shared(crowd, set(act.plot_points)), "PlotMap counts differ")
+crowd.remove_tile(characters[0].id)
+crowd.remove_tile(events[0].id)
+assert_true(counts.pairs == brute_shared(crowd), "Counts not updated when Tiles are removed")
+assert_true(crowd.reset_indexes() or crowd.coappearances.pairs == counts.pairs, "Rebuilt counts differ from incremental ones")
+
+#Involves links written before their target joins the project count once it is added, and direct edits count after mark_changed
+counts = crowd.coappearances
+late = CharacterTile("Late", id="ch_late")
+for event in events[1:4]:
+    event.links.append({"target": late.id, "type": "involves"})
+    crowd.mark_changed(event)
+crowd.add_tile(late)
+assert_true(counts.pairs == brute_shared(crowd), "Links to a newly added character not counted")
+assert_true(set(crowd.characters.appearances[late.id]) == {event.id for event in events[1:4]}, "Character index missed links to a newly added character")
+events[5].links = [link for link in events[5].links if link["type"] != "involves"]
+events[5].links.append({"target": late.id, "type": "involves"})
+crowd.mark_changed(events[5])
+assert_true(counts.pairs == brute_shared(crowd), "Direct edits not counted after mark_changed")
+crowd.remove_tile(late.id)
+assert_true(counts.pairs == brute_shared(crowd) and late.id not in crowd.characters.appearances, "Links to a removed character still counted")
+
+#Updating after one new involvement does not rebuild
+big = Project()
+people = [CharacterTile(f"Person {i}") for i in range(2000)]
+moments = [PlotTile(f"Moment {i}") for i in range(20000)]
+for tile in people + moments:
+    big.add_tile(tile)
+for moment in moments:
+    for person in rng.sample(people[:-1], 4): #The last person joins later
+        moment.add_link(person.id, big, "involves")
+start = time.perf_counter()
+big.coappearances
+build_time = time.perf_counter() - start
+start = time.perf_counter()
+for moment in moments[:100]:
+    moment.add_link(people[-1].id, big, "involves")
+update_time = (time.perf_counter() - start) / 100
+start = time.perf_counter()
+top = big.suggest_character_links(limit=5, min_shared=1)
+print(f"Counts built in {build_time:.2f}s, updated in {update_time * 1e6:.0f}us per link, top pairs in {time.perf_counter() - start:.3f}s")
+assert_true(len(top) == 5 and update_time < build_time / 100, "Involvement updates should be incremental")
+
+print_ok("Co-appearance counts and link suggestions")
+
+print("\n🎉 ALL VALIDATION TESTS PASSED")